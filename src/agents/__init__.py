@@ -1,3 +1,3 @@
 from .exercise_generator import exercise_generator, get_selected_words
 from .evaluator import evaluator
-from .formatter import formatter, FillInBlankQuestion, FillInBlankExercise, MultipleChoiceQuestion, MultipleChoiceExercise, ExerciseOutput
\ No newline at end of file
+from .formatter import formatter, batch_formatter, FillInBlankQuestion, FillInBlankExercise, MultipleChoiceQuestion, MultipleChoiceExercise, ExerciseOutput, ExerciseBatch
\ No newline at end of file
@@ -1,20 +1,26 @@
+import asyncio
+
 from agents import Agent, function_tool
-from typing import List, Dict
+from typing import Any, List, Dict
+
+from src.exercises.vocabulary import word_details
 
 # Define a tool to access selected vocabulary words
 @function_tool
-def get_selected_words(words: List[str]) -> List[Dict[str, str]]:
+async def get_selected_words(words: List[str]) -> List[Dict[str, Any]]:
     """
-    Retrieve details about the selected Chinese vocabulary words.
+    Retrieve dictionary details about the selected Chinese vocabulary words.
 
     Args:
-        words: List of simplified Chinese characters selected by the user
+        words: List of Chinese words (simplified or traditional) selected by the user
 
     Returns:
-        List of dictionaries containing details about each word
+        List of dictionaries with each word's simplified and traditional forms, pinyin,
+        definition, HSK level, parts of speech, classifiers and other readings.
+        Words not in the dictionary have "found": false.
     """
-    return [{"simplified": word, "traditional": word, "pinyin": "pinyin", "definition": f"Definition of {word}"}
-            for word in words]
+    # One batched, cached lookup for all words, off the event loop
+    return await asyncio.to_thread(word_details, words)
 
 
 # Exercise Generator Agent
@@ -33,6 +39,7 @@ exercise_generator = Agent(
     - Simplified: Use simplified Chinese characters in the exercise
 
     Rules:
+    - Call get_selected_words once with all the provided words, and use the pinyin and definitions it returns
     - Use only the provided vocabulary words
     - Create exercises of the type(s) specified in the request
     - Use the character type (traditional or simplified) specified in the request
@@ -51,4 +51,19 @@ formatter = Agent(
     - Each answer should be the index of the correct option (0-3)
     """,
     output_type=ExerciseOutput,
-)
\ No newline at end of file
+)
+
+
+class ExerciseBatch(BaseModel):
+    exercises: List[ExerciseOutput] = Field(..., description="One exercise per 'Exercise N:' heading, in order")
+
+
+# Formats the exercises of one batched generation in a single call
+batch_formatter = formatter.clone(
+    name="Exercise Batch Formatter",
+    instructions=formatter.instructions + """
+    You may be given several exercises, each starting with an "Exercise N:" heading.
+    Format each one separately and return them in order, one per heading.
+    """,
+    output_type=ExerciseBatch,
+)
@@ -0,0 +1,79 @@
+import asyncio
+import time
+from typing import Callable
+
+from agents import Agent, Runner
+from openai.types.responses import ResponseTextDeltaEvent
+
+from src.config import AGENT_CACHE_ENABLED
+from src.utils.agent_cache import CachedRunResult, cache_key, decode_output, encode_output, get_agent_cache
+from src.utils.agent_trace import record_agent_call
+
+
+def _usage(result):
+    return getattr(getattr(result, "context_wrapper", None), "usage", None)
+
+
+async def run_agent(agent: Agent, prompt: str):
+    """
+    Runner.run with an on-disk cache in front of it.
+
+    Identical calls (same agent, instructions, model and normalized prompt)
+    are answered from the cache. Results are RunResult objects on a miss and
+    CachedRunResult on a hit; both expose `final_output`. Every call is
+    recorded with its latency and token usage (see agent_trace).
+    """
+    started = time.perf_counter()
+    try:
+        if not AGENT_CACHE_ENABLED:
+            result = await Runner.run(agent, prompt)
+            record_agent_call(agent.name, started, usage=_usage(result))
+            return result
+
+        cache = get_agent_cache()
+        key = cache_key(agent, prompt)
+        payload = await asyncio.to_thread(cache.get, key)
+        if payload is not None:
+            record_agent_call(agent.name, started, cached=True)
+            return CachedRunResult(decode_output(agent, payload))
+
+        result = await Runner.run(agent, prompt)
+        record_agent_call(agent.name, started, usage=_usage(result))
+    except Exception as e:
+        record_agent_call(agent.name, started, error=e)
+        raise
+    await asyncio.to_thread(cache.put, key, agent.name, encode_output(agent, result.final_output))
+    return result
+
+
+async def run_agent_streamed(agent: Agent, prompt: str, on_delta: Callable[[str], None]):
+    """
+    run_agent, passing the model's text to `on_delta` as it is produced.
+
+    A cache hit is passed on as a single delta. Structured outputs are
+    streamed as their raw JSON text.
+    """
+    started = time.perf_counter()
+    cache = get_agent_cache() if AGENT_CACHE_ENABLED else None
+    key = cache_key(agent, prompt) if cache is not None else None
+    try:
+        if cache is not None:
+            payload = await asyncio.to_thread(cache.get, key)
+            if payload is not None:
+                result = CachedRunResult(decode_output(agent, payload))
+                record_agent_call(agent.name, started, cached=True)
+                if isinstance(result.final_output, str):
+                    on_delta(result.final_output)
+                return result
+
+        result = Runner.run_streamed(agent, prompt)
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                on_delta(event.data.delta)
+        record_agent_call(agent.name, started, usage=_usage(result))
+    except Exception as e:
+        record_agent_call(agent.name, started, error=e)
+        raise
+    if cache is not None:
+        await asyncio.to_thread(cache.put, key, agent.name, encode_output(agent, result.final_output))
+    return result
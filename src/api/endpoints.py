@@ -1,8 +1,21 @@
+import time
+from typing import Any, Dict
 from fastapi import APIRouter, Query, HTTPException
+from pydantic import BaseModel, Field
 from enum import Enum
-from src.db.connection import get_connection
-from src.detection.input_detection import detect_input_type
-from src.search.search import search_chinese, search_pinyin, search_english
+from src.config import SEARCH_AMBIGUOUS_FANOUT, SEARCH_AMBIGUITY_THRESHOLD, SUGGEST_TOP_K
+from src.db.connection import format_results, get_connection
+from src.db.resilience import BackendUnavailable
+from src.detection.input_detection import is_ambiguous
+from src.detection.tokenizer import is_mixed, search_spans, span_confidences, tokenize
+from src.search.search import search_chinese, search_pinyin, search_english, search_ambiguous, search_mixed
+from src.search.annotate import get_annotator
+from src.search.ime import get_ime
+from src.search.postings import get_postings
+from src.search.suggest import get_suggester
+from src.utils.concurrency import submit_all
+from src.utils.deadline import Deadline, DeadlineExceeded, for_endpoint, run_within
+from src.utils.metrics import metrics
 
 router = APIRouter()
 
@@ -11,11 +24,26 @@ class MatchType(str, Enum):
     CONTAINS = "contains"
 
 
+def _count_query(client, input_type: str, text: str):
+    """Build the query that counts every entry the given search type could match."""
+    if input_type == "chinese":
+        return client.table("dictionaryentry").select("id", count="exact").or_(f"simplified.ilike.%{text}%,traditional.ilike.%{text}%")
+    elif input_type == "pinyin":
+        return client.table("dictionaryentry").select("id", count="exact").ilike("pinyin", f"%{text}%")
+    else:  # english
+        return client.table("dictionaryentry").select("id", count="exact").ilike("english_definitions", f"%{text}%")
+
+
+def _response_count(count_resp) -> int:
+    return (count_resp.count or 0) if hasattr(count_resp, "count") else 0
+
+
 @router.get("/lookup")
 def lookup(
         text: str = Query(..., min_length=1),
         page: int = Query(1, ge=1, description="Page number for pagination"),
-        page_size: int = Query(100, ge=1, le=100, description="Number of results per page")
+        page_size: int = Query(100, ge=1, le=100, description="Number of results per page"),
+        fanout: bool = Query(SEARCH_AMBIGUOUS_FANOUT, description="Search every plausible input type for ambiguous input")
 ):
     """
     Lookup Chinese words based on the input text.
@@ -26,42 +54,237 @@ def lookup(
     - English: Search in definitions
 
     Results are ranked based on the input type and include a match_type and relevance_score.
+    With fanout enabled, input that is plausible as both pinyin and English is
+    searched both ways and the results are merged by a unified relevance score.
+    Mixed-script input such as "好 hao3 good" is split into spans, and each
+    span is searched with its own type.
     """
+    return run_lookup(text, page, page_size, fanout)
+
+
+def run_lookup(text: str, page: int = 1, page_size: int = 100, fanout: bool = SEARCH_AMBIGUOUS_FANOUT,
+               deadline: Deadline | None = None) -> Dict[str, Any]:
+    """The /lookup pipeline, shared with the WebSocket search channel."""
     if not text:
         raise HTTPException(status_code=400, detail="Text parameter cannot be empty")
 
+    started = time.perf_counter()
     client = get_connection()
+    if deadline is None:
+        deadline = for_endpoint("lookup")
 
     # Calculate offset for pagination
     offset = (page - 1) * page_size
 
     # Detect input type
-    input_type = detect_input_type(text)
+    spans = tokenize(text)
+    confidences = span_confidences(text, spans)
+    input_type = "mixed" if is_mixed(spans) else max(confidences, key=confidences.get)
 
     # Search based on input type
     try:
-        if input_type == "chinese":
-            results = search_chinese(text, client, limit=page_size, offset=offset)
-            count_resp = client.table("dictionaryentry").select("id", count="exact").or_(f"simplified.ilike.%{text}%,traditional.ilike.%{text}%").execute()
-        elif input_type == "pinyin":
-            results = search_pinyin(text, client, limit=page_size, offset=offset)
-            count_resp = client.table("dictionaryentry").select("id", count="exact").ilike("pinyin", f"%{text}%").execute()
-        else:  # english
-            results = search_english(text, client, limit=page_size, offset=offset)
-            count_resp = client.table("dictionaryentry").select("id", count="exact").ilike("english_definitions", f"%{text}%").execute()
+        if input_type == "mixed" or (fanout and is_ambiguous(confidences, SEARCH_AMBIGUITY_THRESHOLD)):
+            if input_type == "mixed":
+                searched = [(span.search_type, span.text) for span in search_spans(spans)]
+                run_search = lambda: search_mixed(search_spans(spans), client, limit=page_size, offset=offset, deadline=deadline)
+            else:
+                searched = [(t, text) for t in ("pinyin", "english") if confidences[t] > 0]
+                run_search = lambda: search_ambiguous(text, client, confidences, limit=page_size, offset=offset, deadline=deadline)
+            count_futures = submit_all([
+                deadline.bound(lambda t=t, q=q: _count_query(client, t, q).execute()) for t, q in searched
+            ])
+            results = run_search()
+            try:
+                # Entries matching more than one way are counted twice; the total is an upper bound
+                total_count = sum(_response_count(deadline.wait(f)) for f in count_futures)
+            except DeadlineExceeded:
+                total_count = None
+        else:
+            if input_type == "chinese":
+                results = search_chinese(text, client, limit=page_size, offset=offset, deadline=deadline)
+            elif input_type == "pinyin":
+                results = search_pinyin(text, client, limit=page_size, offset=offset, deadline=deadline)
+            else:  # english
+                results = search_english(text, client, limit=page_size, offset=offset, deadline=deadline)
+            try:
+                total_count = _response_count(run_within(deadline, _count_query(client, input_type, text).execute))
+            except DeadlineExceeded:
+                total_count = None
+    except BackendUnavailable as e:
+        metrics.incr("lookup.unavailable")
+        raise HTTPException(status_code=503, detail=f"Dictionary temporarily unavailable: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
-    total_count = (count_resp.count or 0) if hasattr(count_resp, "count") else 0
+    if total_count is None:
+        # Out of time for the exact count; report what is known to exist
+        deadline.mark_partial("count")
+        total_count = offset + len(results)
     total_pages = (total_count + page_size - 1) // page_size  # Ceiling division
 
+    if deadline.partial:
+        metrics.incr("lookup.partial")
+    metrics.observe("lookup.latency_ms", (time.perf_counter() - started) * 1000)
+
     return {
         "input_type": input_type,
+        "input_confidences": confidences,
+        "spans": [{"type": span.type, "text": span.text} for span in spans],
         "results": results,
+        "partial": deadline.partial,
+        "partial_stages": deadline.skipped,
         "pagination": {
             "page": page,
             "page_size": page_size,
             "total_count": total_count,
             "total_pages": total_pages
         }
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/suggest")
+async def suggest(
+        q: str = Query(..., min_length=1),
+        limit: int = Query(SUGGEST_TOP_K, ge=1, le=SUGGEST_TOP_K, description="Number of suggestions")
+):
+    """
+    Typeahead suggestions for a prefix of a headword, pinyin or English word.
+
+    Served from an in-memory prefix index, so it runs on the event loop and
+    never queries the backend.
+    """
+    started = time.perf_counter()
+    suggestions = get_suggester(get_connection).suggest(q, limit)
+    if suggestions is None:
+        raise HTTPException(status_code=503, detail="Suggestion index is still loading", headers={"Retry-After": "1"})
+    metrics.observe("suggest.latency_ms", (time.perf_counter() - started) * 1000)
+    return {"query": q, "suggestions": suggestions}
+
+
+@router.get("/characters/{character}/words")
+def words_containing(
+        character: str,
+        page: int = Query(1, ge=1, description="Page number for pagination"),
+        page_size: int = Query(100, ge=1, le=100, description="Number of results per page"),
+        hsk_level: int | None = Query(None, ge=1, description="Only words at this combined HSK level"),
+        length: int | None = Query(None, ge=1, description="Only words with this many characters")
+):
+    """
+    Every word containing a character, in simplified or traditional form.
+
+    Pages come from a presorted postings index, ordered by HSK level and then
+    frequency rank, so any page costs the same regardless of how common the
+    character is.
+    """
+    if len(character) != 1:
+        raise HTTPException(status_code=400, detail="Exactly one character is required")
+
+    index = get_postings(get_connection).get()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Character index is still loading", headers={"Retry-After": "1"})
+
+    offset = (page - 1) * page_size
+    rows, total_count = index.page(character, offset, page_size, hsk_level=hsk_level, length=length)
+    rows = [
+        {**row, "match_type": (MatchType.EXACT if character in (row.get("simplified"), row.get("traditional")) else MatchType.CONTAINS).value}
+        for row in rows
+    ]
+    try:
+        results = format_results(rows, for_endpoint("characters"))
+    except BackendUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Dictionary temporarily unavailable: {e}")
+
+    return {
+        "character": character,
+        "results": results,
+        "pagination": {
+            "page": page,
+            "page_size": page_size,
+            "total_count": total_count,
+            "total_pages": (total_count + page_size - 1) // page_size
+        }
+    }
+
+
+class Script(str, Enum):
+    SIMPLIFIED = "simplified"
+    TRADITIONAL = "traditional"
+
+
+@router.get("/convert")
+async def convert(
+        pinyin: str = Query(..., min_length=1, max_length=200),
+        n: int = Query(5, ge=1, le=20, description="Number of conversions"),
+        script: Script = Query(Script.SIMPLIFIED, description="Character set of the conversions")
+):
+    """
+    Convert pinyin, with or without tones and spaces, into the most likely characters.
+
+    Served from an in-memory lexicon with a Viterbi pass over the syllable
+    lattice, so it runs on the event loop and never queries the backend.
+    """
+    started = time.perf_counter()
+    lexicon = get_ime(get_connection).get()
+    if lexicon is None:
+        raise HTTPException(status_code=503, detail="Conversion index is still loading", headers={"Retry-After": "1"})
+    conversions = lexicon.convert(pinyin, n=n, script=script.value)
+    metrics.observe("convert.latency_ms", (time.perf_counter() - started) * 1000)
+    return {"pinyin": pinyin, "conversions": conversions}
+
+
+class AnnotateRequest(BaseModel):
+    text: str = Field(..., min_length=1)
+
+
+@router.post("/annotate")
+def annotate(request: AnnotateRequest):
+    """
+    Split Chinese text into dictionary words, with pinyin and definitions per word.
+
+    Segmentation is one pass of a headword automaton over the text. Related
+    data for all distinct words is fetched with a single batch of queries.
+    """
+    started = time.perf_counter()
+    automaton = get_annotator(get_connection).get()
+    if automaton is None:
+        raise HTTPException(status_code=503, detail="Annotation index is still loading", headers={"Retry-After": "1"})
+
+    text = request.text
+    segments = automaton.segment(text)
+    rows = {}
+    for _, _, headword in segments:
+        if headword is not None:
+            entry = automaton.entries[headword]
+            rows.setdefault(entry["id"], entry)
+
+    deadline = for_endpoint("annotate")
+    try:
+        entries = {entry["id"]: entry for entry in format_results(list(rows.values()), deadline)}
+    except BackendUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"Dictionary temporarily unavailable: {e}")
+
+    tokens = []
+    for start, end, headword in segments:
+        entry = automaton.entries[headword] if headword is not None else None
+        tokens.append({
+            "text": text[start:end],
+            "start": start,
+            "end": end,
+            "entry_id": entry["id"] if entry else None,
+            "pinyin": entry.get("pinyin") if entry else None,
+            "definition": entry.get("english_definitions") if entry else None,
+        })
+    metrics.observe("annotate.latency_ms", (time.perf_counter() - started) * 1000)
+
+    return {
+        "tokens": tokens,
+        "entries": entries,
+        "partial": deadline.partial,
+        "partial_stages": deadline.skipped,
+    }
+
+
+@router.get("/metrics")
+def get_metrics():
+    """In-process counters, gauges and latency histograms."""
+    return metrics.snapshot()
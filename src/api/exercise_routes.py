@@ -1,10 +1,11 @@
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any, Literal
 
 from src.config import OPENAI_API_KEY
-from agents import Runner
-from src.agents import exercise_generator, evaluator, formatter
+from src.exercises.jobs import FAILED, JobPriority, JobQueueFull, get_job_queue
 
 router = APIRouter()
 
@@ -16,12 +17,49 @@ class WordRequest(BaseModel):
 
 class ExerciseRequest(BaseModel):
     words: List[WordRequest]
+    # "template" builds the exercise from dictionary data without a model, when it can
+    engine: Literal["llm", "template"] = "llm"
+
+class ExerciseJobRequest(ExerciseRequest):
+    priority: JobPriority = JobPriority.NORMAL
+
+
+def _submit(request: ExerciseRequest, priority: JobPriority):
+    queue = get_job_queue()
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Exercise generation is not running")
+    try:
+        return queue.submit({
+            "words": [item.word for item in request.words],
+            "exercise_types": sorted(set(item.exercise_type for item in request.words)),
+            "character_type": request.words[0].type,  # We'll use the first item's type for consistency
+            "engine": request.engine,
+        }, priority)
+    except JobQueueFull:
+        raise HTTPException(status_code=429, detail="Too many exercises are being generated, try again shortly",
+                            headers={"Retry-After": "5"})
+
+
+def _get_job(job_id: str):
+    queue = get_job_queue()
+    job = queue.get(job_id) if queue is not None else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 
 @router.post("/generate-exercise", response_model=Dict[str, Any])
 async def generate_exercise(request: ExerciseRequest):
     """
     Generate a language learning exercise based on selected vocabulary words.
 
+    Runs as a normal priority job and waits for it, so it is subject to the
+    same concurrency and queue limits as the job API.
+
     Args:
         request: Request containing the list of selected words
 
@@ -30,54 +68,52 @@ async def generate_exercise(request: ExerciseRequest):
     """
     print(f"Received request: {request.words}")
 
-    try:
-        # Extract word information
-        words = [item.word for item in request.words]
-        exercise_types = list(set(item.exercise_type for item in request.words))
-        character_type = request.words[0].type  # We'll use the first item's type for consistency
-
-        # Create a structured prompt for the exercise generator
-        prompt = f"""
-                Create an exercise using these words: {', '.join(words)}
-                Exercise type(s): {', '.join(exercise_types)}
-                Character type: {character_type}
-                """
-
-        # Step 1: Generate exercise with the Exercise Generator agent
-        generator_result = await Runner.run(
-            exercise_generator,
-            prompt
-        )
-
-        # Step 2: Evaluate the exercise with the Evaluator agent
-        evaluator_result = await Runner.run(
-            evaluator,
-            f"Evaluate this exercise: {generator_result.final_output}"
-        )
-
-        # If the evaluator found issues, regenerate the exercise
-        if "issues" in evaluator_result.final_output.lower() or "mistake" in evaluator_result.final_output.lower():
-            # Regenerate with feedback
-            generator_result = await Runner.run(
-                exercise_generator,
-                f"Create an exercise using these words: {', '.join(request.words)}. " +
-                f"Fix these issues: {evaluator_result.final_output}"
-            )
-
-            # Re-evaluate
-            evaluator_result = await Runner.run(
-                evaluator,
-                f"Evaluate this exercise: {generator_result.final_output}"
-            )
-
-        # Step 3: Format the exercise with the Formatter agent
-        formatter_result = await Runner.run(
-            formatter,
-            f"Format this approved exercise for the frontend: {generator_result.final_output}"
-        )
-
-        # Return the formatted exercise as a dictionary
-        return formatter_result.final_output.model_dump()
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating exercise: {str(e)}")
\ No newline at end of file
+    job = _submit(request, JobPriority.NORMAL)
+    await job.wait()
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=f"Error generating exercise: {job.error}")
+    return job.result
+
+
+def _stream(job) -> StreamingResponse:
+    async def events():
+        async for event, data in job.updates():
+            yield _sse(event, data)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.post("/generate-exercise/stream")
+async def generate_exercise_stream(request: ExerciseRequest):
+    """
+    /generate-exercise as server-sent events, one per stage as it completes.
+
+    The generator's draft is streamed as it is written (`draft_delta`),
+    followed by `draft`, `formatted`, `validation` and, when they run,
+    `evaluation` and `regenerating`. The final `status` event carries the
+    exercise.
+    """
+    return _stream(_submit(request, JobPriority.NORMAL))
+
+
+@router.post("/exercise-jobs", status_code=202)
+async def submit_exercise_job(request: ExerciseJobRequest):
+    """
+    Queue an exercise for generation and return its job id straight away.
+
+    Poll `GET /exercise-jobs/{job_id}` or follow `GET /exercise-jobs/{job_id}/events`
+    for the result. Returns 429 when the queue is full.
+    """
+    return _submit(request, request.priority).snapshot()
+
+
+@router.get("/exercise-jobs/{job_id}")
+async def get_exercise_job(job_id: str):
+    """A job's status, with the exercise once it is done or the error if it failed."""
+    return _get_job(job_id).snapshot()
+
+
+@router.get("/exercise-jobs/{job_id}/events")
+async def exercise_job_events(job_id: str):
+    """Server-sent events for every stage and status change of the job, ending with its result or error."""
+    return _stream(_get_job(job_id))
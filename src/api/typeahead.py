@@ -0,0 +1,119 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, Field, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from src.api.endpoints import run_lookup
+from src.config import SEARCH_AMBIGUOUS_FANOUT, SUGGEST_TOP_K
+from src.db.connection import get_connection
+from src.search.suggest import get_suggester
+from src.utils.deadline import for_endpoint
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+class _LookupOptions(BaseModel):
+    """Lookup options of a query message, checked like the /lookup query parameters."""
+    page_size: int = Field(20, ge=1, le=100)
+    fanout: bool = SEARCH_AMBIGUOUS_FANOUT
+
+
+def _parse(message: str) -> Dict[str, Any]:
+    """A query message: JSON {"q", "seq", "page_size", "fanout"}, or the bare query text."""
+    try:
+        data = json.loads(message)
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        data = {"q": message}
+    return data
+
+
+class _Channel:
+    """
+    One client's search session.
+
+    Only the latest query is worked on: a new message cancels the task for
+    the previous one and its deadline, so pipeline stages still running in
+    worker threads stop at their next wait and nothing stale is sent.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.seq = 0
+        self._task: asyncio.Task | None = None
+        self._deadline = None
+
+    def cancel(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            self._deadline.cancel()
+            metrics.incr("search_ws.superseded")
+        self._task = None
+
+    def submit(self, query: Dict[str, Any]) -> None:
+        self.cancel()
+        self.seq = query.get("seq", self.seq + 1)
+        self._deadline = for_endpoint("search_channel")
+        self._task = asyncio.create_task(self._run(self.seq, query, self._deadline))
+
+    async def _send(self, seq: Any, payload: Dict[str, Any]) -> None:
+        if seq == self.seq:
+            await self.websocket.send_json({"seq": seq, **payload})
+
+    async def _run(self, seq: Any, query: Dict[str, Any], deadline) -> None:
+        text = str(query.get("q", "")).strip()
+        if not text:
+            return
+        try:
+            options = _LookupOptions.model_validate(
+                {key: query[key] for key in ("page_size", "fanout") if key in query})
+        except ValidationError as e:
+            await self._send(seq, {"type": "error", "query": text, "status": 422,
+                                   "detail": e.errors(include_url=False, include_context=False)})
+            return
+        suggestions = get_suggester(get_connection).suggest(text, SUGGEST_TOP_K)
+        if suggestions is not None:
+            await self._send(seq, {"type": "suggest", "query": text, "suggestions": suggestions})
+        try:
+            result = await run_in_threadpool(run_lookup, text, 1, options.page_size, options.fanout, deadline)
+        except HTTPException as e:
+            await self._send(seq, {"type": "error", "query": text, "status": e.status_code, "detail": e.detail})
+            return
+        except Exception:
+            # The task would otherwise end without the client hearing about it
+            logger.exception("Search channel lookup failed for %r", text)
+            await self._send(seq, {"type": "error", "query": text, "status": 500, "detail": "Lookup failed"})
+            return
+        if deadline.cancelled:
+            return
+        await self._send(seq, {"type": "lookup", "query": text, **result})
+
+
+@router.websocket("/ws/search")
+async def search_channel(websocket: WebSocket):
+    """
+    Search-as-you-type over one connection.
+
+    Each message is the current input; the server answers with a fast
+    "suggest" message and then the "lookup" results, both tagged with the
+    message's seq. Input superseded by a newer message is cancelled and
+    never answered.
+    """
+    await websocket.accept()
+    channel = _Channel(websocket)
+    metrics.incr("search_ws.connections")
+    try:
+        while True:
+            channel.submit(_parse(await websocket.receive_text()))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        channel.cancel()
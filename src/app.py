@@ -1,13 +1,84 @@
+import logging
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI
 
 # Ensure environment variables from .env are loaded at startup
 # This import triggers load_dotenv() defined in src.config
 import src.config  # noqa: F401
 
+from src.config import SERVER_THREADPOOL_SIZE
 from src.api.endpoints import router
+from src.api.typeahead import router as typeahead_router
+from src.api.exercise_routes import router as exercise_router
+from src.db.connection import get_connection, get_backend_connection, close_clients
+from src.db.local import get_local_dictionary
+from src.db.sync import start_sync, stop_sync
+from src.exercises.jobs import start_job_queue, stop_job_queue
+from src.exercises.distractors import get_distractors
+from src.exercises.pool import start_exercise_pool, stop_exercise_pool
+from src.exercises.validator import get_script_table
+from src.search.suggest import get_suggester
+
+logger = logging.getLogger(__name__)
+
+
+def _exercise_pipeline():
+    """
+    The exercise pipeline module, or None when it cannot be imported.
+
+    It pulls in the agents SDK, so it is imported here rather than at module
+    load: a broken or missing LLM dependency disables exercise generation
+    instead of keeping the dictionary API from starting.
+    """
+    try:
+        from src.exercises import pipeline
+    except Exception as e:
+        logger.warning("Exercise generation disabled, pipeline could not be imported: %s", e)
+        return None
+    return pipeline
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the pooled backend client before serving and close them on shutdown."""
+    if SERVER_THREADPOOL_SIZE:
+        to_thread.current_default_thread_limiter().total_tokens = SERVER_THREADPOOL_SIZE
+    try:
+        client = get_connection()
+        # Open a pooled connection now so the first request does not pay for TLS setup
+        await to_thread.run_sync(lambda: client.table("dictionaryentry").select("id").limit(1).execute())
+    except Exception as e:
+        # Lookups report the problem per request; other routes keep working
+        logger.warning("Dictionary backend not initialized at startup: %s", e)
+    # Keep the local snapshot current with incremental changes from the backend
+    try:
+        if await to_thread.run_sync(get_local_dictionary) is not None:
+            start_sync(get_backend_connection)
+    except Exception as e:
+        logger.warning("Local dictionary snapshot not loaded: %s", e)
+    # Build the /suggest index in the background so startup is not held up
+    get_suggester(get_connection)
+    # Exercises are checked and their options chosen with these indexes
+    get_script_table(get_connection)
+    get_distractors(get_connection)
+    pipeline = _exercise_pipeline()
+    if pipeline is not None:
+        # Pre-generate exercises for the most requested words, also in the background
+        start_exercise_pool(pipeline.generate_checked, get_connection)
+        start_job_queue(pipeline.generate_exercise)
+    yield
+    await stop_job_queue()
+    await stop_exercise_pool()
+    stop_sync()
+    close_clients()
+
 
 # Create FastAPI application
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Include API router
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+app.include_router(typeahead_router)
+app.include_router(exercise_router)
@@ -7,3 +7,104 @@ load_dotenv(find_dotenv(), override=False)
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 DEFAULT_MODEL = "gpt-4o"
+
+# On-disk cache of agent outputs, keyed by agent, instructions, model and prompt
+AGENT_CACHE_ENABLED = os.environ.get("AGENT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+AGENT_CACHE_PATH = os.environ.get("AGENT_CACHE_PATH", "agent_cache.sqlite3")
+AGENT_CACHE_TTL_S = float(os.environ.get("AGENT_CACHE_TTL_S", str(7 * 24 * 3600)))
+AGENT_CACHE_MAX_ENTRIES = int(os.environ.get("AGENT_CACHE_MAX_ENTRIES", "10000"))
+AGENT_CACHE_MAX_BYTES = int(os.environ.get("AGENT_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+
+# Pre-generated single-word exercises for the most frequent words up to an HSK
+# level, kept `DEPTH` deep per word, exercise type and script. Off (0 words) by
+# default: filling it costs model calls on every process start
+EXERCISE_POOL_WORDS = int(os.environ.get("EXERCISE_POOL_WORDS", "0"))
+EXERCISE_POOL_MAX_HSK = int(os.environ.get("EXERCISE_POOL_MAX_HSK", "2"))
+EXERCISE_POOL_DEPTH = int(os.environ.get("EXERCISE_POOL_DEPTH", "2"))
+EXERCISE_POOL_SCRIPTS = [s.strip() for s in os.environ.get("EXERCISE_POOL_SCRIPTS", "simplified,traditional").split(",") if s.strip()]
+# Pool generations running at once
+EXERCISE_POOL_CONCURRENCY = int(os.environ.get("EXERCISE_POOL_CONCURRENCY", "2"))
+
+# Exercise generation jobs: requests running at once, requests allowed to wait
+# before new ones are rejected, and how long finished jobs can be polled
+EXERCISE_JOB_CONCURRENCY = int(os.environ.get("EXERCISE_JOB_CONCURRENCY", "4"))
+EXERCISE_JOB_QUEUE_SIZE = int(os.environ.get("EXERCISE_JOB_QUEUE_SIZE", "100"))
+EXERCISE_JOB_TTL_S = float(os.environ.get("EXERCISE_JOB_TTL_S", "600"))
+
+# Live generations arriving within the window are sent to the model as one
+# batched prompt of up to EXERCISE_BATCH_MAX exercises; a 0 window disables it
+EXERCISE_BATCH_WINDOW_MS = float(os.environ.get("EXERCISE_BATCH_WINDOW_MS", "50"))
+EXERCISE_BATCH_MAX = int(os.environ.get("EXERCISE_BATCH_MAX", "4"))
+
+# Words whose dictionary details are kept for the exercise generator's tool
+VOCABULARY_CACHE_SIZE = int(os.environ.get("VOCABULARY_CACHE_SIZE", "10000"))
+# Wrong answers precomputed per dictionary entry for multiple-choice options
+DISTRACTORS_PER_ENTRY = int(os.environ.get("DISTRACTORS_PER_ENTRY", "12"))
+
+# Search execution
+# When enabled, search tiers (exact -> tone-insensitive -> partial) are launched
+# concurrently and the highest-priority non-empty tier wins.
+SEARCH_SPECULATIVE_TIERS = os.environ.get("SEARCH_SPECULATIVE_TIERS", "false").lower() in ("1", "true", "yes")
+SEARCH_MAX_WORKERS = int(os.environ.get("SEARCH_MAX_WORKERS", "16"))
+# When enabled, /lookup runs pinyin and English searches concurrently for input
+# whose runner-up type confidence reaches the threshold, and merges the results
+SEARCH_AMBIGUOUS_FANOUT = os.environ.get("SEARCH_AMBIGUOUS_FANOUT", "false").lower() in ("1", "true", "yes")
+SEARCH_AMBIGUITY_THRESHOLD = float(os.environ.get("SEARCH_AMBIGUITY_THRESHOLD", "0.25"))
+
+# Entries precomputed per prefix for /suggest (also the largest `limit` it accepts)
+SUGGEST_TOP_K = int(os.environ.get("SUGGEST_TOP_K", "10"))
+
+# Pinyin-to-character conversion: candidates kept per pinyin key, and paths kept per lattice position
+IME_CANDIDATES_PER_KEY = int(os.environ.get("IME_CANDIDATES_PER_KEY", "8"))
+IME_BEAM_WIDTH = int(os.environ.get("IME_BEAM_WIDTH", "10"))
+
+# Per-endpoint time budgets in milliseconds; 0 disables the deadline.
+# Each can be overridden with <ENDPOINT>_BUDGET_MS, e.g. LOOKUP_BUDGET_MS=500
+ENDPOINT_BUDGETS_MS = {
+    endpoint: float(os.environ.get(f"{endpoint.upper()}_BUDGET_MS", "2000"))
+    for endpoint in ("lookup", "characters", "annotate", "search_channel", "vocabulary")
+}
+
+# Local dictionary snapshot (written with `python -m src.db.local <path>`),
+# served when the backend is unavailable. A columnar snapshot (converted with
+# `python -m src.db.columnar <snapshot.json> <snapshot.cdict>`) is memory-mapped
+# and shared between worker processes instead of being loaded by each one.
+DICTIONARY_SNAPSHOT_PATH = os.environ.get("DICTIONARY_SNAPSHOT_PATH")
+# "local" serves every dictionary query from the snapshot instead of Supabase
+DICTIONARY_SOURCE = os.environ.get("DICTIONARY_SOURCE", "supabase").lower()
+# Incremental sync of the local dictionary: rows whose watermark column changed
+# are pulled every interval and swapped in; 0 disables the background job
+DICTIONARY_SYNC_INTERVAL_S = float(os.environ.get("DICTIONARY_SYNC_INTERVAL_S", "5"))
+DICTIONARY_SYNC_WATERMARK_COLUMN = os.environ.get("DICTIONARY_SYNC_WATERMARK_COLUMN", "updated_at")
+DICTIONARY_SYNC_PAGE_SIZE = int(os.environ.get("DICTIONARY_SYNC_PAGE_SIZE", "1000"))
+# In-memory indexes (/suggest, /characters, /annotate, ...) rebuilt after a sync wait at
+# least this long after their previous build, so frequent syncs share one rebuild
+INDEX_REBUILD_INTERVAL_S = float(os.environ.get("INDEX_REBUILD_INTERVAL_S", "300"))
+
+# Resilience around the dictionary backend
+# A duplicate request is sent once a call is slower than this percentile of recent latencies
+BACKEND_HEDGE_ENABLED = os.environ.get("BACKEND_HEDGE_ENABLED", "true").lower() in ("1", "true", "yes")
+BACKEND_HEDGE_PERCENTILE = float(os.environ.get("BACKEND_HEDGE_PERCENTILE", "95"))
+BACKEND_HEDGE_MIN_MS = float(os.environ.get("BACKEND_HEDGE_MIN_MS", "50"))
+BACKEND_HEDGE_MIN_SAMPLES = int(os.environ.get("BACKEND_HEDGE_MIN_SAMPLES", "20"))
+# The circuit opens when either rate over the last window of calls reaches its threshold
+BACKEND_BREAKER_WINDOW = int(os.environ.get("BACKEND_BREAKER_WINDOW", "50"))
+BACKEND_BREAKER_MIN_CALLS = int(os.environ.get("BACKEND_BREAKER_MIN_CALLS", "20"))
+BACKEND_BREAKER_ERROR_RATE = float(os.environ.get("BACKEND_BREAKER_ERROR_RATE", "0.5"))
+BACKEND_BREAKER_SLOW_RATE = float(os.environ.get("BACKEND_BREAKER_SLOW_RATE", "0.8"))
+BACKEND_BREAKER_SLOW_MS = float(os.environ.get("BACKEND_BREAKER_SLOW_MS", "2000"))
+BACKEND_BREAKER_COOLDOWN_S = float(os.environ.get("BACKEND_BREAKER_COOLDOWN_S", "30"))
+# Recent successful responses kept to answer repeated queries while the circuit is open
+BACKEND_RESPONSE_CACHE_SIZE = int(os.environ.get("BACKEND_RESPONSE_CACHE_SIZE", "2048"))
+
+# HTTP connection pool for the Supabase client
+SUPABASE_POOL_SIZE = int(os.environ.get("SUPABASE_POOL_SIZE", "50"))
+SUPABASE_KEEPALIVE_CONNECTIONS = int(os.environ.get("SUPABASE_KEEPALIVE_CONNECTIONS", "20"))
+SUPABASE_KEEPALIVE_EXPIRY_S = float(os.environ.get("SUPABASE_KEEPALIVE_EXPIRY_S", "60"))
+SUPABASE_HTTP2 = os.environ.get("SUPABASE_HTTP2", "true").lower() in ("1", "true", "yes")
+SUPABASE_CONNECT_TIMEOUT_S = float(os.environ.get("SUPABASE_CONNECT_TIMEOUT_S", "3"))
+SUPABASE_READ_TIMEOUT_S = float(os.environ.get("SUPABASE_READ_TIMEOUT_S", "10"))
+# How long a request waits for a free connection when the pool is exhausted
+SUPABASE_POOL_TIMEOUT_S = float(os.environ.get("SUPABASE_POOL_TIMEOUT_S", "5"))
+# Threads available to sync endpoints; unset keeps the server default (40)
+SERVER_THREADPOOL_SIZE = int(os.environ["SERVER_THREADPOOL_SIZE"]) if os.environ.get("SERVER_THREADPOOL_SIZE") else None
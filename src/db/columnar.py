@@ -0,0 +1,436 @@
+import bisect
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Sequence
+
+from src.db.local import DICTIONARY_TABLES, LazyRow, LocalDictionary
+
+# File layout (little-endian):
+#   header      MAGIC, format version, data version, entry count, section count
+#   directory   (name, offset, length) per section
+#   sections    8-byte aligned arrays:
+#     entry.<column>                      int32 per entry (INT_NULL for null) or
+#                                         uint32 string id per entry (STR_NULL for null)
+#     strings.offsets / strings.data      interned UTF-8 string pool
+#     <table>.offsets                     uint32 per entry + 1, start of each entry's related rows
+#     <table>.<column>                    uint32 string id per related row
+#     key.<column>                        entry rows sorted by that column, for binary search
+#     meta                                JSON metadata (sync watermark)
+# Entries are stored in id order, so entry.id is itself sorted.
+MAGIC = b"CDICTSNP"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<8sIQII")
+_DIRECTORY_ENTRY = struct.Struct("<32sQQ")
+
+INT_NULL = -(2 ** 31)
+STR_NULL = 2 ** 32 - 1
+
+ENTRY_INT_COLUMNS = ("id", "hsk_level", "old_hsk_level", "new_hsk_level", "frequency_rank")
+ENTRY_STR_COLUMNS = ("simplified", "traditional", "pinyin", "english_definitions", "radical")
+ENTRY_COLUMNS = ENTRY_INT_COLUMNS + ENTRY_STR_COLUMNS
+RELATED_COLUMNS = {
+    "part_of_speech": ("pos",),
+    "classifier": ("classifier",),
+    "transcription": ("system", "value"),
+    "meaning": ("definition",),
+}
+KEY_COLUMNS = ("simplified", "traditional", "pinyin")
+
+
+class _StringPool:
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, value: Any) -> int:
+        if value is None:
+            return STR_NULL
+        value = str(value)
+        sid = self.ids.get(value)
+        if sid is None:
+            sid = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return sid
+
+
+def write_snapshot(tables: Dict[str, List[Dict[str, Any]]], path: str, version: int = 0,
+                   watermark: Any = None) -> None:
+    """Write dictionary tables (as loaded from the backend or a JSON snapshot) in columnar form."""
+    entries = sorted(tables.get("dictionaryentry", []), key=lambda r: r["id"])
+    row_of = {entry["id"]: row for row, entry in enumerate(entries)}
+    pool = _StringPool()
+    sections: Dict[str, bytes] = {}
+
+    for column in ENTRY_INT_COLUMNS:
+        sections[f"entry.{column}"] = array("i", (
+            INT_NULL if e.get(column) is None else int(e[column]) for e in entries
+        )).tobytes()
+    for column in ENTRY_STR_COLUMNS:
+        sections[f"entry.{column}"] = array("I", (pool.add(e.get(column)) for e in entries)).tobytes()
+
+    for table, columns in RELATED_COLUMNS.items():
+        grouped: List[List[Dict[str, Any]]] = [[] for _ in entries]
+        for related in tables.get(table, []):
+            row = row_of.get(related["entry_id"])
+            if row is not None:
+                grouped[row].append(related)
+        offsets = array("I", [0])
+        values = {column: array("I") for column in columns}
+        for rows in grouped:
+            for related in rows:
+                for column in columns:
+                    values[column].append(pool.add(related.get(column)))
+            offsets.append(offsets[-1] + len(rows))
+        sections[f"{table}.offsets"] = offsets.tobytes()
+        for column in columns:
+            sections[f"{table}.{column}"] = values[column].tobytes()
+
+    for column in KEY_COLUMNS:
+        keys = [e.get(column) for e in entries]
+        order = sorted((row for row in range(len(entries)) if keys[row] is not None), key=lambda row: keys[row])
+        sections[f"key.{column}"] = array("I", order).tobytes()
+
+    encoded = [s.encode("utf-8") for s in pool.strings]
+    string_offsets = array("I", [0])
+    for data in encoded:
+        string_offsets.append(string_offsets[-1] + len(data))
+    sections["strings.offsets"] = string_offsets.tobytes()
+    sections["strings.data"] = b"".join(encoded)
+    sections["meta"] = json.dumps({"watermark": watermark}).encode("utf-8")
+
+    if sys.byteorder != "little":
+        raise RuntimeError("Columnar snapshots are written in little-endian byte order")
+
+    position = _HEADER.size + _DIRECTORY_ENTRY.size * len(sections)
+    directory = []
+    for name, data in sections.items():
+        position += -position % 8
+        directory.append((name, position, len(data)))
+        position += len(data)
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, version, len(entries), len(sections)))
+        for name, offset, length in directory:
+            f.write(_DIRECTORY_ENTRY.pack(name.encode("ascii"), offset, length))
+        for (name, offset, _), data in zip(directory, sections.values()):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+
+
+def is_snapshot_file(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class ColumnarSnapshot:
+    """
+    Read-only view of a columnar snapshot file through `mmap`.
+
+    Columns are memoryviews over the mapping, so every worker process that
+    opens the same file shares its pages through the OS page cache, and
+    opening costs a header parse rather than a load.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = self._view = memoryview(self._mmap)
+        magic, format_version, self.version, self.entry_count, section_count = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} dictionary snapshot")
+
+        sections: Dict[str, memoryview] = {}
+        for i in range(section_count):
+            name, offset, length = _DIRECTORY_ENTRY.unpack_from(view, _HEADER.size + i * _DIRECTORY_ENTRY.size)
+            sections[name.rstrip(b"\0").decode("ascii")] = view[offset:offset + length]
+        self._sections = sections
+
+        self.columns: Dict[str, memoryview] = {
+            column: sections[f"entry.{column}"].cast("i" if column in ENTRY_INT_COLUMNS else "I")
+            for column in ENTRY_COLUMNS
+        }
+        self.related_offsets = {table: sections[f"{table}.offsets"].cast("I") for table in RELATED_COLUMNS}
+        self.related_values = {
+            table: {column: sections[f"{table}.{column}"].cast("I") for column in columns}
+            for table, columns in RELATED_COLUMNS.items()
+        }
+        self.keys = {column: sections[f"key.{column}"].cast("I") for column in KEY_COLUMNS}
+        self._string_offsets = sections["strings.offsets"].cast("I")
+        self._string_data = sections["strings.data"]
+        self.watermark = json.loads(bytes(sections["meta"]).decode("utf-8")).get("watermark")
+
+    def __len__(self) -> int:
+        return self.entry_count
+
+    def string(self, sid: int) -> str | None:
+        if sid == STR_NULL:
+            return None
+        return bytes(self._string_data[self._string_offsets[sid]:self._string_offsets[sid + 1]]).decode("utf-8")
+
+    def value(self, row: int, column: str) -> Any:
+        raw = self.columns[column][row]
+        if column in ENTRY_INT_COLUMNS:
+            return None if raw == INT_NULL else raw
+        return self.string(raw)
+
+    def row_for_id(self, entry_id: int) -> int | None:
+        ids = self.columns["id"]
+        row = bisect.bisect_left(ids, entry_id)
+        return row if row < len(ids) and ids[row] == entry_id else None
+
+    def find(self, column: str, key: str) -> List[int]:
+        """Rows whose column equals key, by binary search over the sorted key section."""
+        order = self.keys[column]
+        start = bisect.bisect_left(order, key, key=lambda row: self.value(row, column))
+        rows = []
+        for i in range(start, len(order)):
+            if self.value(order[i], column) != key:
+                break
+            rows.append(order[i])
+        return rows
+
+    def related(self, table: str, row: int) -> List[Dict[str, Any]]:
+        offsets = self.related_offsets[table]
+        values = self.related_values[table]
+        entry_id = self.columns["id"][row]
+        return [
+            {"entry_id": entry_id, **{column: self.string(values[column][i]) for column in values}}
+            for i in range(offsets[row], offsets[row + 1])
+        ]
+
+    def close(self) -> None:
+        views = [self._string_offsets, self._string_data, *self.columns.values(), *self.keys.values(),
+                 *self.related_offsets.values(), *self._sections.values(), self._view]
+        views += [column for values in self.related_values.values() for column in values.values()]
+        for view in views:
+            view.release()
+        self._mmap.close()
+        self._file.close()
+
+
+class EntryView(LazyRow):
+    """
+    A dictionaryentry row read lazily from the snapshot.
+
+    Behaves like the row dicts returned by Supabase. Keys written by the search
+    code (match_type, relevance_score) go to a small overlay, so nothing is
+    materialized until the row is serialized. A projected view only has the
+    selected columns, like a select() of them.
+    """
+
+    __slots__ = ("_snapshot", "row", "_overlay", "_columns")
+
+    def __init__(self, snapshot: ColumnarSnapshot, row: int, columns: Sequence[str] | None = None):
+        self._snapshot = snapshot
+        self.row = row
+        self._overlay: Dict[str, Any] = {}
+        self._columns = columns
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._overlay:
+            return self._overlay[key]
+        if self._columns is not None and key not in self._columns:
+            raise KeyError(key)
+        if key in self._snapshot.columns:
+            return self._snapshot.value(self.row, key)
+        if self._columns is not None:
+            return None
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._overlay[key] = value
+
+    def _keys(self) -> Sequence[str]:
+        return ENTRY_COLUMNS if self._columns is None else self._columns
+
+    def __iter__(self) -> Iterator[str]:
+        keys = self._keys()
+        yield from keys
+        yield from (key for key in self._overlay if key not in keys)
+
+    def __len__(self) -> int:
+        keys = self._keys()
+        return len(keys) + sum(1 for key in self._overlay if key not in keys)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def project(self, columns: List[str]) -> "EntryView":
+        view = EntryView(self._snapshot, self.row, tuple(columns))
+        view._overlay.update(self._overlay)
+        return view
+
+
+class _EntryRows:
+    """dictionaryentry rows for table scans, with overlay rows in place of the snapshot's."""
+
+    def __init__(self, dictionary: "SnapshotDictionary"):
+        self._dictionary = dictionary
+
+    def __len__(self) -> int:
+        snapshot = self._dictionary.snapshot
+        replaced = sum(1 for entry_id in self._dictionary.overlay_entries if snapshot.row_for_id(entry_id) is not None)
+        return len(snapshot) - replaced + len(self._dictionary.overlay_entries)
+
+    def __iter__(self) -> Iterator[Mapping]:
+        snapshot = self._dictionary.snapshot
+        overlay = self._dictionary.overlay_entries
+        ids = snapshot.columns["id"]
+        for row in range(len(snapshot)):
+            if ids[row] not in overlay:
+                yield EntryView(snapshot, row)
+        yield from overlay.values()
+
+
+class _RelatedRows:
+    """All rows of a related table, produced on iteration (used only by full scans)."""
+
+    def __init__(self, dictionary: "SnapshotDictionary", table: str):
+        self._dictionary = dictionary
+        self._table = table
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        snapshot = self._dictionary.snapshot
+        overlay = self._dictionary.overlay_related.get(self._table, {})
+        ids = snapshot.columns["id"]
+        for row in range(len(snapshot)):
+            if ids[row] not in overlay:
+                yield from snapshot.related(self._table, row)
+        for rows in overlay.values():
+            yield from rows
+
+
+def _entry_id(key: str) -> int | None:
+    try:
+        return int(key)
+    except ValueError:
+        return None
+
+
+class _KeyIndex(Mapping):
+    """Exact-match lookups answered from the snapshot's sorted key sections, then the overlay."""
+
+    def __init__(self, dictionary: "SnapshotDictionary", column: str):
+        self._dictionary = dictionary
+        self._column = column
+        self._overlay: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in dictionary.overlay_entries.values():
+            self._overlay.setdefault(str(entry.get(column)), []).append(entry)
+
+    def __getitem__(self, key: str) -> List[Mapping]:
+        snapshot = self._dictionary.snapshot
+        if self._column == "id":
+            entry_id = _entry_id(key)
+            row = None if entry_id is None else snapshot.row_for_id(entry_id)
+            rows = [] if row is None else [row]
+        else:
+            rows = snapshot.find(self._column, key)
+        replaced = self._dictionary.overlay_entries
+        ids = snapshot.columns["id"]
+        found: List[Mapping] = [EntryView(snapshot, row) for row in rows if ids[row] not in replaced]
+        found.extend(self._overlay.get(key, []))
+        if not found:
+            raise KeyError(key)
+        return found
+
+    def __iter__(self):
+        return iter({str(row.get(self._column)) for row in _EntryRows(self._dictionary)})
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class _RelatedIndex(Mapping):
+    """Related rows for one entry id, read from the overlay or the table's offset array."""
+
+    def __init__(self, dictionary: "SnapshotDictionary", table: str):
+        self._dictionary = dictionary
+        self._table = table
+
+    def __getitem__(self, key: str) -> List[Dict[str, Any]]:
+        entry_id = _entry_id(key)
+        overlay = self._dictionary.overlay_related.get(self._table, {})
+        if entry_id in overlay:
+            rows = overlay[entry_id]
+        else:
+            row = None if entry_id is None else self._dictionary.snapshot.row_for_id(entry_id)
+            rows = [] if row is None else self._dictionary.snapshot.related(self._table, row)
+        if not rows:
+            raise KeyError(key)
+        return rows
+
+    def __iter__(self):
+        return iter({str(row["entry_id"]) for row in _RelatedRows(self._dictionary, self._table)})
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+
+class SnapshotDictionary(LocalDictionary):
+    """
+    LocalDictionary served straight from a memory-mapped columnar snapshot.
+
+    Rows are EntryView objects; lookups by id, headword and pinyin use the
+    snapshot's sorted key sections, and related rows come from its offset
+    tables, so none of them need a per-process in-memory index. Rows changed
+    since the snapshot was written live in a small in-memory overlay.
+    """
+
+    def __init__(self, snapshot: ColumnarSnapshot, overlay_entries: Dict[int, Dict[str, Any]] | None = None,
+                 overlay_related: Dict[str, Dict[int, List[Dict[str, Any]]]] | None = None,
+                 version: int | None = None, watermark: Any = None):
+        self.snapshot = snapshot
+        self.overlay_entries = overlay_entries or {}
+        self.overlay_related = overlay_related or {}
+        tables: Dict[str, Any] = {"dictionaryentry": _EntryRows(self)}
+        for table in RELATED_COLUMNS:
+            tables[table] = _RelatedRows(self, table)
+        super().__init__(
+            tables,
+            version=snapshot.version if version is None else version,
+            watermark=snapshot.watermark if watermark is None else watermark,
+        )
+        for column in ("id",) + KEY_COLUMNS:
+            self._indexes[("dictionaryentry", column)] = _KeyIndex(self, column)
+        for table in RELATED_COLUMNS:
+            self._indexes[(table, "entry_id")] = _RelatedIndex(self, table)
+
+    def with_changes(self, entries: List[Dict[str, Any]], related: Dict[str, Dict[int, List[Dict[str, Any]]]],
+                     version: int | None = None, watermark: Any = None) -> "SnapshotDictionary":
+        """Same contract as LocalDictionary.with_changes; the snapshot is shared and only the overlay is copied."""
+        overlay_entries = {**self.overlay_entries, **{entry["id"]: entry for entry in entries}}
+        overlay_related = {table: dict(rows) for table, rows in self.overlay_related.items()}
+        for table, by_entry in related.items():
+            overlay_related.setdefault(table, {}).update(by_entry)
+        return SnapshotDictionary(
+            self.snapshot, overlay_entries, overlay_related,
+            version=self.version + 1 if version is None else version,
+            watermark=self.watermark if watermark is None else watermark,
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "SnapshotDictionary":
+        return cls(ColumnarSnapshot(path))
+
+
+def load_dictionary(path: str) -> LocalDictionary:
+    """Open a columnar snapshot with mmap, or load a JSON snapshot into memory."""
+    if is_snapshot_file(path):
+        return SnapshotDictionary.from_file(path)
+    return LocalDictionary.from_file(path)
+
+
+if __name__ == "__main__":
+    # Usage: python -m src.db.columnar <snapshot.json> <snapshot.cdict>
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        data = json.load(f)
+    write_snapshot({name: data["tables"].get(name, []) for name in DICTIONARY_TABLES}, sys.argv[2],
+                   version=data.get("version", 0), watermark=data.get("watermark"))
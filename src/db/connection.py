@@ -1,15 +1,25 @@
 import os
-from typing import List, Dict, Any
-from supabase import create_client, Client
+import threading
+from typing import List, Dict, Any, Tuple
 
-_supabase_client: Client | None = None
+import httpx
+from supabase import create_client, Client, ClientOptions
 
+from src.config import (
+    SUPABASE_POOL_SIZE, SUPABASE_KEEPALIVE_CONNECTIONS, SUPABASE_KEEPALIVE_EXPIRY_S, SUPABASE_HTTP2,
+    SUPABASE_CONNECT_TIMEOUT_S, SUPABASE_READ_TIMEOUT_S, SUPABASE_POOL_TIMEOUT_S, DICTIONARY_SOURCE,
+)
+from src.db.local import LocalClient, add_dictionary_listener, get_local_client
+from src.db.resilience import ResilientClient
+from src.utils.concurrency import submit_all
+from src.utils.deadline import Deadline, DeadlineExceeded, active_deadline
+
+_supabase_client: ResilientClient | None = None
+_http_client: httpx.Client | None = None
+_client_lock = threading.Lock()
 
-def _init_client() -> Client:
-    global _supabase_client
-    if _supabase_client is not None:
-        return _supabase_client
 
+def _credentials() -> Tuple[str, str]:
     url = (
         os.getenv("SUPABASE_DB_URL")
     )
@@ -22,44 +32,163 @@ def _init_client() -> Client:
         raise RuntimeError(
             "Supabase credentials are missing. Please set SUPABASE_URL and SUPABASE_ANON_KEY (or service role)."
         )
+    return url, key
+
+
+class _BudgetedHTTPClient(httpx.Client):
+    """
+    httpx client whose timeouts are capped by the budget of the request being served.
+
+    Calls running under Deadline.bound() time out once the budget is spent
+    rather than after the configured read timeout, so request and pool
+    threads are not held by requests nobody is waiting for any more.
+    """
+
+    def request(self, *args, timeout=httpx.USE_CLIENT_DEFAULT, **kwargs):
+        deadline = active_deadline()
+        remaining = deadline.remaining() if deadline is not None else None
+        if remaining is not None and timeout is httpx.USE_CLIENT_DEFAULT:
+            if remaining <= 0:
+                raise DeadlineExceeded()
+            configured = self.timeout
+            timeout = httpx.Timeout(**{
+                phase: remaining if limit is None else min(limit, remaining)
+                for phase, limit in (("connect", configured.connect), ("read", configured.read),
+                                     ("write", configured.write), ("pool", configured.pool))
+            })
+        return super().request(*args, timeout=timeout, **kwargs)
+
+
+def _http_options() -> Dict[str, Any]:
+    """Pool, keep-alive, HTTP/2 and timeout settings of the shared HTTP client."""
+    return {
+        "limits": httpx.Limits(
+            max_connections=SUPABASE_POOL_SIZE,
+            max_keepalive_connections=SUPABASE_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY_S,
+        ),
+        "timeout": httpx.Timeout(
+            connect=SUPABASE_CONNECT_TIMEOUT_S,
+            read=SUPABASE_READ_TIMEOUT_S,
+            write=SUPABASE_READ_TIMEOUT_S,
+            pool=SUPABASE_POOL_TIMEOUT_S,
+        ),
+        "http2": SUPABASE_HTTP2,
+        "follow_redirects": True,
+    }
+
+
+def _init_backend_client() -> ResilientClient:
+    """
+    Create the process-wide Supabase client once, even when many threads ask at the same time.
+
+    Every thread shares one pooled httpx client, so connections (and HTTP/2
+    streams) are reused instead of being set up per request.
+    """
+    global _supabase_client, _http_client
+    if _supabase_client is not None:
+        return _supabase_client
 
-    _supabase_client = create_client(url, key)
+    with _client_lock:
+        if _supabase_client is None:
+            url, key = _credentials()
+            _http_client = _BudgetedHTTPClient(**_http_options())
+            client = create_client(url, key, options=ClientOptions(httpx_client=_http_client))
+            # The PostgREST client is otherwise built lazily on first use, unguarded
+            client.postgrest
+            resilient = ResilientClient(client)
+            # Cached fallback responses are stale once synced changes are swapped in
+            add_dictionary_listener(lambda old, new: resilient.clear_cache())
+            _supabase_client = resilient
     return _supabase_client
 
 
-def get_connection() -> Client:
+def _init_client() -> ResilientClient | LocalClient:
+    """The client dictionary queries go to: Supabase, or the local snapshot with DICTIONARY_SOURCE=local."""
+    if DICTIONARY_SOURCE == "local":
+        local = get_local_client()
+        if local is None:
+            raise RuntimeError("DICTIONARY_SOURCE=local requires DICTIONARY_SNAPSHOT_PATH to be set.")
+        return local
+    return _init_backend_client()
+
+
+def get_connection() -> ResilientClient | LocalClient:
     """Get the Supabase client (kept name for backward-compatibility)."""
     return _init_client()
 
 
-def _fetch_related_data(client: Client, entry_ids: List[int]) -> Dict[str, Dict[int, Any]]:
-    """Batch-fetch related tables and group by entry_id for formatting."""
+def get_backend_connection() -> Client:
+    """
+    The Supabase client itself, even when lookups are served locally, e.g. for syncing the snapshot.
+
+    Unlike get_connection() there is no hedging, cache or snapshot fallback:
+    a query fails when the backend does, so a sync poll is retried instead of
+    mistaking the snapshot's own rows for upstream changes.
+    """
+    return _init_backend_client()._client
+
+
+def close_clients() -> None:
+    """Close the pooled HTTP client."""
+    global _supabase_client, _http_client
+    with _client_lock:
+        if _http_client is not None:
+            _http_client.close()
+        _supabase_client = None
+        _http_client = None
+
+
+def _fetch_related_data(client: Client, entry_ids: List[int],
+                        deadline: Deadline | None = None) -> Dict[str, Dict[int, Any]]:
+    """
+    Batch-fetch related tables and group by entry_id for formatting.
+
+    With a deadline the four tables are fetched concurrently; a table that has
+    not answered when the budget runs out is left empty and the deadline is
+    marked partial.
+    """
     if not entry_ids:
         return {"pos": {}, "cls": {}, "trans": {}, "mean": {}}
 
-    # Fetch parts of speech
-    pos_resp = client.table("part_of_speech").select("entry_id,pos").in_("entry_id", entry_ids).execute()
+    queries = {
+        "pos": client.table("part_of_speech").select("entry_id,pos").in_("entry_id", entry_ids),
+        "cls": client.table("classifier").select("entry_id,classifier").in_("entry_id", entry_ids),
+        "trans": client.table("transcription").select("entry_id,system,value").in_("entry_id", entry_ids),
+        "mean": client.table("meaning").select("entry_id,definition").in_("entry_id", entry_ids),
+    }
+    if deadline is None:
+        data = {key: query.execute().data or [] for key, query in queries.items()}
+    else:
+        futures = submit_all([deadline.bound(query.execute) for query in queries.values()])
+        data = {}
+        for key, future in zip(queries, futures):
+            try:
+                data[key] = deadline.wait(future).data or []
+            except DeadlineExceeded:
+                future.cancel()
+                data[key] = []
+                deadline.mark_partial("related")
+
+    # Group parts of speech
     pos_by_entry: Dict[int, List[str]] = {}
-    for row in pos_resp.data or []:
+    for row in data["pos"]:
         pos_by_entry.setdefault(row["entry_id"], []).append(row["pos"])
 
-    # Fetch classifiers
-    cls_resp = client.table("classifier").select("entry_id,classifier").in_("entry_id", entry_ids).execute()
+    # Group classifiers
     cls_by_entry: Dict[int, List[str]] = {}
-    for row in cls_resp.data or []:
+    for row in data["cls"]:
         cls_by_entry.setdefault(row["entry_id"], []).append(row["classifier"])
 
-    # Fetch transcriptions
-    trans_resp = client.table("transcription").select("entry_id,system,value").in_("entry_id", entry_ids).execute()
+    # Group transcriptions
     trans_by_entry: Dict[int, Dict[str, str]] = {}
-    for row in trans_resp.data or []:
+    for row in data["trans"]:
         d = trans_by_entry.setdefault(row["entry_id"], {})
         d[row["system"]] = row["value"]
 
-    # Fetch meanings
-    mean_resp = client.table("meaning").select("entry_id,definition").in_("entry_id", entry_ids).execute()
+    # Group meanings
     mean_by_entry: Dict[int, List[str]] = {}
-    for row in mean_resp.data or []:
+    for row in data["mean"]:
         mean_by_entry.setdefault(row["entry_id"], []).append(row["definition"])
 
     return {
@@ -70,13 +199,13 @@ def _fetch_related_data(client: Client, entry_ids: List[int]) -> Dict[str, Dict[
     }
 
 
-def format_results(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def format_results(rows: List[Dict[str, Any]], deadline: Deadline | None = None) -> List[Dict[str, Any]]:
     """Format Supabase dictionaryentry rows with related data into API shape."""
     client = _init_client()
 
     # rows are dicts from Supabase select; gather ids
     entry_ids = [row["id"] for row in rows] if rows else []
-    related = _fetch_related_data(client, entry_ids)
+    related = _fetch_related_data(client, entry_ids, deadline)
 
     formatted_results: List[Dict[str, Any]] = []
     for row in rows:
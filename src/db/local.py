@@ -0,0 +1,410 @@
+import json
+import logging
+import re
+import sys
+import threading
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from src.config import DICTIONARY_SNAPSHOT_PATH, DICTIONARY_SYNC_WATERMARK_COLUMN
+
+logger = logging.getLogger(__name__)
+
+DICTIONARY_TABLES = ("dictionaryentry", "part_of_speech", "classifier", "transcription", "meaning")
+RELATED_TABLES = DICTIONARY_TABLES[1:]
+
+# Columns served from hash indexes instead of table scans
+INDEXED_COLUMNS = {
+    "dictionaryentry": ("id", "simplified", "traditional", "pinyin"),
+    "part_of_speech": ("entry_id",),
+    "classifier": ("entry_id",),
+    "transcription": ("entry_id",),
+    "meaning": ("entry_id",),
+}
+
+
+class LazyRow(Mapping):
+    """
+    A row read on demand (e.g. from a columnar snapshot), made fresh for every lookup.
+
+    Queries return these without copying them, and values are read only when
+    the row is serialized. Keys written by callers must not change the
+    underlying data.
+    """
+
+    def project(self, columns: List[str]) -> "LazyRow":
+        """The same row limited to the selected columns."""
+        raise NotImplementedError
+
+
+class LocalDictionary:
+    """
+    Read-only in-memory copy of the dictionary tables.
+
+    Rows are plain dicts keyed like the Supabase tables. Hash indexes for the
+    columns in INDEXED_COLUMNS are built on first use. `watermark` is the
+    latest sync watermark value the data includes (see src.db.sync).
+    """
+
+    def __init__(self, tables: Dict[str, List[Dict[str, Any]]], version: int = 0, watermark: Any = None):
+        self.tables = {name: tables.get(name, []) for name in DICTIONARY_TABLES}
+        self.version = version
+        self.watermark = watermark
+        self._indexes: Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]] = {}
+        self._index_lock = threading.Lock()
+
+    def index(self, table: str, column: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Rows of a table grouped by the string form of a column's value."""
+        key = (table, column)
+        index = self._indexes.get(key)
+        if index is None:
+            with self._index_lock:
+                index = self._indexes.get(key)
+                if index is None:
+                    index = {}
+                    for row in self.tables[table]:
+                        index.setdefault(str(row.get(column)), []).append(row)
+                    self._indexes[key] = index
+        return index
+
+    def entry(self, entry_id: int) -> Dict[str, Any] | None:
+        rows = self.index("dictionaryentry", "id").get(str(entry_id))
+        return rows[0] if rows else None
+
+    def with_changes(self, entries: List[Dict[str, Any]], related: Dict[str, Dict[int, List[Dict[str, Any]]]],
+                     version: int | None = None, watermark: Any = None) -> "LocalDictionary":
+        """
+        A new dictionary with changed entries and related rows applied.
+
+        `entries` replace (or add) rows by id, and `related` maps a table to
+        {entry_id: rows} replacing all of that entry's rows. A touched table
+        is kept as its id (or entry_id) index, so a change costs the rows it
+        touches rather than a pass over the table. Untouched tables and
+        indexes are shared; touched indexes are copied and patched, so this
+        dictionary is never mutated and requests still reading it are unaffected.
+        """
+        changed = {entry["id"]: entry for entry in entries}
+        replaced = {"dictionaryentry": ("id", set(changed), list(changed.values()))}
+        for table, by_entry in related.items():
+            replaced[table] = ("entry_id", set(by_entry), [row for rows in by_entry.values() for row in rows])
+
+        tables = dict(self.tables)
+        indexes = dict(self._indexes)
+        for table, (key_column, keys, added) in replaced.items():
+            by_key = self.index(table, key_column)
+            removed = [row for key in keys for row in by_key.get(str(key), [])]
+            for (indexed_table, column), index in list(self._indexes.items()):
+                if indexed_table == table:
+                    indexes[(table, column)] = _patch_index(index, column, removed, added)
+            tables[table] = _IndexedRows(indexes[(table, key_column)],
+                                         len(self.tables[table]) - len(removed) + len(added))
+
+        dictionary = LocalDictionary(
+            tables,
+            version=self.version + 1 if version is None else version,
+            watermark=self.watermark if watermark is None else watermark,
+        )
+        dictionary._indexes.update(indexes)
+        return dictionary
+
+    @classmethod
+    def from_file(cls, path: str) -> "LocalDictionary":
+        """Load a snapshot written by export_snapshot."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("tables", {}), version=data.get("version", 0), watermark=data.get("watermark"))
+
+
+class _IndexedRows:
+    """A table's rows, held as its id (or entry_id) index so changes are applied per key."""
+
+    def __init__(self, by_key: Dict[str, List[Dict[str, Any]]], count: int):
+        self._by_key = by_key
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for rows in self._by_key.values():
+            yield from rows
+
+
+def _patch_index(index: Dict[str, List[Dict[str, Any]]], column: str, removed: List[Dict[str, Any]],
+                 added: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Copy of an index with rows removed and added; only the touched buckets are rebuilt."""
+    patched = dict(index)
+    for row in removed:
+        key = str(row.get(column))
+        bucket = [r for r in patched.get(key, []) if r is not row]
+        if bucket:
+            patched[key] = bucket
+        else:
+            patched.pop(key, None)
+    for row in added:
+        key = str(row.get(column))
+        patched[key] = patched.get(key, []) + [row]
+    return patched
+
+
+def _equals(value: Any, expected: Any) -> bool:
+    return value == expected or (value is not None and str(value) == str(expected))
+
+
+def _compare(value: Any, expected: Any) -> Tuple[Any, Any]:
+    """Coerce a column value and a filter value to comparable types."""
+    if isinstance(value, (int, float)) and not isinstance(expected, (int, float)):
+        try:
+            return value, float(expected)
+        except (TypeError, ValueError):
+            pass
+    return str(value), str(expected)
+
+
+@lru_cache(maxsize=1024)
+def _like_pattern(pattern: str, case_insensitive: bool) -> re.Pattern:
+    regex = "".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in pattern)
+    return re.compile(regex, re.IGNORECASE | re.DOTALL if case_insensitive else re.DOTALL)
+
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": _equals,
+    "neq": lambda v, e: not _equals(v, e),
+    "gt": lambda v, e: v is not None and _compare(v, e)[0] > _compare(v, e)[1],
+    "gte": lambda v, e: v is not None and _compare(v, e)[0] >= _compare(v, e)[1],
+    "lt": lambda v, e: v is not None and _compare(v, e)[0] < _compare(v, e)[1],
+    "lte": lambda v, e: v is not None and _compare(v, e)[0] <= _compare(v, e)[1],
+    "like": lambda v, e: v is not None and _like_pattern(e, False).fullmatch(str(v)) is not None,
+    "ilike": lambda v, e: v is not None and _like_pattern(e, True).fullmatch(str(v)) is not None,
+    "in": lambda v, e: any(_equals(v, x) for x in e),
+    "is": lambda v, e: v is None if e in (None, "null") else _equals(v, e),
+}
+
+
+# Comma-separated filters, keeping "in.(a,b)" lists whole
+_top_level_commas = re.compile(r"[^,(]+(?:\([^)]*\))?")
+
+
+class LocalResponse:
+    """Mirrors the `data`/`count` attributes of a PostgREST APIResponse."""
+
+    def __init__(self, data: List[Dict[str, Any]], count: int | None = None):
+        self.data = data
+        self.count = count
+
+
+class LocalQuery:
+    """Chainable subset of the PostgREST select builder, evaluated in memory."""
+
+    def __init__(self, dictionary: LocalDictionary, table: str):
+        if table not in dictionary.tables:
+            raise ValueError(f"Unknown table: {table}")
+        self._dictionary = dictionary
+        self._table = table
+        self._columns: List[str] | None = None
+        self._count = False
+        # Each filter is a list of (column, operator, value) alternatives
+        self._filters: List[List[Tuple[str, str, Any]]] = []
+        self._orders: List[Tuple[str, bool, bool]] = []
+        self._range: Tuple[int, int] | None = None
+
+    def select(self, columns: str = "*", count: str | None = None) -> "LocalQuery":
+        self._columns = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        self._count = count is not None
+        return self
+
+    def _where(self, column: str, operator: str, value: Any) -> "LocalQuery":
+        self._filters.append([(column, operator, value)])
+        return self
+
+    def eq(self, column: str, value: Any) -> "LocalQuery":
+        return self._where(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "LocalQuery":
+        return self._where(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "LocalQuery":
+        return self._where(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "LocalQuery":
+        return self._where(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "LocalQuery":
+        return self._where(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "LocalQuery":
+        return self._where(column, "lte", value)
+
+    def like(self, column: str, pattern: str) -> "LocalQuery":
+        return self._where(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str) -> "LocalQuery":
+        return self._where(column, "ilike", pattern)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "LocalQuery":
+        return self._where(column, "in", list(values))
+
+    def or_(self, filters: str) -> "LocalQuery":
+        """PostgREST or syntax, e.g. "simplified.eq.你好,traditional.in.(你好,謝謝)"."""
+        alternatives = []
+        for part in _top_level_commas.findall(filters):
+            column, operator, value = part.split(".", 2)
+            if operator == "in":
+                value = [v.strip().strip('"') for v in value.strip("()").split(",")]
+            alternatives.append((column, operator, value))
+        self._filters.append(alternatives)
+        return self
+
+    def order(self, column: str, desc: bool = False, nullsfirst: bool = False) -> "LocalQuery":
+        self._orders.append((column, desc, nullsfirst))
+        return self
+
+    def range(self, start: int, end: int) -> "LocalQuery":
+        self._range = (start, end)
+        return self
+
+    def limit(self, size: int) -> "LocalQuery":
+        start = self._range[0] if self._range else 0
+        self._range = (start, start + size - 1)
+        return self
+
+    def _candidates(self) -> List[Dict[str, Any]]:
+        """Narrow the scan with an index when a filter only uses exact matches on indexed columns."""
+        indexed = INDEXED_COLUMNS.get(self._table, ())
+        for alternatives in self._filters:
+            if all(op in ("eq", "in") and column in indexed for column, op, _ in alternatives):
+                rows: Dict[Any, Dict[str, Any]] = {}
+                for column, op, value in alternatives:
+                    index = self._dictionary.index(self._table, column)
+                    for v in (value if op == "in" else [value]):
+                        for row in index.get(str(v), []):
+                            # Snapshot-backed rows are fresh views per lookup, so dedupe on id
+                            rows[row.get("id", id(row))] = row
+                return list(rows.values())
+        return self._dictionary.tables[self._table]
+
+    def execute(self) -> LocalResponse:
+        rows = [
+            row for row in self._candidates()
+            if all(
+                any(_OPERATORS[op](row.get(column), value) for column, op, value in alternatives)
+                for alternatives in self._filters
+            )
+        ]
+        count = len(rows) if self._count else None
+
+        # Stable sorts applied from the last order() to the first
+        for column, desc, nullsfirst in reversed(self._orders):
+            present = sorted((r for r in rows if r.get(column) is not None), key=lambda r: r[column], reverse=desc)
+            missing = [r for r in rows if r.get(column) is None]
+            rows = missing + present if nullsfirst else present + missing
+
+        if self._range is not None:
+            rows = rows[self._range[0]: self._range[1] + 1]
+
+        # Dict rows are shared by the dictionary and copied, since callers annotate rows with
+        # match_type and relevance_score; lazy rows are per lookup and stay lazy until serialized
+        if self._columns is None:
+            data = [row if isinstance(row, LazyRow) else dict(row) for row in rows]
+        else:
+            data = [row.project(self._columns) if isinstance(row, LazyRow) else {c: row.get(c) for c in self._columns}
+                    for row in rows]
+        return LocalResponse(data, count)
+
+
+class LocalClient:
+    """Serves `client.table(...)` queries from a LocalDictionary."""
+
+    def __init__(self, dictionary: LocalDictionary):
+        self.dictionary = dictionary
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self.dictionary, name)
+
+
+_local_dictionary: LocalDictionary | None = None
+_local_lock = threading.Lock()
+_listeners: List[Callable[[LocalDictionary | None, LocalDictionary | None], None]] = []
+
+
+def get_local_dictionary() -> LocalDictionary | None:
+    """
+    The process-wide local dictionary, loaded from DICTIONARY_SNAPSHOT_PATH on first use.
+
+    Columnar snapshots are memory-mapped rather than loaded, so worker
+    processes share one copy of the dictionary.
+    """
+    global _local_dictionary
+    if _local_dictionary is None and DICTIONARY_SNAPSHOT_PATH:
+        with _local_lock:
+            if _local_dictionary is None:
+                from src.db.columnar import load_dictionary
+                _local_dictionary = load_dictionary(DICTIONARY_SNAPSHOT_PATH)
+    return _local_dictionary
+
+
+def add_dictionary_listener(listener: Callable[[LocalDictionary | None, LocalDictionary | None], None]) -> None:
+    """Call `listener(old, new)` after every swap, e.g. to rebuild indexes or drop caches."""
+    _listeners.append(listener)
+
+
+def _notify(old: LocalDictionary | None, new: LocalDictionary | None) -> None:
+    for listener in list(_listeners):
+        try:
+            listener(old, new)
+        except Exception:
+            logger.exception("Local dictionary listener failed")
+
+
+def set_local_dictionary(dictionary: LocalDictionary | None) -> None:
+    global _local_dictionary
+    with _local_lock:
+        old, _local_dictionary = _local_dictionary, dictionary
+    _notify(old, dictionary)
+
+
+def swap_local_dictionary(expected: LocalDictionary, dictionary: LocalDictionary) -> bool:
+    """
+    Replace the local dictionary only if it is still `expected`.
+
+    The swap is a single reference assignment: requests already holding the
+    old dictionary finish against it, and new requests see the new one.
+    """
+    global _local_dictionary
+    with _local_lock:
+        if _local_dictionary is not expected:
+            return False
+        _local_dictionary = dictionary
+    _notify(expected, dictionary)
+    return True
+
+
+def get_local_client() -> LocalClient | None:
+    dictionary = get_local_dictionary()
+    return LocalClient(dictionary) if dictionary is not None else None
+
+
+def export_snapshot(client, path: str, page_size: int = 1000) -> None:
+    """Page through every dictionary table on the backend and write a snapshot file."""
+    tables: Dict[str, List[Dict[str, Any]]] = {}
+    for name in DICTIONARY_TABLES:
+        rows: List[Dict[str, Any]] = []
+        while True:
+            resp = client.table(name).select("*").order("id").range(len(rows), len(rows) + page_size - 1).execute()
+            batch = resp.data or []
+            rows.extend(batch)
+            if len(batch) < page_size:
+                break
+        tables[name] = rows
+    # The newest change included, so incremental sync can resume from here
+    stamps = [row[DICTIONARY_SYNC_WATERMARK_COLUMN] for rows in tables.values() for row in rows
+              if row.get(DICTIONARY_SYNC_WATERMARK_COLUMN) is not None]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 0, "watermark": max(stamps, default=None), "tables": tables}, f, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    # Usage: python -m src.db.local <snapshot.json>
+    from src.db.connection import get_connection
+    export_snapshot(get_connection(), sys.argv[1])
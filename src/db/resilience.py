@@ -0,0 +1,270 @@
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Any, Callable, Deque, List, Tuple
+
+from src.config import (
+    BACKEND_HEDGE_ENABLED, BACKEND_HEDGE_PERCENTILE, BACKEND_HEDGE_MIN_MS, BACKEND_HEDGE_MIN_SAMPLES,
+    BACKEND_BREAKER_WINDOW, BACKEND_BREAKER_MIN_CALLS, BACKEND_BREAKER_ERROR_RATE,
+    BACKEND_BREAKER_SLOW_RATE, BACKEND_BREAKER_SLOW_MS, BACKEND_BREAKER_COOLDOWN_S,
+    BACKEND_RESPONSE_CACHE_SIZE,
+)
+from src.db.local import LocalClient, LocalResponse, get_local_client
+from src.utils.concurrency import get_executor
+from src.utils.deadline import DeadlineExceeded, active_deadline
+from src.utils.metrics import metrics
+
+# Responses larger than this are not kept for fallback
+_MAX_CACHED_ROWS = 500
+
+Operation = Tuple[str, tuple, dict]
+
+
+class BackendUnavailable(Exception):
+    """Raised when the backend failed and no fallback could answer the query."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling the backend when too many recent calls fail or are slow.
+
+    Closed: calls go through and outcomes are recorded over a sliding window.
+    Open: calls are refused until the cooldown has passed.
+    Half-open: a single probe call is let through; its outcome closes or
+    reopens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window: int = BACKEND_BREAKER_WINDOW, min_calls: int = BACKEND_BREAKER_MIN_CALLS,
+                 error_rate: float = BACKEND_BREAKER_ERROR_RATE, slow_rate: float = BACKEND_BREAKER_SLOW_RATE,
+                 slow_ms: float = BACKEND_BREAKER_SLOW_MS, cooldown_s: float = BACKEND_BREAKER_COOLDOWN_S):
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_ms = slow_ms
+        self.cooldown_s = cooldown_s
+        self.state = self.CLOSED
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        metrics.set_gauge("backend.circuit", state)
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+            metrics.incr("backend.circuit_opened")
+        self._outcomes.clear()
+
+    def allow(self) -> bool:
+        """Whether a call may go to the backend; every allowed call must be recorded."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown_s:
+                    return False
+                self._set_state(self.HALF_OPEN)
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record(self, failed: bool, latency_ms: float) -> None:
+        slow = latency_ms >= self.slow_ms
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                self._set_state(self.OPEN if failed or slow else self.CLOSED)
+                return
+            self._outcomes.append((failed, slow))
+            if len(self._outcomes) < self.min_calls:
+                return
+            errors = sum(1 for f, _ in self._outcomes if f) / len(self._outcomes)
+            slow_calls = sum(1 for _, s in self._outcomes if s) / len(self._outcomes)
+            if errors >= self.error_rate or slow_calls >= self.slow_rate:
+                self._set_state(self.OPEN)
+
+
+class LatencyTracker:
+    """Recent successful call latencies, used to decide when to hedge."""
+
+    def __init__(self, window: int = 500, percentile: float = BACKEND_HEDGE_PERCENTILE,
+                 min_ms: float = BACKEND_HEDGE_MIN_MS, min_samples: int = BACKEND_HEDGE_MIN_SAMPLES):
+        self.percentile = percentile
+        self.min_ms = min_ms
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, latency_ms: float) -> None:
+        with self._lock:
+            self._samples.append(latency_ms)
+
+    def hedge_after_ms(self) -> float | None:
+        """Latency after which a duplicate request is sent, or None until enough samples exist."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        value = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+        return max(self.min_ms, value)
+
+
+def _replay(client, table: str, operations: List[Operation]):
+    """Rebuild a recorded query against any client exposing `table()`."""
+    query = client.table(table)
+    for name, args, kwargs in operations:
+        query = getattr(query, name)(*args, **kwargs)
+    return query
+
+
+class ResilientQuery:
+    """Records builder calls so the query can be sent, hedged or replayed on a fallback."""
+
+    def __init__(self, client: "ResilientClient", table: str):
+        self._resilient_client = client
+        self._table = table
+        self._operations: List[Operation] = []
+
+    def __getattr__(self, name: str) -> Callable[..., "ResilientQuery"]:
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        def record(*args, **kwargs) -> "ResilientQuery":
+            self._operations.append((name, args, kwargs))
+            return self
+        return record
+
+    def execute(self):
+        return self._resilient_client.execute_query(self._table, list(self._operations))
+
+
+class ResilientClient:
+    """
+    Wraps the Supabase client with hedged reads, a circuit breaker and fallbacks.
+
+    Reads slower than the recent latency percentile get a duplicate request
+    and the first answer wins. When the backend fails or the circuit is open,
+    reads are answered from recently cached responses or the local dictionary
+    snapshot; BackendUnavailable is raised only if neither can answer.
+    Everything other than `table()` is passed through to the wrapped client.
+    """
+
+    def __init__(self, client, fallback: Callable[[], LocalClient | None] = get_local_client):
+        self._client = client
+        self._fallback = fallback
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker()
+        self._cache: "OrderedDict[str, Tuple[List[dict], Any]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+    def table(self, name: str) -> ResilientQuery:
+        return ResilientQuery(self, name)
+
+    def execute_query(self, table: str, operations: List[Operation]):
+        is_read = bool(operations) and operations[0][0] == "select"
+        key = f"{table}:{operations!r}"
+        error: Exception | None = None
+
+        if self.breaker.allow():
+            started = time.perf_counter()
+            try:
+                response = self._send(table, operations, hedge=is_read)
+            except Exception as e:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                deadline = active_deadline()
+                if isinstance(e, DeadlineExceeded) or (deadline is not None and deadline.expired()):
+                    # Cut short by the request's own budget: slow, not failed, and not worth a fallback
+                    self.breaker.record(False, elapsed_ms)
+                    metrics.incr("backend.deadline_timeouts")
+                    raise DeadlineExceeded() from e
+                self.breaker.record(True, elapsed_ms)
+                metrics.incr("backend.errors")
+                if not is_read:
+                    raise
+                error = e
+            else:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                self.breaker.record(False, elapsed_ms)
+                self.latency.observe(elapsed_ms)
+                metrics.observe("backend.latency_ms", elapsed_ms)
+                if is_read:
+                    self._remember(key, response)
+                return response
+        else:
+            metrics.incr("backend.short_circuited")
+            if not is_read:
+                raise BackendUnavailable("Dictionary backend circuit is open")
+
+        return self._fall_back(key, table, operations, error)
+
+    def _send(self, table: str, operations: List[Operation], hedge: bool):
+        def call():
+            return _replay(self._client, table, operations).execute()
+
+        hedge_after_ms = self.latency.hedge_after_ms() if hedge and BACKEND_HEDGE_ENABLED else None
+        if hedge_after_ms is None:
+            return call()
+
+        executor = get_executor("backend")
+        # Copied context, so the hedges keep the request's budget (see Deadline.bound)
+        primary = executor.submit(contextvars.copy_context().run, call)
+        done, _ = wait([primary], timeout=hedge_after_ms / 1000)
+        if done:
+            return primary.result()
+
+        metrics.incr("backend.hedges")
+        hedged = executor.submit(contextvars.copy_context().run, call)
+        pending = {primary, hedged}
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedged:
+                        metrics.incr("backend.hedge_wins")
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def clear_cache(self) -> None:
+        """Drop cached responses, e.g. once the dictionary data has changed."""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _remember(self, key: str, response) -> None:
+        data = getattr(response, "data", None)
+        if not isinstance(data, list) or len(data) > _MAX_CACHED_ROWS:
+            return
+        with self._cache_lock:
+            self._cache[key] = ([dict(row) for row in data], getattr(response, "count", None))
+            self._cache.move_to_end(key)
+            while len(self._cache) > BACKEND_RESPONSE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def _fall_back(self, key: str, table: str, operations: List[Operation], error: Exception | None):
+        with self._cache_lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            metrics.incr("backend.fallback.cache")
+            data, count = cached
+            return LocalResponse([dict(row) for row in data], count)
+
+        local = self._fallback()
+        if local is not None:
+            metrics.incr("backend.fallback.local")
+            return _replay(local, table, operations).execute()
+
+        raise BackendUnavailable("Dictionary backend is unavailable and no local snapshot is loaded") from error
@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Set
+
+from src.config import DICTIONARY_SYNC_INTERVAL_S, DICTIONARY_SYNC_PAGE_SIZE, DICTIONARY_SYNC_WATERMARK_COLUMN
+from src.db.local import DICTIONARY_TABLES, RELATED_TABLES, get_local_dictionary, swap_local_dictionary
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Entry ids per related-rows request, kept well under PostgREST's max-rows
+_ENTRY_CHUNK = 100
+
+
+class DictionarySync:
+    """
+    Pulls rows changed since the last watermark and swaps in a new local dictionary.
+
+    Each table is polled for rows whose watermark column is at or after the
+    last value seen. For every touched entry, all of its related rows are
+    refetched, so rows removed alongside an entry update are dropped too.
+    Deletions of whole entries are not seen; a fresh snapshot picks them up.
+    """
+
+    def __init__(self, client_factory: Callable[[], Any], column: str = DICTIONARY_SYNC_WATERMARK_COLUMN,
+                 page_size: int = DICTIONARY_SYNC_PAGE_SIZE):
+        self._client_factory = client_factory
+        self.column = column
+        self.page_size = page_size
+        self.watermarks: Dict[str, Any] = {}
+        # Ids already applied at each table's watermark, since polling is inclusive
+        self._seen_at_watermark: Dict[str, Set[Any]] = {}
+        # Tables whose watermark was looked up in a snapshot that recorded none
+        self._seeded: Set[str] = set()
+
+    def _seed(self, dictionary, table: str) -> None:
+        """
+        Start a table at the newest row the local dictionary already holds.
+
+        For snapshots written without a watermark, which would otherwise have
+        every table pulled in full by the first poll.
+        """
+        self._seeded.add(table)
+        stamps = [(row.get(self.column), row.get("id")) for row in dictionary.tables[table]]
+        stamps = [(stamp, row_id) for stamp, row_id in stamps if stamp is not None]
+        if stamps:
+            latest = max(stamp for stamp, _ in stamps)
+            self.watermarks[table] = latest
+            self._seen_at_watermark[table] = {row_id for stamp, row_id in stamps if stamp == latest}
+
+    def _changed(self, client, table: str, since: Any) -> List[Dict[str, Any]]:
+        # The snapshot's own watermark is exclusive; our polling watermarks are inclusive
+        inclusive = table in self.watermarks
+        rows: List[Dict[str, Any]] = []
+        while True:
+            query = client.table(table).select("*")
+            if since is not None:
+                query = query.gte(self.column, since) if inclusive else query.gt(self.column, since)
+            resp = query.order(self.column).order("id").range(len(rows), len(rows) + self.page_size - 1).execute()
+            batch = resp.data or []
+            rows.extend(batch)
+            if len(batch) < self.page_size:
+                break
+        seen = self._seen_at_watermark.get(table, set())
+        return [row for row in rows if not (row.get(self.column) == since and row.get("id") in seen)]
+
+    def _related_rows(self, client, entry_ids: List[int]) -> Dict[str, Dict[int, List[Dict[str, Any]]]]:
+        related: Dict[str, Dict[int, List[Dict[str, Any]]]] = {
+            table: {entry_id: [] for entry_id in entry_ids} for table in RELATED_TABLES
+        }
+        for start in range(0, len(entry_ids), _ENTRY_CHUNK):
+            chunk = entry_ids[start:start + _ENTRY_CHUNK]
+            for table in RELATED_TABLES:
+                resp = client.table(table).select("*").in_("entry_id", chunk).execute()
+                for row in resp.data or []:
+                    related[table][row["entry_id"]].append(row)
+        return related
+
+    def sync_once(self) -> int:
+        """Apply one round of changes; returns the number of entries touched."""
+        dictionary = get_local_dictionary()
+        if dictionary is None:
+            return 0
+        started = time.perf_counter()
+        client = self._client_factory()
+
+        changes: Dict[str, List[Dict[str, Any]]] = {}
+        for table in DICTIONARY_TABLES:
+            if dictionary.watermark is None and table not in self.watermarks and table not in self._seeded:
+                self._seed(dictionary, table)
+            since = self.watermarks.get(table, dictionary.watermark)
+            changes[table] = self._changed(client, table, since)
+
+        entry_ids = {row["id"] for row in changes["dictionaryentry"]}
+        for table in RELATED_TABLES:
+            entry_ids.update(row["entry_id"] for row in changes[table])
+
+        if entry_ids:
+            watermark = max(
+                (row[self.column] for rows in changes.values() for row in rows if row.get(self.column) is not None),
+                default=dictionary.watermark,
+            )
+            if dictionary.watermark is not None and watermark is not None:
+                watermark = max(watermark, dictionary.watermark)
+            updated = dictionary.with_changes(
+                changes["dictionaryentry"], self._related_rows(client, sorted(entry_ids)), watermark=watermark,
+            )
+            if not swap_local_dictionary(dictionary, updated):
+                # Replaced meanwhile (e.g. a snapshot reload); retry against the new one next round
+                metrics.incr("dictionary.sync.conflicts")
+                return 0
+            metrics.set_gauge("dictionary.version", updated.version)
+            metrics.incr("dictionary.sync.entries", len(entry_ids))
+
+        self._advance(changes, dictionary.watermark)
+        metrics.observe("dictionary.sync.latency_ms", (time.perf_counter() - started) * 1000)
+        return len(entry_ids)
+
+    def _advance(self, changes: Dict[str, List[Dict[str, Any]]], default: Any) -> None:
+        for table, rows in changes.items():
+            stamps = [row[self.column] for row in rows if row.get(self.column) is not None]
+            if not stamps:
+                continue
+            previous = self.watermarks.get(table, default)
+            latest = max(stamps)
+            seen = {row.get("id") for row in rows if row.get(self.column) == latest}
+            if latest == previous:
+                seen |= self._seen_at_watermark.get(table, set())
+            self.watermarks[table] = latest
+            self._seen_at_watermark[table] = seen
+
+
+_sync_thread: threading.Thread | None = None
+_stop = threading.Event()
+
+
+def start_sync(client_factory: Callable[[], Any], interval_s: float = DICTIONARY_SYNC_INTERVAL_S) -> bool:
+    """Run DictionarySync every interval on a daemon thread; returns False when disabled."""
+    global _sync_thread
+    if interval_s <= 0 or _sync_thread is not None:
+        return False
+    sync = DictionarySync(client_factory)
+    _stop.clear()
+
+    def run() -> None:
+        while not _stop.wait(interval_s):
+            try:
+                sync.sync_once()
+            except Exception as e:
+                metrics.incr("dictionary.sync.errors")
+                logger.warning("Dictionary sync failed: %s", e)
+
+    _sync_thread = threading.Thread(target=run, name="dictionary-sync", daemon=True)
+    _sync_thread.start()
+    return True
+
+
+def stop_sync(timeout: float | None = 5) -> None:
+    global _sync_thread
+    if _sync_thread is not None:
+        _stop.set()
+        _sync_thread.join(timeout)
+        _sync_thread = None
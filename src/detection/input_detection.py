@@ -1,5 +1,6 @@
 import re
 import os
+from typing import Dict
 
 # Read the pinyin list from the file
 pinyin_list_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'pinyin_list')
@@ -11,20 +12,41 @@ with open(pinyin_list_path, 'r') as f:
     # Split by commas and clean up each item
     pinyin_list = [item.strip().strip('"\'') for item in content.split(',') if item.strip()]
 
+# Common English words that are also valid pinyin syllables
+# These words should be prioritized as English even though they are valid pinyin
+COMMON_ENGLISH_WORDS_ALSO_PINYIN = {
+    'can', 'fan', 'man', 'pen'
+}
+
+# Valid pinyin that is also a common English word; detected as pinyin, but
+# English is a close second
+PINYIN_ALSO_COMMON_ENGLISH = {
+    'a', 'an', 'ban', 'bang', 'die', 'ding', 'gang', 'gun', 'hang', 'he', 'hen',
+    'lie', 'long', 'me', 'men', 'pan', 'pang', 'pie', 'ping', 'ran', 'rang', 'run',
+    'sang', 'she', 'shun', 'sun', 'tang', 'tie', 'wan', 'zen'
+}
+
+# Spellings that are rare in pinyin but common in English
+_english_looking = re.compile(r'ck|th|ph|gh|[^aeiou]y$|ed$|ly$|ment$|tion$|ness$')
+
+# CJK Unified Ideographs: basic block, Extension A and Extension B
+HANZI_RANGES = '\u4e00-\u9fff\u3400-\u4dbf\U00020000-\U0002a6df'
+_hanzi = re.compile(f'[{HANZI_RANGES}]')
+
+# English-specific patterns, checked together in one search
+_english_patterns = re.compile('|'.join([
+    r'[qwrtypsdfghjklzxcvbnm]{3,}',  # 3+ consecutive consonants
+    r'[^aeiou]r[^aeiou]',  # 'r' between consonants (like "car")
+    r'[^aeiou]l[^aeiou]',  # 'l' between consonants
+    r'ck', r'sh', r'th', r'ph', r'gh',  # Common English consonant pairs
+    r'[^aeiou]y$',  # Words ending with consonant + 'y'
+    r'ed$', r'ing$', r'ly$', r'ment$', r'tion$', r'ness$'  # Common English suffixes
+]))
+
+
 def contains_chinese(text: str) -> bool:
     """Check if the input contains Chinese characters."""
-    # Check for Chinese characters using Unicode code point ranges
-    for char in text:
-        # CJK Unified Ideographs (Basic Chinese characters)
-        if '\u4e00' <= char <= '\u9fff':
-            return True
-        # CJK Unified Ideographs Extension A
-        if '\u3400' <= char <= '\u4dbf':
-            return True
-        # CJK Unified Ideographs Extension B
-        if '\u20000' <= char <= '\u2a6df':
-            return True
-    return False
+    return _hanzi.search(text) is not None
 
 
 def is_pinyin(text: str) -> bool:
@@ -93,14 +115,8 @@ def is_english(text: str) -> bool:
     if contains_chinese(text):
         return False
     
-    # Common English words that are also valid pinyin syllables
-    # These words should be prioritized as English even though they are valid pinyin
-    common_english_words_also_pinyin = [
-        'can', 'fan', 'man', 'pen'
-    ]
-    
     # If it's a common English word that's also a valid pinyin syllable, prioritize English
-    if text.lower() in common_english_words_also_pinyin:
+    if text.lower() in COMMON_ENGLISH_WORDS_ALSO_PINYIN:
         return True
         
     # If it's pinyin, it's not English
@@ -108,18 +124,8 @@ def is_english(text: str) -> bool:
         return False
         
     # Check for English-specific patterns
-    english_patterns = [
-        r'[qwrtypsdfghjklzxcvbnm]{3,}',  # 3+ consecutive consonants
-        r'[^aeiou]r[^aeiou]',  # 'r' between consonants (like "car")
-        r'[^aeiou]l[^aeiou]',  # 'l' between consonants
-        r'ck', r'sh', r'th', r'ph', r'gh',  # Common English consonant pairs
-        r'[^aeiou]y$',  # Words ending with consonant + 'y'
-        r'ed$', r'ing$', r'ly$', r'ment$', r'tion$', r'ness$'  # Common English suffixes
-    ]
-    
-    for pattern in english_patterns:
-        if re.search(pattern, text.lower()):
-            return True
+    if _english_patterns.search(text.lower()):
+        return True
 
     # Check if the text contains only English letters, spaces, and common punctuation
     if re.match(r'^[a-zA-Z\s.,;:!?\'"-]+$', text):
@@ -146,15 +152,13 @@ def detect_input_type(text: str) -> str:
     """Detect the type of input: Chinese, Pinyin, or English."""
     if contains_chinese(text):
         return "chinese"
-    
-    # Common English words that are also valid pinyin syllables
-    # These words should be prioritized as English even though they are valid pinyin
-    common_english_words_also_pinyin = [
-        'can', 'fan', 'man', 'pen'
-    ]
-    
+    return _latin_input_type(text)
+
+
+def _latin_input_type(text: str) -> str:
+    """detect_input_type for input already known to have no Chinese characters."""
     # If it's a common English word that's also a valid pinyin syllable, prioritize English
-    if text.lower() in common_english_words_also_pinyin:
+    if text.lower() in COMMON_ENGLISH_WORDS_ALSO_PINYIN:
         return "english"
     
     # If it's a single word that exactly matches a pinyin syllable, prioritize pinyin
@@ -174,4 +178,40 @@ def detect_input_type(text: str) -> str:
 
 def remove_tone_numbers(pinyin: str) -> str:
     """Remove tone numbers from pinyin."""
-    return re.sub(r'[1-4]', '', pinyin)
\ No newline at end of file
+    return re.sub(r'[1-4]', '', pinyin)
+
+
+def detect_input_confidences(text: str) -> Dict[str, float]:
+    """
+    Score how likely the input is Chinese, Pinyin or English.
+
+    The highest score always agrees with detect_input_type. A runner-up close
+    behind it marks input that is valid as more than one type.
+    """
+    if contains_chinese(text):
+        return {"chinese": 1.0, "pinyin": 0.0, "english": 0.0}
+    return latin_confidences(text)
+
+
+def latin_confidences(text: str) -> Dict[str, float]:
+    """detect_input_confidences for input already known to have no Chinese characters."""
+    input_type = _latin_input_type(text)
+    lowered = text.lower()
+    if input_type == "english":
+        if lowered in COMMON_ENGLISH_WORDS_ALSO_PINYIN:
+            return {"chinese": 0.0, "pinyin": 0.4, "english": 0.6}
+        return {"chinese": 0.0, "pinyin": 0.0, "english": 1.0}
+
+    # Tone numbers never appear in English
+    if re.search(r'[1-4]', text):
+        return {"chinese": 0.0, "pinyin": 1.0, "english": 0.0}
+    if lowered in PINYIN_ALSO_COMMON_ENGLISH:
+        return {"chinese": 0.0, "pinyin": 0.6, "english": 0.4}
+    if _english_looking.search(lowered):
+        return {"chinese": 0.0, "pinyin": 0.7, "english": 0.3}
+    return {"chinese": 0.0, "pinyin": 0.9, "english": 0.1}
+
+
+def is_ambiguous(confidences: Dict[str, float], threshold: float) -> bool:
+    """Check whether more than one input type scores at or above the threshold."""
+    return sum(1 for score in confidences.values() if score >= threshold) > 1
@@ -0,0 +1,138 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List
+
+from src.detection.input_detection import COMMON_ENGLISH_WORDS_ALSO_PINYIN, HANZI_RANGES, latin_confidences, pinyin_list
+
+HANZI = "hanzi"
+NUMBERED_PINYIN = "numbered_pinyin"
+PINYIN = "pinyin"
+ENGLISH = "english"
+PUNCTUATION = "punctuation"
+
+# The search each span type is sent to
+SEARCH_TYPES = {HANZI: "chinese", NUMBERED_PINYIN: "pinyin", PINYIN: "pinyin", ENGLISH: "english"}
+
+_SYLLABLES = frozenset(s.replace("ü", "v") for s in pinyin_list)
+_MAX_SYLLABLE = max(map(len, _SYLLABLES))
+_TONE_MARKS = "āáǎàēéěèīíǐìōóǒòūúǔùǖǘǚǜü"
+_TONE_MARK_BASES = str.maketrans(_TONE_MARKS, "aaaaeeeeiiiioooouuuuvvvvv")
+# Toneless ü is plain pinyin spelling, not a tone
+_TONED = frozenset(_TONE_MARKS) - {"ü"}
+
+# One alternation over precompiled character classes; a single finditer pass
+# assigns every character of the input to a span
+_token = re.compile(
+    rf"(?P<{HANZI}>[{HANZI_RANGES}]+)"
+    rf"|(?P<{NUMBERED_PINYIN}>(?:[a-z{_TONE_MARKS}:]+[1-5])+)"
+    rf"|(?P<word>[a-z{_TONE_MARKS}]+(?:['’-][a-z{_TONE_MARKS}]+)*)"
+    r"|(?P<space>\s+)"
+    r"|(?P<punctuation>.)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+@dataclass(frozen=True)
+class Span:
+    type: str
+    text: str
+    start: int
+    end: int
+
+    @property
+    def search_type(self) -> str | None:
+        return SEARCH_TYPES.get(self.type)
+
+    @property
+    def anchored(self) -> bool:
+        """Whether the span's type is certain: hanzi, or pinyin with tone numbers or marks."""
+        return self.type in (HANZI, NUMBERED_PINYIN) or (self.type == PINYIN and not _TONED.isdisjoint(self.text.lower()))
+
+
+def _is_pinyin_word(word: str) -> bool:
+    """Whether the word splits into pinyin syllables, e.g. "nihao" or "xi'an"."""
+    word = word.lower().translate(_TONE_MARK_BASES).replace("'", "").replace("’", "")
+    reachable = [True] + [False] * len(word)
+    for i in range(len(word)):
+        if reachable[i]:
+            for j in range(i + 1, min(len(word), i + _MAX_SYLLABLE) + 1):
+                if word[i:j] in _SYLLABLES:
+                    reachable[j] = True
+    return reachable[-1]
+
+
+def _word_type(word: str) -> str:
+    if word.lower() in COMMON_ENGLISH_WORDS_ALSO_PINYIN or "-" in word:
+        return ENGLISH
+    if any(c in _TONE_MARKS for c in word.lower()) or _is_pinyin_word(word):
+        return PINYIN
+    return ENGLISH
+
+
+def tokenize(text: str) -> List[Span]:
+    """
+    Split input into typed spans: hanzi, numbered pinyin, toneless (or
+    tone-marked) pinyin, English and punctuation.
+
+    Consecutive words of the same type separated only by spaces form one
+    span, so "ni hao" and "good morning" stay phrases. Toneless words run
+    together as one span too, English if any of them is, so English spelled
+    like pinyin ("thank you") is not split. Whitespace is dropped.
+    """
+    spans: List[Span] = []
+    previous_was_space = False
+    for match in _token.finditer(text):
+        kind = match.lastgroup
+        if kind == "space":
+            previous_was_space = True
+            continue
+        if kind == "word":
+            kind = _word_type(match.group())
+        last = spans[-1] if spans else None
+        word = Span(kind, match.group(), match.start(), match.end())
+        if (last is not None and previous_was_space and kind in (PINYIN, NUMBERED_PINYIN, ENGLISH)
+                and last.search_type == SEARCH_TYPES[kind]):
+            # "hao3 hao" is one pinyin phrase with some tones given
+            merged_type = last.type if last.type == kind else NUMBERED_PINYIN
+            spans[-1] = Span(merged_type, text[last.start:match.end()], last.start, match.end())
+        elif (last is not None and previous_was_space and {kind, last.type} == {PINYIN, ENGLISH}
+                and not last.anchored and not word.anchored):
+            spans[-1] = Span(ENGLISH, text[last.start:match.end()], last.start, match.end())
+        else:
+            spans.append(word)
+        previous_was_space = False
+    return spans
+
+
+def search_spans(spans: List[Span]) -> List[Span]:
+    """The spans that are sent to a search (everything except punctuation)."""
+    return [span for span in spans if span.search_type is not None]
+
+
+def is_mixed(spans: List[Span]) -> bool:
+    """
+    Whether the spans need more than one kind of search.
+
+    Only input with an anchored span (hanzi, numbered or tone-marked
+    pinyin) is mixed. All-Latin input is left to the whole-input detector,
+    since toneless words may be English spelled like pinyin.
+    """
+    searched = search_spans(spans)
+    return any(span.anchored for span in searched) and len({span.search_type for span in searched}) > 1
+
+
+def span_confidences(text: str, spans: List[Span]) -> Dict[str, float]:
+    """
+    detect_input_confidences, worked out from the spans instead of scanning the input again.
+
+    Input with an anchored span is scored by the share of its spans sent to
+    each search. All-Latin input is scored by the whole-input detector, as
+    before tokenizing.
+    """
+    searched = search_spans(spans)
+    if not any(span.anchored for span in searched):
+        return latin_confidences(text)
+    confidences = {"chinese": 0.0, "pinyin": 0.0, "english": 0.0}
+    for span in searched:
+        confidences[span.search_type] += 1 / len(searched)
+    return {search_type: round(score, 4) for search_type, score in confidences.items()}
@@ -0,0 +1,78 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+
+from src.config import EXERCISE_BATCH_MAX, EXERCISE_BATCH_WINDOW_MS
+from src.utils.agent_trace import untraced
+from src.utils.metrics import metrics
+
+# run_one(**item, on_event=...) -> result
+RunOne = Callable[..., Awaitable[Any]]
+# run_batch(items, on_events) -> one result per item, in order
+RunBatch = Callable[[List[Dict[str, Any]], List[Callable]], Awaitable[List[Any]]]
+
+
+class MicroBatcher:
+    """
+    Collects generations that arrive close together and runs them as one.
+
+    The first request opens a window of `window_ms`. Everything submitted
+    before it closes, up to `max_size` requests, goes to `run_batch` in one
+    call, and each caller gets its own result back. A window that collects
+    only one request runs it alone through `run_one`. A window of 0
+    disables batching.
+    """
+
+    def __init__(self, run_one: RunOne, run_batch: RunBatch, window_ms: float = EXERCISE_BATCH_WINDOW_MS,
+                 max_size: int = EXERCISE_BATCH_MAX):
+        self._run_one = run_one
+        self._run_batch = run_batch
+        self.window_s = window_ms / 1000
+        self.max_size = max_size
+        self._pending: List[Tuple[Dict[str, Any], Callable, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        # Running batches, referenced so they are not garbage collected
+        self._running: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Dict[str, Any], on_event: Callable) -> Any:
+        if self.window_s <= 0 or self.max_size <= 1:
+            return await self._run_one(**item, on_event=on_event)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, on_event, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: List[Tuple[Dict[str, Any], Callable, asyncio.Future]]) -> None:
+        items = [item for item, _, _ in batch]
+        on_events = [on_event for _, on_event, _ in batch]
+        try:
+            if len(batch) == 1:
+                results = [await self._run_one(**items[0], on_event=on_events[0])]
+            else:
+                metrics.incr("exercise.batches")
+                metrics.incr("exercise.batched_requests", len(batch))
+                # Shared by every request in it, so not charged to the one that opened the window
+                with untraced():
+                    results = await self._run_batch(items, on_events)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            # A caller that gave up has cancelled its future
+            if not future.done():
+                future.set_result(result)
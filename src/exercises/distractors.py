@@ -0,0 +1,172 @@
+import random
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from src.config import DISTRACTORS_PER_ENTRY
+from src.exercises.validator import MULTIPLE_CHOICE_OPTIONS
+from src.search.dictionary_index import BackgroundIndex, get_index, load_table, rank_key
+from src.search.suggest import normalize_key
+
+SHARED_CHARACTER = "shared_character"
+SIMILAR_PINYIN = "similar_pinyin"
+SAME_RADICAL = "same_radical"
+SAME_HSK_BAND = "same_hsk_band"
+# Also the order distractors are interleaved in: the most confusable kinds first
+REASONS = (SHARED_CHARACTER, SIMILAR_PINYIN, SAME_RADICAL, SAME_HSK_BAND)
+
+
+def _toneless(pinyin: str) -> str:
+    return " ".join(normalize_key(syllable) for syllable in pinyin.split())
+
+
+class DistractorIndex:
+    """
+    Plausible wrong answers for every entry, computed once per dictionary.
+
+    Candidates are other words that share a character, have the same
+    syllables with different tones, share the radical, or have the same HSK
+    level and a part of speech in common. Each entry keeps up to
+    `per_entry` of them. The kinds are interleaved, and within a kind, words
+    of the same length and more common words come first.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], parts_of_speech: Iterable[Dict[str, Any]],
+                 per_entry: int = DISTRACTORS_PER_ENTRY):
+        self.entries = {entry["id"]: entry for entry in entries}
+        pos_by_entry: Dict[int, set] = {}
+        for row in parts_of_speech:
+            pos_by_entry.setdefault(row["entry_id"], set()).add(row["pos"])
+
+        ranked = sorted(entries, key=rank_key)
+        # Headword in either script -> entry ids, most common first
+        self._by_word: Dict[str, List[int]] = {}
+        postings: Dict[str, Dict[Any, List[Dict[str, Any]]]] = {reason: {} for reason in REASONS}
+        for entry in ranked:
+            for form in {entry.get("simplified"), entry.get("traditional")} - {None, ""}:
+                self._by_word.setdefault(form, []).append(entry["id"])
+            for reason in REASONS:
+                for key in self._keys(entry, reason, pos_by_entry):
+                    postings[reason].setdefault(key, []).append(entry)
+
+        quota = -(-per_entry // len(REASONS))
+        self.distractors: Dict[int, List[Tuple[int, str]]] = {}
+        for entry in ranked:
+            by_reason = [self._candidates(entry, reason, postings[reason], pos_by_entry, quota) for reason in REASONS]
+            picked: List[Tuple[int, str]] = []
+            seen = {entry.get("simplified")}
+            for round_ in range(quota):
+                for reason, candidates in zip(REASONS, by_reason):
+                    if round_ < len(candidates) and candidates[round_]["simplified"] not in seen:
+                        seen.add(candidates[round_]["simplified"])
+                        picked.append((candidates[round_]["id"], reason))
+            self.distractors[entry["id"]] = picked[:per_entry]
+
+    @staticmethod
+    def _keys(entry: Dict[str, Any], reason: str, pos_by_entry: Dict[int, set]) -> set:
+        if reason == SHARED_CHARACTER:
+            return set(entry.get("simplified") or "") | set(entry.get("traditional") or "")
+        if reason == SIMILAR_PINYIN:
+            return {_toneless(entry["pinyin"])} if entry.get("pinyin") else set()
+        if reason == SAME_RADICAL:
+            return {entry["radical"]} if entry.get("radical") else set()
+        hsk = entry.get("hsk_level")
+        return {(hsk, pos) for pos in pos_by_entry.get(entry["id"], ())} if hsk else set()
+
+    def _candidates(self, entry: Dict[str, Any], reason: str, postings: Dict[Any, List[Dict[str, Any]]],
+                    pos_by_entry: Dict[int, set], quota: int) -> List[Dict[str, Any]]:
+        found: Dict[int, Dict[str, Any]] = {}
+        for key in self._keys(entry, reason, pos_by_entry):
+            taken = 0
+            # Posting lists are in rank order, so a short scan finds the most common candidates
+            for other in postings.get(key, ()):
+                if taken >= quota * 2:
+                    break
+                if other["simplified"] == entry.get("simplified") or other.get("traditional") == entry.get("traditional"):
+                    continue
+                if reason == SIMILAR_PINYIN and other.get("pinyin") == entry.get("pinyin"):
+                    continue
+                found[other["id"]] = other
+                taken += 1
+        length = len(entry.get("simplified") or "")
+        return sorted(found.values(), key=lambda other: (abs(len(other["simplified"]) - length), rank_key(other)))
+
+    def entry_for(self, word: str) -> Dict[str, Any] | None:
+        """The most common entry with this headword in either script."""
+        ids = self._by_word.get(word)
+        return self.entries[ids[0]] if ids else None
+
+    def for_word(self, word: str, script: str = "simplified", n: int = MULTIPLE_CHOICE_OPTIONS - 1) -> List[Dict[str, Any]]:
+        """Up to n distractors for a word, distinct as written in the script."""
+        entry = self.entry_for(word)
+        if entry is None:
+            return []
+        seen = {entry.get(script) or entry["simplified"]}
+        result = []
+        for other_id, reason in self.distractors[entry["id"]]:
+            other = self.entries[other_id]
+            form = other.get(script) or other["simplified"]
+            if form in seen:
+                continue
+            seen.add(form)
+            result.append({"id": other_id, "word": form, "pinyin": other.get("pinyin"),
+                           "definition": other.get("english_definitions"), "reason": reason})
+            if len(result) == n:
+                break
+        return result
+
+    def multiple_choice(self, word: str, script: str, rng: random.Random) -> Tuple[List[str], int] | None:
+        """Options for a question on the word, with the word (in the script) at a random index."""
+        entry = self.entry_for(word)
+        distractors = self.for_word(word, script)
+        if entry is None or len(distractors) < MULTIPLE_CHOICE_OPTIONS - 1:
+            return None
+        options = [d["word"] for d in distractors]
+        answer = rng.randrange(MULTIPLE_CHOICE_OPTIONS)
+        options.insert(answer, entry.get(script) or entry["simplified"])
+        return options, answer
+
+
+def question_rng(word: str, script: str, variant: int | None = None) -> random.Random:
+    """Seeded per word, so the same request gets the same options (and agent cache key)."""
+    return random.Random(f"{word}:{script}:{variant or 0}")
+
+
+def repair_options(exercise: Dict[str, Any], words: List[str], script: str, index: DistractorIndex) -> bool:
+    """
+    Replace broken multiple-choice options with local ones, in place.
+
+    A question's options are broken when there are not exactly 4, one
+    repeats, or the answer index is out of range. The question is matched
+    to the requested word it mentions. Returns whether every broken
+    question could be repaired.
+    """
+    if exercise.get("exercise_type") != "multiple_choice":
+        return False
+    questions, answers = exercise.get("questions") or [], exercise.get("answers") or []
+    if len(answers) != len(questions):
+        return False
+    repaired = True
+    for i, question in enumerate(questions):
+        options = question.get("options") or []
+        answer = answers[i]
+        if (len(options) == MULTIPLE_CHOICE_OPTIONS and len(set(options)) == len(options)
+                and isinstance(answer, int) and 0 <= answer < MULTIPLE_CHOICE_OPTIONS):
+            continue
+        text = " ".join([question.get("text") or ""] + options)
+        word = next((w for w in words if w in text or (index.entry_for(w) or {}).get(script, w) in text), None)
+        choice = index.multiple_choice(word, script, question_rng(word, script)) if word is not None else None
+        if choice is None:
+            repaired = False
+            continue
+        question["options"], answers[i] = choice
+    return repaired
+
+
+class DistractorsIndex(BackgroundIndex[DistractorIndex]):
+    name = "distractors"
+
+    def build_index(self, entries: List[Dict[str, Any]]) -> DistractorIndex:
+        return DistractorIndex(entries, load_table("part_of_speech", "id,entry_id,pos", self._client_factory))
+
+
+def get_distractors(client_factory: Callable[[], Any]) -> DistractorsIndex:
+    return get_index(DistractorsIndex, client_factory)
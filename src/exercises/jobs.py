@@ -0,0 +1,240 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+import uuid
+from collections import deque
+from enum import Enum
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Tuple
+
+from src.config import EXERCISE_JOB_CONCURRENCY, EXERCISE_JOB_QUEUE_SIZE, EXERCISE_JOB_TTL_S
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobPriority(str, Enum):
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
+
+_PRIORITY_ORDER = {JobPriority.HIGH: 0, JobPriority.NORMAL: 1, JobPriority.LOW: 2}
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at its limit."""
+
+
+class Job:
+    """One exercise generation, from submission to its result or error."""
+
+    def __init__(self, params: Dict[str, Any], priority: JobPriority):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.priority = priority
+        self.status = QUEUED
+        self.result: Dict[str, Any] | None = None
+        self.error: str | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        # Identifies identical jobs, set by JobQueue.submit
+        self.key: str | None = None
+        # Every status change and generation stage, in order, replayed to each watcher.
+        # draft_delta pieces go to current watchers only; the stored history keeps the
+        # complete draft event, and a draft still being written as one accumulated piece
+        self.events: List[Tuple[str, Dict[str, Any]]] = [("status", self.snapshot())]
+        self._draft: str | None = None
+        # Events not yet sent to each watcher, by id()
+        self._watchers: Dict[int, Deque[Tuple[str, Dict[str, Any]]]] = {}
+        # Set and replaced on every new event, waking everyone watching
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def emit(self, event: str, data: Dict[str, Any]) -> None:
+        if event == "draft_delta":
+            self._draft = (self._draft or "") + data["text"]
+        else:
+            if event == "draft":
+                self._draft = None
+            self.events.append((event, data))
+        for pending in self._watchers.values():
+            pending.append((event, data))
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def _set_status(self, status: str) -> None:
+        self.status = status
+        self.emit("status", self.snapshot())
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = {"job_id": self.id, "status": self.status, "priority": self.priority.value}
+        if self.status == DONE:
+            snapshot["result"] = self.result
+        elif self.status == FAILED:
+            snapshot["error"] = self.error
+        return snapshot
+
+    async def wait(self) -> None:
+        while not self.finished:
+            await self._changed.wait()
+
+    async def updates(self) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Every event so far, then each new one as it happens, until the job finishes.
+
+        A draft that is still being written is replayed as one draft_delta
+        with the text so far; finished drafts as their draft event.
+        """
+        pending = deque(self.events)
+        if self._draft is not None and not self.finished:
+            pending.append(("draft_delta", {"text": self._draft}))
+        self._watchers[id(pending)] = pending
+        try:
+            while True:
+                changed = self._changed
+                while pending:
+                    yield pending.popleft()
+                if self.finished:
+                    return
+                await changed.wait()
+        finally:
+            del self._watchers[id(pending)]
+
+
+class JobQueue:
+    """
+    Exercise generation jobs, run by a fixed number of worker tasks in priority order.
+
+    At most `concurrency` jobs call the model at once, however many requests
+    arrive, and at most `max_queued` wait for a worker. Beyond that, submit()
+    raises JobQueueFull so the API can turn new work away instead of
+    letting it pile up. Finished jobs are kept for `ttl_s` for polling.
+    A job runs as `run(**params, on_event=job.emit)`, so the stages it
+    reports are streamed to whoever is watching it.
+
+    Submitting the same params as a job that has not finished returns that
+    job, so identical requests share one generation. Its priority is raised
+    if the new submission's is higher.
+    """
+
+    def __init__(self, run: Callable[..., Awaitable[Dict[str, Any]]], concurrency: int = EXERCISE_JOB_CONCURRENCY,
+                 max_queued: int = EXERCISE_JOB_QUEUE_SIZE, ttl_s: float = EXERCISE_JOB_TTL_S):
+        self._run = run
+        self.concurrency = concurrency
+        self.ttl_s = ttl_s
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue(maxsize=max_queued)
+        # FIFO within a priority
+        self._sequence = itertools.count()
+        self._jobs: Dict[str, Job] = {}
+        # Unfinished jobs by their params
+        self._inflight: Dict[str, Job] = {}
+        self._workers: List[asyncio.Task] = []
+
+    def submit(self, params: Dict[str, Any], priority: JobPriority = JobPriority.NORMAL) -> Job:
+        self._expire()
+        key = json.dumps(params, sort_keys=True, ensure_ascii=False)
+        job = self._inflight.get(key)
+        if job is not None:
+            metrics.incr("exercise_jobs.coalesced")
+            if job.status == QUEUED and _PRIORITY_ORDER[priority] < _PRIORITY_ORDER[job.priority]:
+                # Queued again at the new priority; workers skip whichever entry comes second
+                try:
+                    self._queue.put_nowait((_PRIORITY_ORDER[priority], next(self._sequence), job))
+                    job.priority = priority
+                except asyncio.QueueFull:
+                    pass
+            return job
+
+        job = Job(params, priority)
+        try:
+            self._queue.put_nowait((_PRIORITY_ORDER[priority], next(self._sequence), job))
+        except asyncio.QueueFull:
+            metrics.incr("exercise_jobs.rejected")
+            raise JobQueueFull()
+        self._jobs[job.id] = job
+        self._inflight[key] = job
+        job.key = key
+        metrics.incr("exercise_jobs.submitted")
+        metrics.set_gauge("exercise_jobs.queued", self._queue.qsize())
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl_s
+        for job_id in [i for i, job in self._jobs.items() if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job = await self._queue.get()
+            metrics.set_gauge("exercise_jobs.queued", self._queue.qsize())
+            if job.status != QUEUED:
+                continue
+            job.started_at = time.time()
+            metrics.observe("exercise_jobs.wait_ms", (job.started_at - job.created_at) * 1000)
+            job._set_status(RUNNING)
+            try:
+                job.result = await self._run(**job.params, on_event=job.emit)
+            except asyncio.CancelledError:
+                job.error = "Cancelled by shutdown"
+                job.finished_at = time.time()
+                job._set_status(FAILED)
+                raise
+            except Exception as e:
+                logger.warning("Exercise job %s failed: %s", job.id, e)
+                job.error = str(e)
+                job.finished_at = time.time()
+                metrics.incr("exercise_jobs.failed")
+                job._set_status(FAILED)
+            else:
+                job.finished_at = time.time()
+                metrics.incr("exercise_jobs.completed")
+                job._set_status(DONE)
+            finally:
+                self._inflight.pop(job.key, None)
+            metrics.observe("exercise_jobs.run_ms", (job.finished_at - job.started_at) * 1000)
+
+    def start(self) -> None:
+        """Start the workers (needs a running event loop)."""
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+_job_queue: JobQueue | None = None
+
+
+def get_job_queue() -> JobQueue | None:
+    return _job_queue
+
+
+def start_job_queue(run: Callable[..., Awaitable[Dict[str, Any]]]) -> JobQueue:
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(run)
+        _job_queue.start()
+    return _job_queue
+
+
+async def stop_job_queue() -> None:
+    global _job_queue
+    if _job_queue is not None:
+        await _job_queue.stop()
+        _job_queue = None
@@ -0,0 +1,256 @@
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.agents import batch_formatter, exercise_generator, evaluator, formatter
+from src.agents.runner import run_agent, run_agent_streamed
+from src.db.connection import get_connection
+from src.exercises.batching import MicroBatcher
+from src.exercises.distractors import DistractorIndex, get_distractors, question_rng, repair_options
+from src.exercises.pool import get_exercise_pool, merge_exercises
+from src.exercises.templates import build_exercise
+from src.exercises.validator import EXERCISE_TYPES, INCONCLUSIVE, INVALID, VALID, get_script_table, validate_exercise
+from src.utils.agent_trace import count, exercise_trace
+
+logger = logging.getLogger(__name__)
+
+# on_event(event, data): progress of a generation, for streaming to the client
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+
+def _ignore(event: str, data: Dict[str, Any]) -> None:
+    pass
+
+
+def _evaluator_found_issues(evaluation: str) -> bool:
+    evaluation = evaluation.lower()
+    return "issues" in evaluation or "mistake" in evaluation
+
+
+def _request_lines(words: List[str], exercise_types: List[str], character_type: str) -> str:
+    return f"""
+            Create an exercise using these words: {', '.join(words)}
+            Exercise type(s): {', '.join(exercise_types)}
+            Character type: {character_type}
+            """
+
+
+async def _generate(prompt: str, on_event: EventCallback) -> Dict[str, Any]:
+    """Generator then formatter: the exercise as text and as the structured frontend payload."""
+    if on_event is _ignore:
+        generator_result = await run_agent(exercise_generator, prompt)
+    else:
+        generator_result = await run_agent_streamed(
+            exercise_generator, prompt, lambda delta: on_event("draft_delta", {"text": delta}))
+    on_event("draft", {"text": generator_result.final_output})
+    formatter_result = await run_agent(
+        formatter,
+        f"Format this approved exercise for the frontend: {generator_result.final_output}"
+    )
+    exercise = formatter_result.final_output.model_dump()
+    on_event("formatted", exercise)
+    return {"text": generator_result.final_output, "exercise": exercise}
+
+
+async def _write_questions(words: List[str], character_type: str, choices: List[Tuple[List[str], int]],
+                           on_event: EventCallback) -> Dict[str, Any]:
+    """A multiple-choice exercise on locally chosen options, with only the questions written by the model."""
+    lines = "\n".join(
+        f"{i}. {word}: options {json.dumps(options, ensure_ascii=False)}, correct option {answer}"
+        for i, (word, (options, answer)) in enumerate(zip(words, choices), 1)
+    )
+    formatter_result = await run_agent(formatter, f"""
+            Write a multiple choice exercise with one question per word below, in this order.
+            Each question tests the meaning of its word and uses exactly the options given,
+            in the given order, with the given correct option.
+            Character type: {character_type}
+            {lines}
+            """)
+    exercise = formatter_result.final_output.model_dump()
+    # The options are ours, whatever the model wrote
+    if exercise.get("exercise_type") == "multiple_choice" and len(exercise["questions"]) == len(words):
+        for question, (options, _) in zip(exercise["questions"], choices):
+            question["options"] = list(options)
+        exercise["answers"] = [answer for _, answer in choices]
+    on_event("formatted", exercise)
+    return exercise
+
+
+def _validate(exercise: Dict[str, Any], words: List[str], character_type: str, exercise_types: List[str],
+              table, distractors: DistractorIndex | None, on_event: EventCallback):
+    """validate_exercise, with broken multiple-choice options repaired locally first."""
+    validation = validate_exercise(exercise, words, character_type, exercise_types, table)
+    if (validation.status == INVALID and distractors is not None
+            and repair_options(exercise, words, character_type, distractors)):
+        count("options_repaired")
+        validation = validate_exercise(exercise, words, character_type, exercise_types, table)
+    count(f"validation.{validation.status}")
+    on_event("validation", {"status": validation.status, "issues": validation.issues})
+    return validation
+
+
+async def generate_checked(words: List[str], exercise_types: List[str], character_type: str,
+                           variant: int | None = None, on_event: EventCallback = _ignore) -> Tuple[Dict[str, Any], bool]:
+    """
+    Generate an exercise, check it, and regenerate it once if it has issues.
+
+    The formatted exercise is checked locally first (see validate_exercise).
+    The evaluator agent is only asked when the local checks are inconclusive,
+    so a well-formed exercise takes two model calls instead of three.
+    Multiple-choice options come from the distractor index when it knows
+    every word, leaving one model call to write the questions. Broken
+    options are repaired from the index instead of regenerated.
+    `variant` asks for a different exercise for the same words (each
+    variant is cached separately). Each stage is reported to `on_event`
+    as it completes, and the generator's text as it is written. Returns
+    the exercise and whether it passed its checks.
+    """
+    prompt = _request_lines(words, exercise_types, character_type)
+    if variant:
+        prompt += f"Variation: {variant}\n"
+    table = get_script_table(get_connection).get()
+    distractors = get_distractors(get_connection).get()
+
+    if distractors is not None and exercise_types == ["multiple choice"]:
+        choices = [distractors.multiple_choice(word, character_type, question_rng(word, character_type, variant))
+                   for word in words]
+        if all(choices):
+            count("local_options")
+            exercise = await _write_questions(words, character_type, choices, on_event)
+            if _validate(exercise, words, character_type, exercise_types, table, distractors, on_event).status == VALID:
+                return exercise, True
+
+    generated = await _generate(prompt, on_event)
+    validation = _validate(generated["exercise"], words, character_type, exercise_types, table, distractors, on_event)
+
+    if validation.status == INCONCLUSIVE:
+        evaluator_result = await run_agent(evaluator, f"Evaluate this exercise: {generated['text']}")
+        feedback = evaluator_result.final_output if _evaluator_found_issues(evaluator_result.final_output) else None
+        on_event("evaluation", {"issues_found": feedback is not None, "text": evaluator_result.final_output})
+    elif validation.status == INVALID:
+        feedback = "; ".join(validation.issues)
+    else:
+        feedback = None
+
+    if feedback is None:
+        return generated["exercise"], True
+
+    count("regenerations")
+    on_event("regenerating", {"issues": feedback})
+    generated = await _generate(f"{prompt}\nFix these issues: {feedback}", on_event)
+    revalidation = _validate(generated["exercise"], words, character_type, exercise_types, table, distractors, on_event)
+    if revalidation.status == INVALID:
+        # Returned anyway rather than looping on the model
+        count("validation.invalid_after_regeneration")
+        logger.warning("Regenerated exercise still has issues: %s", "; ".join(revalidation.issues))
+    return generated["exercise"], revalidation.status == VALID
+
+
+async def generate_batch(items: List[Dict[str, Any]],
+                         on_events: List[EventCallback]) -> List[Tuple[Dict[str, Any], bool]]:
+    """
+    Several generate_checked calls for the price of one generator and one formatter call.
+
+    The generator writes all the exercises in one response, under numbered
+    headings, and the batch formatter splits them into one exercise each.
+    Exercises that pass validation are returned as is. The rest (or all of
+    them, if the formatter returns the wrong number) go through
+    generate_checked on their own.
+    """
+    sections = "\n".join(
+        f"Exercise {i}:" + _request_lines(item["words"], item["exercise_types"], item["character_type"])
+        for i, item in enumerate(items, 1)
+    )
+    prompt = (f"Create {len(items)} separate exercises, one for each request below. "
+              f"Start each exercise with its heading, e.g. \"Exercise 1:\".\n{sections}")
+    generator_result = await run_agent(exercise_generator, prompt)
+    for on_event in on_events:
+        on_event("batched", {"size": len(items)})
+    formatter_result = await run_agent(
+        batch_formatter,
+        f"Format these approved exercises for the frontend: {generator_result.final_output}"
+    )
+    exercises = [exercise.model_dump() for exercise in formatter_result.final_output.exercises]
+    if len(exercises) != len(items):
+        count("batch_fallbacks", len(items))
+        logger.warning("Batch formatter returned %d exercises for %d requests", len(exercises), len(items))
+        exercises = [None] * len(items)
+
+    table = get_script_table(get_connection).get()
+    distractors = get_distractors(get_connection).get()
+    results: List[Tuple[Dict[str, Any], bool] | None] = []
+    for item, exercise, on_event in zip(items, exercises, on_events):
+        if exercise is None:
+            results.append(None)
+            continue
+        on_event("formatted", exercise)
+        validation = _validate(exercise, item["words"], item["character_type"], item["exercise_types"], table,
+                               distractors, on_event)
+        results.append((exercise, True) if validation.status == VALID else None)
+
+    retry = [i for i, result in enumerate(results) if result is None]
+    if retry:
+        count("batch_retries", len(retry))
+        retried = await asyncio.gather(*(generate_checked(**items[i], on_event=on_events[i]) for i in retry))
+        for i, result in zip(retry, retried):
+            results[i] = result
+    return results
+
+
+_batcher = MicroBatcher(generate_checked, generate_batch)
+
+
+async def _generate_live(words: List[str], exercise_types: List[str], character_type: str,
+                         on_event: EventCallback) -> Dict[str, Any]:
+    item = {"words": words, "exercise_types": exercise_types, "character_type": character_type}
+    return (await _batcher.submit(item, on_event))[0]
+
+
+async def generate_exercise(words: List[str], exercise_types: List[str], character_type: str,
+                            engine: str = "llm", on_event: EventCallback = _ignore) -> Dict[str, Any]:
+    """
+    An exercise for the words: pooled exercises for hot words, generated live for the rest.
+
+    The "template" engine builds the exercise from dictionary data instead
+    (see build_exercise), and only uses the model when it cannot.
+
+    Live generation only covers the words the pool has nothing for, and is
+    asked for the exercise type the pooled part uses so the two can be
+    merged. If the model answers with the other type anyway, the pooled
+    exercises go back and the whole request is generated live. Live
+    generations from concurrent requests are batched together (see
+    generate_batch). The agent calls made for the request are traced
+    together (see exercise_trace).
+    """
+    with exercise_trace(source="request", engine=engine, words=len(words), character_type=character_type):
+        return await _generate_exercise(words, exercise_types, character_type, engine, on_event)
+
+
+async def _generate_exercise(words: List[str], exercise_types: List[str], character_type: str, engine: str,
+                             on_event: EventCallback) -> Dict[str, Any]:
+
+    if engine == "template":
+        exercise = await asyncio.to_thread(build_exercise, words, exercise_types, character_type)
+        if exercise is not None:
+            count("template_engine")
+            on_event("formatted", exercise)
+            return exercise
+        count("template_engine_fallbacks")
+
+    pool = get_exercise_pool()
+    if pool is None:
+        return await _generate_live(words, exercise_types, character_type, on_event)
+
+    exercise_type, pooled, cold = pool.take(words, exercise_types, character_type)
+    if not pooled:
+        return await _generate_live(words, exercise_types, character_type, on_event)
+    on_event("pooled", {"words": [word for word in words if word not in cold], "exercise_type": exercise_type})
+    if not cold:
+        return merge_exercises([exercise for _, exercise in pooled])
+
+    live = await _generate_live(cold, [exercise_type], character_type, on_event)
+    if live.get("exercise_type") != EXERCISE_TYPES[exercise_type]:
+        pool.put_back(pooled)
+        return await _generate_live(words, exercise_types, character_type, on_event)
+    return merge_exercises([exercise for _, exercise in pooled] + [live])
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Tuple
+
+from src.config import (EXERCISE_POOL_CONCURRENCY, EXERCISE_POOL_DEPTH, EXERCISE_POOL_MAX_HSK, EXERCISE_POOL_SCRIPTS,
+                        EXERCISE_POOL_WORDS)
+from src.exercises.validator import EXERCISE_TYPES, SCRIPTS
+from src.search.dictionary_index import load_entries, rank_key
+from src.utils.agent_trace import exercise_trace
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# (headword in the script, request exercise type, script)
+PoolKey = Tuple[str, str, str]
+# generate(words, exercise_types, script, variant) -> (exercise, passed its checks)
+Generate = Callable[[List[str], List[str], str, int], Awaitable[Tuple[Dict[str, Any], bool]]]
+
+
+def hot_entries(entries: List[Dict[str, Any]], count: int = EXERCISE_POOL_WORDS,
+                max_hsk: int = EXERCISE_POOL_MAX_HSK) -> List[Dict[str, Any]]:
+    """The most frequent words up to an HSK level, the ones exercises are requested for most."""
+    eligible = [e for e in entries if e.get("hsk_level") and e["hsk_level"] <= max_hsk]
+    return sorted(eligible, key=rank_key)[:count]
+
+
+def merge_exercises(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """One exercise from several of the same type, questions and answers in order."""
+    return {
+        "exercise_type": parts[0]["exercise_type"],
+        "questions": [q for part in parts for q in part["questions"]],
+        "answers": [a for part in parts for a in part["answers"]],
+    }
+
+
+class ExercisePool:
+    """
+    Ready single-word exercises for the hot vocabulary, per exercise type and script.
+
+    Taking an exercise queues a replacement, and a few worker tasks generate
+    replacements in the background until every key holds `depth` exercises.
+    Only exercises that passed their checks are kept. Words outside the hot
+    vocabulary have no pool and are always generated live.
+    """
+
+    def __init__(self, generate: Generate, depth: int = EXERCISE_POOL_DEPTH,
+                 concurrency: int = EXERCISE_POOL_CONCURRENCY):
+        self._generate = generate
+        self.depth = depth
+        self.concurrency = concurrency
+        self._items: Dict[PoolKey, Deque[Dict[str, Any]]] = {}
+        # Either script's form of a hot word -> its headword in each script
+        self._aliases: Dict[str, Dict[str, str]] = {script: {} for script in SCRIPTS}
+        self._pending: Dict[PoolKey, int] = {}
+        # Each replacement asks for a new variant, so cached generations are not served twice
+        self._variants: Dict[PoolKey, int] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+
+    def add_words(self, entries: List[Dict[str, Any]], scripts: List[str] = EXERCISE_POOL_SCRIPTS) -> None:
+        for entry in entries:
+            for script in scripts:
+                headword = entry.get(script) or entry["simplified"]
+                for form in (entry.get("simplified"), entry.get("traditional")):
+                    if form:
+                        self._aliases[script].setdefault(form, headword)
+                for exercise_type in EXERCISE_TYPES:
+                    self._items.setdefault((headword, exercise_type, script), deque())
+
+    def key(self, word: str, exercise_type: str, script: str) -> PoolKey | None:
+        headword = self._aliases.get(script, {}).get(word)
+        return (headword, exercise_type, script) if headword is not None else None
+
+    @property
+    def size(self) -> int:
+        return sum(len(items) for items in self._items.values())
+
+    def take(self, words: List[str], exercise_types: List[str],
+             script: str) -> Tuple[str, List[Tuple[PoolKey, Dict[str, Any]]], List[str]]:
+        """
+        Pooled exercises for as many of the words as possible, all of one type.
+
+        Of the requested types, the one covering the most words is used.
+        Returns that type, the (key, exercise) pairs taken, and the words
+        left to generate live.
+        """
+        types = sorted(t for t in set(exercise_types) if t in EXERCISE_TYPES)
+        if not types:
+            return exercise_types[0], [], list(words)
+
+        def stocked(exercise_type: str) -> int:
+            keys = [self.key(word, exercise_type, script) for word in words]
+            return sum(1 for key in keys if key is not None and self._items[key])
+
+        exercise_type = max(types, key=stocked)
+        pooled, cold = [], []
+        for word in words:
+            key = self.key(word, exercise_type, script)
+            if key is not None and self._items[key]:
+                pooled.append((key, self._items[key].popleft()))
+            else:
+                cold.append(word)
+            if key is not None:
+                self._refill(key)
+        metrics.incr("exercise_pool.hits", len(pooled))
+        metrics.incr("exercise_pool.misses", len(cold))
+        metrics.set_gauge("exercise_pool.items", self.size)
+        return exercise_type, pooled, cold
+
+    def put_back(self, pooled: List[Tuple[PoolKey, Dict[str, Any]]]) -> None:
+        """Return taken exercises that ended up unused, to be served first."""
+        for key, exercise in reversed(pooled):
+            self._items[key].appendleft(exercise)
+        metrics.set_gauge("exercise_pool.items", self.size)
+
+    def _refill(self, key: PoolKey) -> None:
+        missing = self.depth - len(self._items[key]) - self._pending.get(key, 0)
+        for _ in range(missing):
+            self._pending[key] = self._pending.get(key, 0) + 1
+            self._queue.put_nowait(key)
+
+    async def _worker(self) -> None:
+        while True:
+            key = await self._queue.get()
+            headword, exercise_type, script = key
+            variant = self._variants.get(key, 0)
+            self._variants[key] = variant + 1
+            try:
+                with exercise_trace(source="pool", exercise_type=exercise_type, character_type=script):
+                    exercise, passed = await self._generate([headword], [exercise_type], script, variant)
+            except Exception as e:
+                logger.warning("Pre-generating a %s exercise for %s failed: %s", exercise_type, headword, e)
+                exercise, passed = None, False
+            finally:
+                self._pending[key] -= 1
+            # Anything that failed its checks is dropped; the next take() asks again
+            if passed and exercise.get("exercise_type") == EXERCISE_TYPES[exercise_type]:
+                self._items[key].append(exercise)
+                metrics.incr("exercise_pool.generated")
+                metrics.set_gauge("exercise_pool.items", self.size)
+            else:
+                metrics.incr("exercise_pool.rejected")
+
+    def start(self) -> None:
+        """Fill every key up to `depth` and keep it there (needs a running event loop)."""
+        for key in self._items:
+            self._refill(key)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+_pool: ExercisePool | None = None
+_starting: asyncio.Task | None = None
+
+
+def get_exercise_pool() -> ExercisePool | None:
+    """The running pool, or None when it is disabled or still loading its vocabulary."""
+    return _pool
+
+
+def start_exercise_pool(generate: Generate, client_factory: Callable[[], Any]) -> None:
+    """Load the hot vocabulary and start filling the pool, without holding up the caller."""
+    global _starting
+    if EXERCISE_POOL_WORDS <= 0 or _starting is not None:
+        return
+
+    async def start() -> None:
+        global _pool
+        try:
+            entries = await asyncio.to_thread(load_entries, client_factory)
+        except Exception as e:
+            logger.warning("Exercise pool not started; the vocabulary could not be loaded: %s", e)
+            return
+        pool = ExercisePool(generate)
+        pool.add_words(hot_entries(entries))
+        pool.start()
+        _pool = pool
+
+    _starting = asyncio.create_task(start())
+
+
+async def stop_exercise_pool() -> None:
+    global _pool, _starting
+    if _starting is not None:
+        _starting.cancel()
+        await asyncio.gather(_starting, return_exceptions=True)
+        _starting = None
+    if _pool is not None:
+        await _pool.stop()
+        _pool = None
@@ -0,0 +1,112 @@
+import json
+import os
+import random
+from typing import Any, Callable, Dict, List
+
+from src.db.connection import get_connection
+from src.exercises.distractors import DistractorIndex, get_distractors
+from src.exercises.validator import EXERCISE_TYPES, INVALID, get_script_table, validate_exercise
+from src.exercises.vocabulary import word_details
+
+_CORPUS_PATH = os.path.join(os.path.dirname(__file__), "sentence_templates.json")
+BLANK = "_____"
+# Used for words without a part of speech that has templates
+_DEFINITION_TEMPLATE = "Write the word that means “{gloss}”: " + BLANK
+
+
+class TemplateCorpus:
+    """
+    Sentence templates with a {word} slot, indexed by part of speech and classifier use.
+
+    Each template is written in both scripts. Templates with a {classifier}
+    slot are only used for nouns that have one.
+    """
+
+    def __init__(self, corpus: Dict[str, Any]):
+        self.pos_aliases: Dict[str, str] = corpus["pos_aliases"]
+        self._templates: Dict[tuple, List[Dict[str, str]]] = {}
+        for template in corpus["templates"]:
+            self._templates.setdefault((template["pos"], bool(template.get("classifier"))), []).append(template)
+
+    def candidates(self, details: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Templates that fit a word, given its parts of speech and classifiers."""
+        found = []
+        for pos in dict.fromkeys(self.pos_aliases.get(p.lower()) for p in details.get("parts_of_speech") or []):
+            if pos is None:
+                continue
+            found.extend(self._templates.get((pos, False), []))
+            if details.get("classifiers"):
+                found.extend(self._templates.get((pos, True), []))
+        return found
+
+
+_corpus: TemplateCorpus | None = None
+
+
+def get_corpus() -> TemplateCorpus:
+    global _corpus
+    if _corpus is None:
+        with open(_CORPUS_PATH, encoding="utf-8") as f:
+            _corpus = TemplateCorpus(json.load(f))
+    return _corpus
+
+
+def _gloss(details: Dict[str, Any]) -> str:
+    return (details.get("definition") or "").split(";")[0].strip()
+
+
+def _fill_in_blank_question(details: Dict[str, Any], script: str, corpus: TemplateCorpus,
+                            rng: random.Random) -> Dict[str, str]:
+    word = details[script]
+    templates = [t for t in corpus.candidates(details) if word not in t[script].replace("{word}", "")]
+    if not templates:
+        return {"text": _DEFINITION_TEMPLATE.format(gloss=_gloss(details))}
+    template = rng.choice(templates)
+    classifier = rng.choice(details["classifiers"]) if details.get("classifiers") else ""
+    sentence = template[script].replace("{classifier}", classifier).replace("{word}", BLANK)
+    return {"text": f"{sentence} ({_gloss(details)})"}
+
+
+def build_exercise(words: List[str], exercise_types: List[str], script: str, rng: random.Random | None = None,
+                   client_factory: Callable[[], Any] = get_connection,
+                   distractors: DistractorIndex | None = None) -> Dict[str, Any] | None:
+    """
+    An exercise assembled from dictionary data and sentence templates, without a model.
+
+    Fill in the blank puts each word in a template for its part of speech,
+    with its first meaning as a hint. Words without a matching template are
+    asked for by meaning alone. Multiple choice asks which word has a
+    meaning, with options from the distractor index. Returns None when a
+    word is not in the dictionary, or multiple choice was asked for but
+    the distractors are missing, so the caller can use the model instead.
+    """
+    rng = rng or random.Random()
+    details = word_details(words, client_factory)
+    if not all(d["found"] for d in details):
+        return None
+
+    if "fill in the blank" in exercise_types:
+        corpus = get_corpus()
+        exercise = {
+            "exercise_type": EXERCISE_TYPES["fill in the blank"],
+            "questions": [_fill_in_blank_question(d, script, corpus, rng) for d in details],
+            "answers": [d[script] for d in details],
+        }
+    elif "multiple choice" in exercise_types:
+        if distractors is None:
+            distractors = get_distractors(client_factory).get()
+        choices = [distractors.multiple_choice(d[script], script, rng) if distractors is not None else None
+                   for d in details]
+        if not all(choices):
+            return None
+        exercise = {
+            "exercise_type": EXERCISE_TYPES["multiple choice"],
+            "questions": [{"text": f"Which word means “{_gloss(d)}”?", "options": options}
+                          for d, (options, _) in zip(details, choices)],
+            "answers": [answer for _, answer in choices],
+        }
+    else:
+        return None
+
+    validation = validate_exercise(exercise, words, script, exercise_types, get_script_table(client_factory).get())
+    return None if validation.status == INVALID else exercise
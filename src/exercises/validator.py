@@ -0,0 +1,142 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Set
+
+from src.detection.input_detection import HANZI_RANGES
+from src.search.dictionary_index import BackgroundIndex, get_index
+
+VALID = "valid"
+INVALID = "invalid"
+# The structure is fine but something could not be checked locally
+INCONCLUSIVE = "inconclusive"
+
+SCRIPTS = ("simplified", "traditional")
+# Request exercise types -> the formatter's exercise_type
+EXERCISE_TYPES = {"fill in the blank": "fill_in_blank", "multiple choice": "multiple_choice"}
+MULTIPLE_CHOICE_OPTIONS = 4
+
+_blank = re.compile(r"_{3,}")
+_hanzi = re.compile(f"[{HANZI_RANGES}]")
+
+
+@dataclass
+class Validation:
+    status: str
+    issues: List[str] = field(default_factory=list)
+
+
+class ScriptTable:
+    """
+    Which characters belong to only one script, and every headword's form in each script.
+
+    A character is script-specific when it appears in that script's headwords
+    and never in the other's, so 車 is traditional-only while 好 is in both.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        chars: Dict[str, Set[str]] = {script: set() for script in SCRIPTS}
+        self.forms: Dict[str, Dict[str, Set[str]]] = {}
+        for entry in entries:
+            simplified, traditional = entry.get("simplified") or "", entry.get("traditional") or ""
+            chars["simplified"].update(simplified)
+            chars["traditional"].update(traditional)
+            for word in (simplified, traditional):
+                if word:
+                    forms = self.forms.setdefault(word, {script: set() for script in SCRIPTS})
+                    forms["simplified"].add(simplified or traditional)
+                    forms["traditional"].add(traditional or simplified)
+        self.only = {
+            "simplified": chars["simplified"] - chars["traditional"],
+            "traditional": chars["traditional"] - chars["simplified"],
+        }
+
+    def other_script_chars(self, text: str, script: str) -> List[str]:
+        """Characters in the text that only exist in the script other than `script`, in order of appearance."""
+        other = self.only["traditional" if script == "simplified" else "simplified"]
+        return list(dict.fromkeys(c for c in _hanzi.findall(text) if c in other))
+
+
+class ScriptIndex(BackgroundIndex[ScriptTable]):
+    name = "script"
+
+    def build_index(self, entries: List[Dict[str, Any]]) -> ScriptTable:
+        return ScriptTable(entries)
+
+
+def get_script_table(client_factory: Callable[[], Any]) -> ScriptIndex:
+    return get_index(ScriptIndex, client_factory)
+
+
+def _structure_issues(exercise: Dict[str, Any]) -> List[str]:
+    questions, answers = exercise.get("questions") or [], exercise.get("answers") or []
+    if not questions:
+        return ["The exercise has no questions"]
+    issues = []
+    if exercise.get("exercise_type") == "fill_in_blank":
+        blanks = sum(len(_blank.findall(q.get("text") or "")) for q in questions)
+        if blanks != len(answers):
+            issues.append(f"The questions have {blanks} blanks but there are {len(answers)} answers")
+        for i, q in enumerate(questions, 1):
+            if not _blank.search(q.get("text") or ""):
+                issues.append(f"Question {i} has no _____ blank")
+    else:
+        if len(answers) != len(questions):
+            issues.append(f"There are {len(questions)} questions but {len(answers)} answers")
+        for i, q in enumerate(questions, 1):
+            options = q.get("options") or []
+            if len(options) != MULTIPLE_CHOICE_OPTIONS:
+                issues.append(f"Question {i} has {len(options)} options instead of {MULTIPLE_CHOICE_OPTIONS}")
+            elif len(set(options)) != len(options):
+                issues.append(f"Question {i} repeats an option")
+        for i, answer in enumerate(answers, 1):
+            if not isinstance(answer, int) or not 0 <= answer < MULTIPLE_CHOICE_OPTIONS:
+                issues.append(f"Answer {i} ({answer!r}) is not an option index from 0 to {MULTIPLE_CHOICE_OPTIONS - 1}")
+    return issues
+
+
+def _exercise_text(exercise: Dict[str, Any]) -> str:
+    """Everything a learner sees, joined so a word can be searched for across it."""
+    parts = []
+    for q in exercise.get("questions") or []:
+        parts.append(q.get("text") or "")
+        parts.extend(q.get("options") or [])
+    if exercise.get("exercise_type") == "fill_in_blank":
+        parts.extend(str(a) for a in exercise.get("answers") or [])
+    return "\n".join(parts)
+
+
+def validate_exercise(exercise: Dict[str, Any], words: List[str], script: str, exercise_types: List[str],
+                      table: ScriptTable | None) -> Validation:
+    """
+    Check a formatted exercise against the request without calling a model.
+
+    Structure, word coverage and script are checked here. Anything found is
+    INVALID. If nothing is found but the script could not be checked (no
+    table yet, or a word the dictionary does not know), the result is
+    INCONCLUSIVE. Otherwise it is VALID. Whether the sentences make sense
+    is left to the model.
+    """
+    issues = []
+    allowed = {EXERCISE_TYPES[t] for t in exercise_types if t in EXERCISE_TYPES}
+    if allowed and exercise.get("exercise_type") not in allowed:
+        issues.append(f"The exercise is {exercise.get('exercise_type')}, not {' or '.join(sorted(allowed))}")
+    issues.extend(_structure_issues(exercise))
+
+    text = _exercise_text(exercise)
+    conclusive = table is not None
+    for word in words:
+        # The word may have been picked in the other script; either form counts
+        forms = {word} | (table.forms[word][script] if table is not None and word in table.forms else set())
+        if table is not None and word not in table.forms:
+            conclusive = False
+        if not any(form in text for form in forms):
+            issues.append(f"The word {word} is not used")
+
+    if table is not None:
+        wrong = table.other_script_chars(text, script)
+        if wrong:
+            issues.append(f"Uses characters that are not {script}: {''.join(wrong)}")
+
+    if issues:
+        return Validation(INVALID, issues)
+    return Validation(VALID if conclusive else INCONCLUSIVE)
@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.config import VOCABULARY_CACHE_SIZE
+from src.db.connection import format_results, get_connection
+from src.db.local import add_dictionary_listener
+from src.search.dictionary_index import rank_key
+from src.search.search import ENTRY_COLUMNS
+from src.utils.deadline import for_endpoint
+from src.utils.metrics import metrics
+
+# Characters with a meaning in PostgREST filter syntax; words containing them are never looked up
+_RESERVED = set(',()"')
+# Other readings of a word listed alongside its main one
+_MAX_OTHER_READINGS = 3
+
+_cache: "OrderedDict[str, Dict[str, Any] | None]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _clear_cache(old, new) -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+add_dictionary_listener(_clear_cache)
+
+
+def _details(word: str, entry: Dict[str, Any], others: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "word": word,
+        "found": True,
+        "simplified": entry["simplified"],
+        "traditional": entry["traditional"],
+        "pinyin": entry["pinyin"],
+        "definition": "; ".join(entry["meanings"]) if entry["meanings"] else entry["definition"],
+        "hsk_level": entry["hsk_level"]["combined"],
+        "parts_of_speech": entry["parts_of_speech"],
+        "classifiers": entry["classifiers"],
+        "other_readings": [
+            {"pinyin": other.get("pinyin"), "definition": other.get("english_definitions")}
+            for other in others[:_MAX_OTHER_READINGS]
+        ],
+    }
+
+
+def _lookup(words: List[str], client) -> Tuple[Dict[str, Dict[str, Any] | None], bool]:
+    """
+    Details for every word with one entry query and one batch of related-data queries.
+
+    Also returns False when related data was cut short by the deadline.
+    """
+    listed = ",".join(words)
+    rows = client.table("dictionaryentry").select(ENTRY_COLUMNS).or_(
+        f"simplified.in.({listed}),traditional.in.({listed})").execute().data or []
+
+    # A word can be several entries (好 hǎo and hào); the most common is the main reading
+    readings: Dict[str, List[Dict[str, Any]]] = {}
+    for word in words:
+        matches = sorted((r for r in rows if word in (r.get("simplified"), r.get("traditional"))), key=rank_key)
+        if matches:
+            readings[word] = matches
+
+    deadline = for_endpoint("vocabulary")
+    main_rows = list({matches[0]["id"]: matches[0] for matches in readings.values()}.values())
+    formatted = {entry["id"]: entry for entry in format_results(main_rows, deadline)}
+    details = {
+        word: _details(word, formatted[readings[word][0]["id"]], readings[word][1:]) if word in readings else None
+        for word in words
+    }
+    return details, not deadline.partial
+
+
+def word_details(words: List[str], client_factory: Callable[[], Any] = get_connection) -> List[Dict[str, Any]]:
+    """
+    Dictionary details for each word, in order: pinyin, definition, HSK level and classifiers.
+
+    Words are matched on either script. Words not seen recently are
+    resolved together in one query, and results are cached until the
+    dictionary changes. Words not in the dictionary come back with
+    `found: false`.
+    """
+    unique = list(dict.fromkeys(word.strip() for word in words if word.strip()))
+    with _cache_lock:
+        known = {}
+        for word in unique:
+            if word in _cache:
+                _cache.move_to_end(word)
+                known[word] = _cache[word]
+    missing = [word for word in unique if word not in known and not (_RESERVED & set(word))]
+    metrics.incr("vocabulary.cache_hits", len(known))
+    metrics.incr("vocabulary.cache_misses", len(missing))
+
+    if missing:
+        found, complete = _lookup(missing, client_factory())
+        # Incomplete related data is returned but not cached
+        if complete:
+            with _cache_lock:
+                _cache.update(found)
+                while len(_cache) > VOCABULARY_CACHE_SIZE:
+                    _cache.popitem(last=False)
+        known.update(found)
+
+    return [known.get(word.strip()) or {"word": word, "found": False} for word in words]
@@ -0,0 +1,52 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+# complete.json (complete-hsk-vocabulary) entry shape:
+# {
+#   "simplified": "爱", "radical": "爫", "frequency": 160,
+#   "level": ["new-1", "old-1"], "pos": ["v", "n"],
+#   "forms": [{
+#     "traditional": "愛",
+#     "transcriptions": {"pinyin": "ài", "numeric": "ai4", "wadegiles": "ai4", "bopomofo": "ㄞˋ", "romatzyh": "ay"},
+#     "meanings": ["to love", "to be fond of"],
+#     "classifiers": []
+#   }]
+# }
+
+_level_pattern = re.compile(r'^(old|new)-(\d+)')
+
+
+def extract_hsk_levels(levels: List[str]) -> Tuple[int | None, int | None]:
+    """Return the (old, new) HSK levels from tags like "old-3" and "new-7+", lowest level wins."""
+    old_level = None
+    new_level = None
+    for tag in levels or []:
+        match = _level_pattern.match(tag)
+        if not match:
+            continue
+        level = int(match.group(2))
+        if match.group(1) == "old":
+            old_level = level if old_level is None else min(old_level, level)
+        else:
+            new_level = level if new_level is None else min(new_level, level)
+    return old_level, new_level
+
+
+def extract_radical(entry: Dict[str, Any]) -> str | None:
+    return entry.get("radical") or None
+
+
+def extract_pos(entry: Dict[str, Any]) -> List[str]:
+    return [pos for pos in entry.get("pos", []) if pos]
+
+
+def extract_classifiers(form: Dict[str, Any]) -> List[str]:
+    return [classifier for classifier in form.get("classifiers", []) if classifier]
+
+
+def extract_transcriptions(form: Dict[str, Any]) -> List[Tuple[str, str]]:
+    return [(system, value) for system, value in form.get("transcriptions", {}).items() if value]
+
+
+def extract_meanings(form: Dict[str, Any]) -> List[str]:
+    return [meaning for meaning in form.get("meanings", []) if meaning]
@@ -0,0 +1,32 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Deque, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_shards(func: Callable[[T], R], shards: Iterable[T], workers: int = 1,
+               window: int | None = None) -> Iterator[R]:
+    """
+    Apply `func` to each shard in worker processes and yield results in input order.
+
+    At most `window` shards (default twice the worker count) are in flight, so
+    the input can be a stream and memory stays bounded. Results come back in
+    the order shards were produced regardless of which worker finishes first,
+    which keeps anything merged from them deterministic. With one worker the
+    shards are processed inline.
+    """
+    if workers <= 1:
+        yield from map(func, shards)
+        return
+
+    window = window or workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending: Deque = deque()
+        for shard in shards:
+            pending.append(pool.submit(func, shard))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
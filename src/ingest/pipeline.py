@@ -0,0 +1,321 @@
+import argparse
+import json
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from src.ingest.parallel import map_shards
+from src.ingest.extract import (
+    extract_hsk_levels, extract_radical, extract_pos, extract_classifiers, extract_transcriptions, extract_meanings,
+)
+
+INGEST_BATCH_SIZE = 500
+# Rows per Supabase request; keeps request bodies and `in.(...)` URLs reasonably small
+SUPABASE_CHUNK_SIZE = 500
+SUPABASE_LOOKUP_CHUNK_SIZE = 100
+# SQLite's default limit on bound variables is 999
+SQLITE_LOOKUP_CHUNK_SIZE = 900
+
+RELATED_INSERTS = {
+    "part_of_speech": ("pos", ("entry_id", "pos")),
+    "classifier": ("classifiers", ("entry_id", "classifier")),
+    "transcription": ("transcriptions", ("entry_id", "system", "value")),
+    "meaning": ("meanings", ("entry_id", "definition")),
+}
+
+
+def iter_source_entries(path: str, chunk_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the objects of a top-level JSON array (such as complete.json) one at a time.
+
+    Only one chunk plus the entry being decoded is held in memory. Array items
+    must be objects, so a decode that runs into the end of the buffer always
+    fails and is retried with more input instead of returning a truncated value.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+        started = False
+        while True:
+            # Skip whitespace, the opening bracket and separators
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == "," or (not started and buffer[pos] == "[")):
+                if buffer[pos] == "[":
+                    started = True
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == "]":
+                return
+            if pos < len(buffer):
+                try:
+                    entry, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    pos = end
+                    yield entry
+                    continue
+            if eof:
+                return
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+
+
+@dataclass
+class IngestBatch:
+    """Writes produced from one batch of source entries, matched to dictionaryentry ids."""
+    updates: List[Dict[str, Any]] = field(default_factory=list)
+    pos: List[Tuple[int, str]] = field(default_factory=list)
+    classifiers: List[Tuple[int, str]] = field(default_factory=list)
+    transcriptions: List[Tuple[int, str, str]] = field(default_factory=list)
+    meanings: List[Tuple[int, str]] = field(default_factory=list)
+    not_found: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def entry_ids(self) -> List[int]:
+        return [update["id"] for update in self.updates]
+
+
+def build_batch(entries: List[Dict[str, Any]], rows: List[Dict[str, Any]]) -> IngestBatch:
+    """
+    Transform source entries into updates and related-table rows.
+
+    `rows` are the dictionaryentry rows for the batch's headwords. A form is
+    matched on (simplified, traditional, numeric pinyin) first, so entries
+    with several readings keep their own data, then on (simplified, traditional).
+    """
+    by_reading: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+    for row in rows:
+        by_reading.setdefault((row["simplified"], row["traditional"], row.get("pinyin")), row)
+        by_reading.setdefault((row["simplified"], row["traditional"]), row)
+
+    batch = IngestBatch()
+    seen_ids = set()
+    for entry in entries:
+        simplified = entry["simplified"]
+        frequency = entry.get("frequency")
+        old_hsk_level, new_hsk_level = extract_hsk_levels(entry.get("level", []))
+        radical = extract_radical(entry)
+        pos_list = extract_pos(entry)
+
+        for form in entry.get("forms", []):
+            traditional = form.get("traditional", simplified)
+            numeric = form.get("transcriptions", {}).get("numeric")
+            row = by_reading.get((simplified, traditional, numeric)) or by_reading.get((simplified, traditional))
+            if row is None:
+                batch.not_found.append((simplified, traditional))
+                continue
+
+            entry_id = row["id"]
+            if entry_id not in seen_ids:
+                seen_ids.add(entry_id)
+                batch.updates.append({
+                    **row,
+                    "radical": radical,
+                    "old_hsk_level": old_hsk_level,
+                    "new_hsk_level": new_hsk_level,
+                    "hsk_level": old_hsk_level or new_hsk_level,
+                    "frequency_rank": frequency,
+                })
+            batch.pos.extend((entry_id, pos) for pos in pos_list)
+            batch.classifiers.extend((entry_id, c) for c in extract_classifiers(form))
+            batch.transcriptions.extend((entry_id, system, value) for system, value in extract_transcriptions(form))
+            batch.meanings.extend((entry_id, meaning) for meaning in extract_meanings(form))
+
+    # Forms that resolve to the same entry would otherwise insert duplicates
+    batch.pos = list(dict.fromkeys(batch.pos))
+    batch.classifiers = list(dict.fromkeys(batch.classifiers))
+    batch.transcriptions = list(dict.fromkeys(batch.transcriptions))
+    batch.meanings = list(dict.fromkeys(batch.meanings))
+    return batch
+
+
+def _chunks(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class SQLiteSink:
+    """Writes batches to the local SQLite dictionary, one transaction per batch."""
+
+    name = "sqlite"
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.conn.execute("PRAGMA foreign_keys = ON")
+
+    def lookup(self, simplified: List[str]) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        for chunk in _chunks(simplified, SQLITE_LOOKUP_CHUNK_SIZE):
+            cursor = self.conn.execute(
+                f"SELECT id, simplified, traditional, pinyin FROM dictionaryentry "
+                f"WHERE simplified IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            rows.extend({"id": r[0], "simplified": r[1], "traditional": r[2], "pinyin": r[3]} for r in cursor)
+        return rows
+
+    def write(self, batch: IngestBatch) -> None:
+        with self.conn:
+            self.conn.executemany(
+                """UPDATE dictionaryentry
+                   SET radical = ?, old_hsk_level = ?, new_hsk_level = ?,
+                       hsk_level = ?, frequency_rank = ?
+                   WHERE id = ?""",
+                [(u["radical"], u["old_hsk_level"], u["new_hsk_level"], u["hsk_level"], u["frequency_rank"], u["id"])
+                 for u in batch.updates],
+            )
+            # Replace rather than append related rows, so re-running a batch is harmless
+            entry_ids = [(entry_id,) for entry_id in batch.entry_ids]
+            for table, (attribute, columns) in RELATED_INSERTS.items():
+                self.conn.executemany(f"DELETE FROM {table} WHERE entry_id = ?", entry_ids)
+                self.conn.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    getattr(batch, attribute),
+                )
+
+
+class SupabaseSink:
+    """
+    Writes batches to Supabase in bulk requests.
+
+    dictionaryentry rows are upserted on id. Related rows for the batch's
+    entries are deleted and re-inserted, so a batch interrupted half-way
+    converges when it is run again.
+    """
+
+    name = "supabase"
+
+    def __init__(self, client, chunk_size: int = SUPABASE_CHUNK_SIZE):
+        self.client = client
+        self.chunk_size = chunk_size
+
+    def lookup(self, simplified: List[str]) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        for chunk in _chunks(simplified, SUPABASE_LOOKUP_CHUNK_SIZE):
+            resp = (
+                self.client.table("dictionaryentry")
+                .select("id,simplified,traditional,pinyin,english_definitions")
+                .in_("simplified", chunk)
+                .execute()
+            )
+            rows.extend(resp.data or [])
+        return rows
+
+    def write(self, batch: IngestBatch) -> None:
+        for chunk in _chunks(batch.updates, self.chunk_size):
+            self.client.table("dictionaryentry").upsert(chunk, on_conflict="id").execute()
+        for table, (attribute, columns) in RELATED_INSERTS.items():
+            for ids in _chunks(batch.entry_ids, SUPABASE_LOOKUP_CHUNK_SIZE):
+                self.client.table(table).delete().in_("entry_id", ids).execute()
+            rows = [dict(zip(columns, values)) for values in getattr(batch, attribute)]
+            for chunk in _chunks(rows, self.chunk_size):
+                self.client.table(table).insert(chunk).execute()
+
+
+class Checkpoint:
+    """Number of source entries already written to every sink, persisted after each batch."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._state: Dict[str, int] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._state = json.load(f)
+
+    def processed(self, source: str) -> int:
+        return self._state.get(os.path.abspath(source), 0)
+
+    def save(self, source: str, processed: int) -> None:
+        self._state[os.path.abspath(source)] = processed
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f)
+        os.replace(tmp_path, self.path)
+
+
+def batched(entries: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(entries)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def transform_shard(shard: Tuple[int, List[Dict[str, Any]], List[List[Dict[str, Any]]]]) -> Tuple[int, List[IngestBatch]]:
+    """Run the extract_* transforms for one batch against each sink's matched rows."""
+    position, entries, rows_per_sink = shard
+    return position, [build_batch(entries, rows) for rows in rows_per_sink]
+
+
+def ingest(source: str, sinks: List[Any], batch_size: int = INGEST_BATCH_SIZE,
+           checkpoint: Checkpoint | None = None, verbose: bool = True, workers: int = 1) -> Dict[str, int]:
+    """
+    Stream the source into every sink in batches.
+
+    Each batch is looked up per sink, transformed (in worker processes when
+    `workers` > 1) and written per sink in source order, then recorded in the
+    checkpoint, so an interrupted run resumes after the last batch that
+    reached every sink.
+    """
+    skip = checkpoint.processed(source) if checkpoint else 0
+    stats = {"entries": 0, "updated": 0, "not_found": 0, "skipped": 0}
+
+    def shards() -> Iterator[Tuple[int, List[Dict[str, Any]], List[List[Dict[str, Any]]]]]:
+        position = 0
+        for entries in batched(iter_source_entries(source), batch_size):
+            already_done = min(len(entries), max(0, skip - position))
+            position += len(entries)
+            stats["skipped"] += already_done
+            entries = entries[already_done:]
+            if not entries:
+                continue
+            simplified = list(dict.fromkeys(entry["simplified"] for entry in entries))
+            yield position, entries, [sink.lookup(simplified) for sink in sinks]
+
+    for position, batches in map_shards(transform_shard, shards(), workers):
+        for sink, batch in zip(sinks, batches):
+            sink.write(batch)
+        stats["entries"] = position
+        stats["updated"] += len(batches[-1].updates)
+        stats["not_found"] += len(batches[-1].not_found)
+
+        if checkpoint:
+            checkpoint.save(source, position)
+        if verbose:
+            print(f"Processed {stats['entries']} entries ({stats['updated']} updated, {stats['not_found']} not found)")
+
+    stats["entries"] = max(stats["entries"], stats["skipped"])
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load HSK levels, frequency and related data from complete.json")
+    parser.add_argument("source", help="Path to complete.json")
+    parser.add_argument("--sqlite", help="Path to the local SQLite dictionary")
+    parser.add_argument("--supabase", action="store_true", help="Also write to Supabase")
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--checkpoint", help="Resume file; reruns skip batches already written")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes used to transform batches; lookups and writes stay in this process")
+    args = parser.parse_args()
+
+    sinks: List[Any] = []
+    if args.sqlite:
+        sinks.append(SQLiteSink(sqlite3.connect(args.sqlite)))
+    if args.supabase:
+        from src.db.connection import get_connection
+        sinks.append(SupabaseSink(get_connection()))
+    if not sinks:
+        parser.error("Choose at least one target: --sqlite and/or --supabase")
+
+    checkpoint = Checkpoint(args.checkpoint) if args.checkpoint else None
+    stats = ingest(args.source, sinks, batch_size=args.batch_size, checkpoint=checkpoint, workers=args.workers)
+    print(f"Done: {stats}")
+
+
+if __name__ == "__main__":
+    main()
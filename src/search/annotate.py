@@ -0,0 +1,118 @@
+import math
+from collections import deque
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.detection.input_detection import contains_chinese
+from src.search.dictionary_index import (
+    TOKEN_COST, BackgroundIndex, get_index, max_frequency_rank, rank_key, word_cost,
+)
+
+
+class HeadwordAutomaton:
+    """
+    Aho–Corasick automaton over every simplified and traditional headword.
+
+    `segment` scans text once, collecting every headword that ends at each
+    position, and keeps the cheapest segmentation ending there. A word's cost
+    is -log of a Zipf probability (see word_cost), so the result is the most
+    probable path through the word DAG, found in the same pass.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        # The best-ranked entry for each headword
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        for entry in sorted(entries, key=rank_key):
+            for headword in (entry.get("simplified"), entry.get("traditional")):
+                if headword and headword not in self.entries:
+                    self.entries[headword] = entry
+
+        max_rank = max_frequency_rank(self.entries.values())
+        self.unknown_cost = math.log(max_rank * 10) + TOKEN_COST
+        self.costs = {headword: word_cost(entry, max_rank) for headword, entry in self.entries.items()}
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._word: List[str | None] = [None]
+        for headword in self.entries:
+            state = 0
+            for char in headword:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._word.append(None)
+                state = nxt
+            self._word[state] = headword
+
+        # Failure links, and links to the nearest suffix state that ends a word
+        self._fail = [0] * len(self._goto)
+        self._output = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                target = self._fail[nxt]
+                self._output[nxt] = target if self._word[target] is not None else self._output[target]
+                queue.append(nxt)
+
+    def _matches(self, state: int):
+        """Headwords ending at the current position, longest first."""
+        if self._word[state] is None:
+            state = self._output[state]
+        while state:
+            yield self._word[state]
+            state = self._output[state]
+
+    def segment(self, text: str) -> List[Tuple[int, int, str | None]]:
+        """(start, end, headword) tokens covering the text; headword is None for text not in the dictionary."""
+        best = [0.0] + [math.inf] * len(text)
+        back: List[Tuple[int, str | None]] = [(0, None)] * (len(text) + 1)
+        state = 0
+        for i, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+
+            end = i + 1
+            best[end], back[end] = best[i] + self.unknown_cost, (i, None)
+            for headword in self._matches(state):
+                start = end - len(headword)
+                cost = best[start] + self.costs[headword]
+                if cost < best[end]:
+                    best[end], back[end] = cost, (start, headword)
+
+        tokens: List[Tuple[int, int, str | None]] = []
+        end = len(text)
+        while end > 0:
+            start, headword = back[end]
+            tokens.append((start, end, headword))
+            end = start
+        tokens.reverse()
+        return _merge_unknown(text, tokens)
+
+
+def _merge_unknown(text: str, tokens: List[Tuple[int, int, str | None]]) -> List[Tuple[int, int, str | None]]:
+    """Join runs of unmatched non-Chinese characters (Latin words, spaces, punctuation) into one token."""
+    merged: List[Tuple[int, int, str | None]] = []
+    for start, end, headword in tokens:
+        if (headword is None and merged and merged[-1][2] is None
+                and not contains_chinese(text[start:end]) and not contains_chinese(text[merged[-1][0]:merged[-1][1]])):
+            merged[-1] = (merged[-1][0], end, None)
+        else:
+            merged.append((start, end, headword))
+    return merged
+
+
+class AnnotationIndex(BackgroundIndex[HeadwordAutomaton]):
+    name = "annotate"
+
+    def build_index(self, entries: List[Dict[str, Any]]) -> HeadwordAutomaton:
+        return HeadwordAutomaton(entries)
+
+
+def get_annotator(client_factory: Callable[[], Any]) -> AnnotationIndex:
+    return get_index(AnnotationIndex, client_factory)
@@ -0,0 +1,149 @@
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, List, TypeVar
+
+from src.config import INDEX_REBUILD_INTERVAL_S
+from src.db.local import add_dictionary_listener, get_local_dictionary
+from src.search.search import ENTRY_COLUMNS
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_PAGE_SIZE = 1000
+
+
+def load_table(table: str, columns: str, client_factory: Callable[[], Any]) -> List[Dict[str, Any]]:
+    """Every row of a dictionary table: from the local dictionary when loaded, otherwise paged from the backend."""
+    dictionary = get_local_dictionary()
+    if dictionary is not None:
+        return list(dictionary.tables[table])
+    client = client_factory()
+    rows: List[Dict[str, Any]] = []
+    while True:
+        resp = client.table(table).select(columns).order("id").range(
+            len(rows), len(rows) + _PAGE_SIZE - 1).execute()
+        batch = resp.data or []
+        rows.extend(batch)
+        if len(batch) < _PAGE_SIZE:
+            return rows
+
+
+def load_entries(client_factory: Callable[[], Any]) -> List[Dict[str, Any]]:
+    """Every dictionaryentry row."""
+    return load_table("dictionaryentry", ENTRY_COLUMNS, client_factory)
+
+
+def rank_key(entry: Dict[str, Any]) -> tuple:
+    """(hsk_level, frequency_rank) with missing values last, then id for a stable order."""
+    hsk, freq = entry.get("hsk_level"), entry.get("frequency_rank")
+    return (hsk is None, hsk or 0, freq is None, freq or 0, entry["id"])
+
+
+# Added to every word's cost, so fewer, longer words win over equally likely splits
+TOKEN_COST = 1.0
+# Frequency rank assumed per HSK level for entries without one
+_RANK_PER_HSK_LEVEL = 1000
+
+
+def word_cost(entry: Dict[str, Any], max_rank: int) -> float:
+    """
+    -log of a Zipf probability for the entry, plus TOKEN_COST.
+
+    The rank is frequency_rank, else an estimate from the HSK level, else
+    twice the largest rank (rarer than anything ranked).
+    """
+    rank = entry.get("frequency_rank")
+    if not rank:
+        hsk = entry.get("hsk_level")
+        rank = hsk * _RANK_PER_HSK_LEVEL if hsk else max_rank * 2
+    return math.log(rank + 1) + TOKEN_COST
+
+
+def max_frequency_rank(entries) -> int:
+    return max((e["frequency_rank"] for e in entries if e.get("frequency_rank")), default=1)
+
+
+class BackgroundIndex(Generic[T]):
+    """
+    An in-memory index over the dictionary entries, rebuilt off the request path.
+
+    `current` is None until the first build finishes; after that, requests
+    keep using the previous index while a rebuild runs. Once an index is
+    serving, rebuilds start at most every `rebuild_interval_s`, and every
+    request for one made meanwhile is covered by that single rebuild.
+    Subclasses implement `build_index(entries)`.
+    """
+
+    name = "index"
+
+    def __init__(self, client_factory: Callable[[], Any], rebuild_interval_s: float = INDEX_REBUILD_INTERVAL_S):
+        self._client_factory = client_factory
+        self.rebuild_interval_s = rebuild_interval_s
+        self.current: T | None = None
+        self._lock = threading.Lock()
+        self._building = False
+        self._dirty = False
+        self._last_build: float | None = None
+
+    def build_index(self, entries: List[Dict[str, Any]]) -> T:
+        raise NotImplementedError
+
+    def build(self) -> None:
+        self.current = self.build_index(load_entries(self._client_factory))
+        metrics.incr(f"{self.name}.rebuilds")
+
+    def rebuild_in_background(self) -> None:
+        """Start a rebuild, or have the running one go again once it finishes."""
+        with self._lock:
+            if self._building:
+                self._dirty = True
+                return
+            self._building = True
+        threading.Thread(target=self._rebuild_loop, name=f"{self.name}-rebuild", daemon=True).start()
+
+    def _rebuild_loop(self) -> None:
+        while True:
+            if self.current is not None and self._last_build is not None:
+                # Requests arriving while this waits only mark the index dirty, so they share the rebuild
+                time.sleep(max(0.0, self._last_build + self.rebuild_interval_s - time.monotonic()))
+            with self._lock:
+                self._dirty = False
+            self._last_build = time.monotonic()
+            try:
+                self.build()
+            except Exception as e:
+                logger.warning("Rebuilding the %s index failed: %s", self.name, e)
+            with self._lock:
+                if not self._dirty:
+                    self._building = False
+                    return
+                self._dirty = False
+
+    def get(self) -> T | None:
+        """The current index, or None while the first build is running."""
+        index = self.current
+        if index is None and not self._building:
+            # The first build failed (e.g. backend down); try again
+            self.rebuild_in_background()
+        return index
+
+
+_indexes: Dict[type, BackgroundIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(cls: Callable[[Callable[[], Any]], BackgroundIndex], client_factory: Callable[[], Any]) -> BackgroundIndex:
+    """The process-wide instance of an index; the first call starts its build and follows dictionary swaps."""
+    index = _indexes.get(cls)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(cls)
+            if index is None:
+                index = _indexes[cls] = cls(client_factory)
+                add_dictionary_listener(lambda old, new: index.rebuild_in_background())
+                index.rebuild_in_background()
+    return index
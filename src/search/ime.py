@@ -0,0 +1,158 @@
+import heapq
+import math
+import re
+from typing import Any, Callable, Dict, FrozenSet, List, Tuple
+
+from src.config import IME_BEAM_WIDTH, IME_CANDIDATES_PER_KEY
+from src.detection.input_detection import pinyin_list
+from src.search.dictionary_index import (
+    TOKEN_COST, BackgroundIndex, get_index, max_frequency_rank, rank_key, word_cost,
+)
+from src.search.suggest import normalize_key
+
+SYLLABLES = frozenset(normalize_key(s) for s in pinyin_list)
+_MAX_SYLLABLE = max(map(len, SYLLABLES))
+_separator = re.compile(r"[\s'’]+")
+
+# A lattice edge: (cost, entry or None for a bare syllable, offsets of the syllable breaks inside the key)
+Candidate = Tuple[float, Dict[str, Any] | None, FrozenSet[int]]
+
+
+def _syllable_breaks(pinyin: str) -> FrozenSet[int]:
+    breaks, offset = set(), 0
+    for syllable in pinyin.split()[:-1]:
+        offset += len(normalize_key(syllable))
+        breaks.add(offset)
+    return frozenset(breaks)
+
+
+class PinyinLexicon:
+    """
+    Dictionary entries keyed by toneless pinyin, for pinyin-to-character conversion.
+
+    Each key keeps its cheapest candidates (see word_cost). `convert` builds a
+    lattice over every syllable segmentation of the input, where an edge is a
+    word whose pinyin spells that stretch of syllables, and returns the
+    cheapest paths with an N-best Viterbi pass.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], per_key: int = IME_CANDIDATES_PER_KEY):
+        max_rank = max_frequency_rank(entries)
+        self.unknown_cost = math.log(max_rank * 10) + TOKEN_COST
+        by_key: Dict[str, List[Tuple[float, tuple, Dict[str, Any]]]] = {}
+        for entry in entries:
+            key = normalize_key(entry.get("pinyin") or "")
+            if key.isascii() and key.isalpha():
+                by_key.setdefault(key, []).append((word_cost(entry, max_rank), rank_key(entry), entry))
+        self.words: Dict[str, List[Candidate]] = {
+            key: [
+                (cost, entry, _syllable_breaks(entry["pinyin"]))
+                for cost, _, entry in sorted(options, key=lambda o: o[:2])[:per_key]
+            ]
+            for key, options in by_key.items()
+        }
+        self.max_key_length = max(map(len, self.words), default=_MAX_SYLLABLE)
+
+    @staticmethod
+    def _prepare(text: str) -> Tuple[str, List[int]]:
+        """Normalized letters, and the chunk each letter belongs to (syllables never span separators)."""
+        letters: List[str] = []
+        chunks: List[int] = []
+        for chunk, part in enumerate(_separator.split(text.strip())):
+            part = normalize_key(part)
+            letters.append(part)
+            chunks.extend([chunk] * len(part))
+        return "".join(letters), chunks
+
+    @staticmethod
+    def _boundaries(letters: str, chunks: List[int]) -> List[int]:
+        """Positions reachable from the start by whole syllables and from which the end is reachable."""
+        n = len(letters)
+
+        def spans(i: int):
+            for j in range(i + 1, min(n, i + _MAX_SYLLABLE) + 1):
+                if chunks[i] == chunks[j - 1] and letters[i:j] in SYLLABLES:
+                    yield j
+
+        forward = {0}
+        for i in range(n):
+            if i in forward:
+                forward.update(spans(i))
+        backward = {n}
+        for i in range(n - 1, -1, -1):
+            if any(j in backward for j in spans(i)):
+                backward.add(i)
+        return sorted(forward & backward) if n in forward else []
+
+    def convert(self, text: str, n: int = 5, script: str = "simplified",
+                beam: int = IME_BEAM_WIDTH) -> List[Dict[str, Any]]:
+        """Up to n distinct conversions of the pinyin, cheapest first."""
+        letters, chunks = self._prepare(text)
+        positions = self._boundaries(letters, chunks)
+        if not positions:
+            return []
+        beam = max(beam, n)
+        valid = set(positions)
+        # Where the user typed a separator, e.g. xi'an; words may span one only at a syllable break
+        separators = [b for b in range(1, len(letters)) if chunks[b] != chunks[b - 1]]
+
+        # beams[j]: best partial paths ending at j as (cost, previous position, rank there, word)
+        beams: Dict[int, List[Tuple[float, int, int, Tuple[str, Dict[str, Any] | None] | None]]] = {
+            0: [(0.0, -1, -1, None)],
+        }
+        for j in positions[1:]:
+            candidates = []
+            for i in range(max(0, j - self.max_key_length), j):
+                if i not in valid:
+                    continue
+                key = letters[i:j]
+                inner = [b - i for b in separators if i < b < j]
+                options = self.words.get(key)
+                if not options:
+                    if key not in SYLLABLES or inner:
+                        continue
+                    options = [(self.unknown_cost, None, frozenset())]
+                for cost, entry, breaks in options:
+                    if inner and not breaks.issuperset(inner):
+                        continue
+                    for rank, (path_cost, _, _, _) in enumerate(beams[i]):
+                        candidates.append((path_cost + cost, i, rank, (key, entry)))
+            beams[j] = heapq.nsmallest(beam, candidates, key=lambda c: c[0])
+
+        conversions: List[Dict[str, Any]] = []
+        seen = set()
+        for cost, i, rank, word in beams[len(letters)]:
+            words = []
+            while word is not None:
+                key, entry = word
+                words.append({
+                    "text": (entry.get(script) or entry.get("simplified")) if entry else key,
+                    "pinyin": entry.get("pinyin") if entry else key,
+                    "entry_id": entry["id"] if entry else None,
+                })
+                _, i, rank, word = beams[i][rank]
+            words.reverse()
+            converted = "".join(w["text"] for w in words)
+            if converted in seen:
+                continue
+            seen.add(converted)
+            conversions.append({"text": converted, "cost": cost, "words": words})
+            if len(conversions) == n:
+                break
+
+        best = conversions[0]["cost"] if conversions else 0.0
+        for conversion in conversions:
+            # Probability relative to the best conversion
+            conversion["score"] = round(math.exp(best - conversion.pop("cost")), 4)
+        return conversions
+
+
+class ImeIndex(BackgroundIndex[PinyinLexicon]):
+    name = "ime"
+
+    def build_index(self, entries: List[Dict[str, Any]]) -> PinyinLexicon:
+        return PinyinLexicon(entries)
+
+
+def get_ime(client_factory: Callable[[], Any]) -> ImeIndex:
+    return get_index(ImeIndex, client_factory)
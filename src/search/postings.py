@@ -0,0 +1,44 @@
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.search.dictionary_index import BackgroundIndex, get_index, rank_key
+
+PostingKey = Tuple[str, int | None, int | None]
+
+
+class CharacterPostings:
+    """
+    Character -> entries containing it, in either script.
+
+    Every list is presorted by (hsk_level, frequency_rank). A separate list is
+    kept per (character, hsk_level, length) filter combination, with None
+    meaning "any", so a filtered page is a slice of a ready list, and its
+    total is the list's length.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self._lists: Dict[PostingKey, List[Dict[str, Any]]] = {}
+        for entry in sorted(entries, key=rank_key):
+            characters = set(entry.get("simplified") or "") | set(entry.get("traditional") or "")
+            hsk = entry.get("hsk_level")
+            length = len(entry.get("simplified") or "")
+            for char in characters:
+                # A set, since entries without an HSK level only belong to the "any" lists
+                for key in {(char, None, None), (char, hsk, None), (char, None, length), (char, hsk, length)}:
+                    self._lists.setdefault(key, []).append(entry)
+
+    def page(self, char: str, offset: int, limit: int, hsk_level: int | None = None,
+             length: int | None = None) -> Tuple[List[Dict[str, Any]], int]:
+        """One page of entries containing the character, and the total matching the filters."""
+        postings = self._lists.get((char, hsk_level, length), [])
+        return postings[offset:offset + limit], len(postings)
+
+
+class PostingsIndex(BackgroundIndex[CharacterPostings]):
+    name = "postings"
+
+    def build_index(self, entries: List[Dict[str, Any]]) -> CharacterPostings:
+        return CharacterPostings(entries)
+
+
+def get_postings(client_factory: Callable[[], Any]) -> PostingsIndex:
+    return get_index(PostingsIndex, client_factory)
@@ -1,11 +1,82 @@
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable
+from src.config import SEARCH_SPECULATIVE_TIERS
 from src.detection.input_detection import remove_tone_numbers, pinyin_list
+from src.detection.tokenizer import Span
 from src.db.connection import format_results
+from src.utils.concurrency import submit_all, cancel_all
+from src.utils.deadline import Deadline, DeadlineExceeded, run_within
 from src.utils.pinyin_phrases import common_phrases_with_tones
 from supabase import Client
 
-def search_chinese(text: str, client: Client, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+ENTRY_COLUMNS = "id,simplified,traditional,pinyin,english_definitions,hsk_level,frequency_rank,radical,old_hsk_level,new_hsk_level"
+
+Tier = Callable[[], List[Dict[str, Any]]]
+
+
+def _tier(query, match_type: str, relevance_score: float) -> Tier:
+    """Wrap a prepared query so it runs lazily and tags its rows with the tier's ranking."""
+    def run() -> List[Dict[str, Any]]:
+        rows = query.execute().data or []
+        for r in rows:
+            r["match_type"] = match_type
+            r["relevance_score"] = relevance_score
+        return rows
+    return run
+
+
+def run_tiers(tiers: List[Tier], speculative: bool | None = None,
+              deadline: Deadline | None = None) -> List[Dict[str, Any]]:
+    """
+    Return the rows of the highest-priority tier that has any.
+
+    Sequential mode runs tiers one after another and stops at the first hit.
+    Speculative mode launches every tier at once, then waits on them in priority
+    order, so a fall-through costs roughly one round trip. Lower-priority tiers
+    that are no longer needed are cancelled. Both modes return the same rows.
+
+    If the deadline passes first, the best rows already known are returned
+    and the deadline is marked partial.
+    """
+    if speculative is None:
+        speculative = SEARCH_SPECULATIVE_TIERS
+
+    if not speculative or len(tiers) < 2:
+        for tier in tiers:
+            try:
+                rows = run_within(deadline, tier)
+            except DeadlineExceeded:
+                deadline.mark_partial("tiers")
+                return []
+            if rows:
+                return rows
+        return []
+
+    futures = submit_all(tiers if deadline is None else [deadline.bound(tier) for tier in tiers])
+    try:
+        for future in futures:
+            rows = future.result() if deadline is None else deadline.wait(future)
+            if rows:
+                return rows
+        return []
+    except DeadlineExceeded:
+        deadline.mark_partial("tiers")
+        # Settle for the best lower-priority tier that has already answered
+        for future in futures:
+            if future.done() and not future.cancelled() and future.exception() is None and future.result():
+                return future.result()
+        return []
+    finally:
+        cancel_all(futures)
+
+
+def search_chinese(text: str, client: Client, limit: int = 20, offset: int = 0,
+                   speculative: bool | None = None, deadline: Deadline | None = None) -> List[Dict[str, Any]]:
+    return format_results(_chinese_rows(text, client, limit, offset, speculative, deadline), deadline)
+
+
+def _chinese_rows(text: str, client: Client, limit: int = 20, offset: int = 0,
+                  speculative: bool | None = None, deadline: Deadline | None = None) -> List[Dict[str, Any]]:
     """
     Search for Chinese characters with priority:
     1. Exact matches in simplified/traditional
@@ -14,38 +85,30 @@ def search_chinese(text: str, client: Client, limit: int = 20, offset: int = 0)
     start = offset
     end = offset + limit - 1
 
-    # First: exact matches
-    exact = (
-        client.table("dictionaryentry")
-        .select("id,simplified,traditional,pinyin,english_definitions,hsk_level,frequency_rank,radical,old_hsk_level,new_hsk_level")
-        .or_(f"simplified.eq.{text},traditional.eq.{text}")
-        .order("hsk_level", nullsfirst=False)
-        .order("frequency_rank", nullsfirst=False)
-        .range(start, end)
-        .execute()
-    )
-    rows = exact.data or []
-    for r in rows:
-        r["match_type"] = "exact"
-        r["relevance_score"] = 1
-
-    # If no exact, try partial
-    if not rows:
-        partial = (
+    tiers = [
+        # First: exact matches
+        _tier(
+            client.table("dictionaryentry")
+            .select(ENTRY_COLUMNS)
+            .or_(f"simplified.eq.{text},traditional.eq.{text}")
+            .order("hsk_level", nullsfirst=False)
+            .order("frequency_rank", nullsfirst=False)
+            .range(start, end),
+            "exact", 1,
+        ),
+        # If no exact, try partial
+        _tier(
             client.table("dictionaryentry")
-            .select("id,simplified,traditional,pinyin,english_definitions,hsk_level,frequency_rank,radical,old_hsk_level,new_hsk_level")
+            .select(ENTRY_COLUMNS)
             .or_(f"simplified.ilike.%{text}%,traditional.ilike.%{text}%")
             .order("hsk_level", nullsfirst=False)
             .order("frequency_rank", nullsfirst=False)
-            .range(start, end)
-            .execute()
-        )
-        rows = partial.data or []
-        for r in rows:
-            r["match_type"] = "partial"
-            r["relevance_score"] = 0.5
+            .range(start, end),
+            "partial", 0.5,
+        ),
+    ]
 
-    return format_results(rows)
+    return run_tiers(tiers, speculative, deadline)
 
 
 def preprocess_pinyin(text: str) -> List[str]:
@@ -96,127 +159,125 @@ def preprocess_pinyin(text: str) -> List[str]:
     return list(dict.fromkeys(variants))
 
 
-def search_pinyin(text: str, client: Client, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+def search_pinyin(text: str, client: Client, limit: int = 20, offset: int = 0,
+                  speculative: bool | None = None, deadline: Deadline | None = None) -> List[Dict[str, Any]]:
+    return format_results(_pinyin_rows(text, client, limit, offset, speculative, deadline), deadline)
+
 
+def _pinyin_rows(text: str, client: Client, limit: int = 20, offset: int = 0,
+                 speculative: bool | None = None, deadline: Deadline | None = None) -> List[Dict[str, Any]]:
+    """
+    Search pinyin with priority:
+    1. Exact (tone-sensitive) match for each input variant
+    2. Tone-insensitive prefix match for each variant
+    3. Partial match anywhere
+    """
     # Preprocess the pinyin input to handle different formats
     pinyin_variants = preprocess_pinyin(text)
 
     start = offset
     end = offset + limit - 1
 
+    tiers: List[Tier] = []
+
     # Try each variant in order - exact tone first
     for variant in pinyin_variants:
-        exact = (
+        tiers.append(_tier(
             client.table("dictionaryentry")
-            .select("id,simplified,traditional,pinyin,english_definitions,hsk_level,frequency_rank,radical,old_hsk_level,new_hsk_level")
+            .select(ENTRY_COLUMNS)
             .eq("pinyin", variant)
             .order("hsk_level", nullsfirst=False)
             .order("frequency_rank", nullsfirst=False)
-            .range(start, end)
-            .execute()
-        )
-        rows = exact.data or []
-        if rows:
-            for r in rows:
-                r["match_type"] = "exact_tone"
-                r["relevance_score"] = 1
-            return format_results(rows)
-
-    # Tone-insensitive (prefix) match
-    for variant in pinyin_variants:
-        tone_insensitive_text = remove_tone_numbers(variant)
-        prefix = (
+            .range(start, end),
+            "exact_tone", 1,
+        ))
+
+    # Tone-insensitive (prefix) match; variants that collapse to the same
+    # pattern would return the same rows, so each pattern is queried once
+    for tone_insensitive_text in dict.fromkeys(remove_tone_numbers(v) for v in pinyin_variants):
+        tiers.append(_tier(
             client.table("dictionaryentry")
-            .select("id,simplified,traditional,pinyin,english_definitions,hsk_level,frequency_rank,radical,old_hsk_level,new_hsk_level")
+            .select(ENTRY_COLUMNS)
             .ilike("pinyin", f"{tone_insensitive_text}%")
             .order("hsk_level", nullsfirst=False)
             .order("frequency_rank", nullsfirst=False)
-            .range(start, end)
-            .execute()
-        )
-        rows = prefix.data or []
-        if rows:
-            for r in rows:
-                r["match_type"] = "tone_insensitive"
-                r["relevance_score"] = 0.8
-            return format_results(rows)
+            .range(start, end),
+            "tone_insensitive", 0.8,
+        ))
 
     # Partial match anywhere
-    partial = (
+    tiers.append(_tier(
         client.table("dictionaryentry")
-        .select("id,simplified,traditional,pinyin,english_definitions,hsk_level,frequency_rank,radical,old_hsk_level,new_hsk_level")
+        .select(ENTRY_COLUMNS)
         .ilike("pinyin", f"%{text}%")
         .order("hsk_level", nullsfirst=False)
         .order("frequency_rank", nullsfirst=False)
-        .range(start, end)
-        .execute()
-    )
-    rows = partial.data or []
-    for r in rows:
-        r["match_type"] = "partial"
-        r["relevance_score"] = 0.5
+        .range(start, end),
+        "partial", 0.5,
+    ))
+
+    return run_tiers(tiers, speculative, deadline)
+
 
-    return format_results(rows)
+def search_english(text: str, client: Client, limit: int = 20, offset: int = 0,
+                   deadline: Deadline | None = None) -> List[Dict[str, Any]]:
+    return format_results(_english_rows(text, client, limit, offset, deadline), deadline)
 
 
-def search_english(text: str, client: Client, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+def _english_rows(text: str, client: Client, limit: int = 20, offset: int = 0,
+                  deadline: Deadline | None = None) -> List[Dict[str, Any]]:
     """
     Search for English text using LIKE-based ranking (portable across Supabase/Postgres without FTS schema).
     Priority:
     1) Direct translation style startswith matches for single words
     2) Exact-ish contains with spaces around word
     3) Partial contains
-    Results are de-duplicated and paginated after combining.
+    Results are de-duplicated and paginated after combining. If the deadline
+    passes, the tiers fetched so far are used.
     """
     words = text.split()
     is_single_word = len(words) == 1
 
-    all_rows: List[Dict[str, Any]] = []
-
-    base_select = "id,simplified,traditional,pinyin,english_definitions,hsk_level,frequency_rank,radical,old_hsk_level,new_hsk_level"
+    tiers: List[Tier] = []
 
     if is_single_word:
         # Direct translation style: startswith the term (broader but safe for PostgREST or_ constraints)
-        direct_resp = (
+        tiers.append(_tier(
             client.table("dictionaryentry")
-            .select(base_select)
+            .select(ENTRY_COLUMNS)
             .ilike("english_definitions", f"{text}%")
             .order("hsk_level", nullsfirst=False)
-            .order("frequency_rank", nullsfirst=False)
-            .execute()
-        )
-        for r in direct_resp.data or []:
-            r["match_type"] = "direct_translation"
-            r["relevance_score"] = 2.0
-        all_rows.extend(direct_resp.data or [])
+            .order("frequency_rank", nullsfirst=False),
+            "direct_translation", 2.0,
+        ))
 
     # Exact-ish contains (word boundary approximation using spaces)
-    exactish_resp = (
+    tiers.append(_tier(
         client.table("dictionaryentry")
-        .select(base_select)
+        .select(ENTRY_COLUMNS)
         .ilike("english_definitions", f"% {text} %")
         .order("hsk_level", nullsfirst=False)
-        .order("frequency_rank", nullsfirst=False)
-        .execute()
-    )
-    for r in exactish_resp.data or []:
-        r["match_type"] = "fts_exact"
-        r["relevance_score"] = 1.0
-    all_rows.extend(exactish_resp.data or [])
+        .order("frequency_rank", nullsfirst=False),
+        "fts_exact", 1.0,
+    ))
 
     # Partial contains
-    partial_resp = (
+    tiers.append(_tier(
         client.table("dictionaryentry")
-        .select(base_select)
+        .select(ENTRY_COLUMNS)
         .ilike("english_definitions", f"%{text}%")
         .order("hsk_level", nullsfirst=False)
-        .order("frequency_rank", nullsfirst=False)
-        .execute()
-    )
-    for r in partial_resp.data or []:
-        r["match_type"] = "partial"
-        r["relevance_score"] = 0.5
-    all_rows.extend(partial_resp.data or [])
+        .order("frequency_rank", nullsfirst=False),
+        "partial", 0.5,
+    ))
+
+    all_rows: List[Dict[str, Any]] = []
+    for tier in tiers:
+        try:
+            all_rows.extend(run_within(deadline, tier))
+        except DeadlineExceeded:
+            deadline.mark_partial("tiers")
+            break
 
     # De-duplicate by id preserving order
     seen = set()
@@ -228,5 +289,93 @@ def search_english(text: str, client: Client, limit: int = 20, offset: int = 0)
             unique_rows.append(r)
 
     # Pagination after combining
-    paginated = unique_rows[offset: offset + limit]
-    return format_results(paginated)
\ No newline at end of file
+    return unique_rows[offset: offset + limit]
+
+
+# Highest relevance_score each search can assign, used to put scores from
+# different searches on the same 0-1 scale before weighting by confidence
+MAX_RELEVANCE = {"chinese": 1.0, "pinyin": 1.0, "english": 2.0}
+
+
+def _merged_order(row: Dict[str, Any]) -> tuple:
+    """Unified score first, then HSK level and frequency rank with missing values last."""
+    return (
+        -row["relevance_score"],
+        row.get("hsk_level") is None, row.get("hsk_level") or 0,
+        row.get("frequency_rank") is None, row.get("frequency_rank") or 0,
+    )
+
+
+def search_ambiguous(text: str, client: Client, confidences: Dict[str, float],
+                     limit: int = 20, offset: int = 0, deadline: Deadline | None = None) -> List[Dict[str, Any]]:
+    """
+    Search input that is plausible as both pinyin and English.
+
+    Both searches run concurrently and their rows are merged by a unified
+    relevance score: the row's own score, normalized per search, weighted by
+    the detector's confidence in that input type. Rows found by both searches
+    keep their best score. Ties fall back to HSK level and frequency rank.
+    """
+    # Each search has to cover the requested page on its own before merging
+    window = offset + limit
+    searches = {
+        "pinyin": lambda: _pinyin_rows(text, client, limit=window, offset=0, deadline=deadline),
+        "english": lambda: _english_rows(text, client, limit=window, offset=0, deadline=deadline),
+    }
+    input_types = [t for t in searches if confidences.get(t, 0) > 0]
+    futures = submit_all([searches[t] for t in input_types], pool="fanout")
+
+    merged: Dict[int, Dict[str, Any]] = {}
+    for input_type, future in zip(input_types, futures):
+        try:
+            rows = future.result() if deadline is None else deadline.wait(future)
+        except DeadlineExceeded:
+            deadline.mark_partial("tiers")
+            continue
+        for r in rows:
+            score = round(confidences[input_type] * r["relevance_score"] / MAX_RELEVANCE[input_type], 4)
+            current = merged.get(r["id"])
+            if current is None or score > current["relevance_score"]:
+                r["relevance_score"] = score
+                merged[r["id"]] = r
+
+    ranked = sorted(merged.values(), key=_merged_order)
+    return format_results(ranked[offset: offset + limit], deadline)
+
+def search_mixed(spans: List[Span], client: Client, limit: int = 20, offset: int = 0,
+                 deadline: Deadline | None = None) -> List[Dict[str, Any]]:
+    """
+    Search a mixed-script query such as "好 hao3 good", one search per span.
+
+    The spans are searched concurrently, each with the search for its type.
+    Each row's score is normalized per search, and an entry found by several
+    spans adds its scores up, averaged over the spans. An entry matching the
+    whole query therefore ranks above one that matches a single span.
+    """
+    window = offset + limit
+    rows_for = {"chinese": _chinese_rows, "pinyin": _pinyin_rows, "english": _english_rows}
+    futures = submit_all([
+        lambda span=span: rows_for[span.search_type](span.text, client, limit=window, offset=0, deadline=deadline)
+        for span in spans
+    ], pool="fanout")
+
+    merged: Dict[int, Dict[str, Any]] = {}
+    for span, future in zip(spans, futures):
+        try:
+            rows = future.result() if deadline is None else deadline.wait(future)
+        except DeadlineExceeded:
+            deadline.mark_partial("tiers")
+            continue
+        for r in rows:
+            score = r["relevance_score"] / MAX_RELEVANCE[span.search_type] / len(spans)
+            current = merged.get(r["id"])
+            if current is None:
+                r["relevance_score"] = score
+                merged[r["id"]] = r
+            else:
+                current["relevance_score"] += score
+
+    for r in merged.values():
+        r["relevance_score"] = round(r["relevance_score"], 4)
+    ranked = sorted(merged.values(), key=_merged_order)
+    return format_results(ranked[offset: offset + limit], deadline)
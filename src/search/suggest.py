@@ -0,0 +1,125 @@
+import heapq
+import re
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, Iterable, List
+
+from src.config import SUGGEST_TOP_K
+from src.search.dictionary_index import BackgroundIndex, get_index, rank_key
+
+_word = re.compile(r"[a-z]+")
+_folded = re.compile(r"[\s1-5]")
+# Sorts after every character, so prefix + _LAST bounds the keys starting with prefix
+_LAST = "\U0010ffff"
+# Prefixes matching more keys than this have their top entries precomputed
+_SCAN_LIMIT = 512
+
+
+def normalize_key(text: str) -> str:
+    """
+    Fold text to the form stored in the prefix index.
+
+    Lowercase, tone marks and tone numbers removed, ü written as v and
+    whitespace dropped, so "Nǐ hǎo", "ni3 hao3" and "nihao" share one key.
+    """
+    text = text.lower().replace("u:", "v")
+    if not text.isascii():
+        text = text.replace("ü", "v")
+        text = "".join(c for c in unicodedata.normalize("NFD", text) if not unicodedata.combining(c))
+    return _folded.sub("", text)
+
+
+def entry_keys(entry: Dict[str, Any]) -> List[str]:
+    """Headwords, toneless pinyin, and each English sense and word of an entry."""
+    keys = [normalize_key(entry.get(field) or "") for field in ("simplified", "traditional", "pinyin")]
+    for sense in (entry.get("english_definitions") or "").lower().split(";"):
+        keys.append(normalize_key(sense))
+        # Already in normalized form
+        keys.extend(_word.findall(sense))
+    return list(dict.fromkeys(k for k in keys if k))
+
+
+def suggestion(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """The minimal payload returned for each suggestion."""
+    definitions = entry.get("english_definitions") or ""
+    return {
+        "id": entry["id"],
+        "simplified": entry.get("simplified"),
+        "traditional": entry.get("traditional"),
+        "pinyin": entry.get("pinyin"),
+        "gloss": definitions.split(";")[0].strip(),
+        "hsk_level": entry.get("hsk_level"),
+    }
+
+
+class PrefixIndex:
+    """
+    Sorted keys searched with bisect; the keys starting with a prefix are one contiguous range.
+
+    Every (key, entry) pair is stored once, in two parallel arrays sorted by
+    key and then by entry rank (rank_key order). A lookup finds its range
+    with two bisects and returns the best k entries in it. Short prefixes
+    such as "a" cover too many keys to scan per keystroke, so the top k of
+    every range longer than _SCAN_LIMIT is computed while building.
+    """
+
+    def __init__(self, entries: Iterable[Dict[str, Any]], k: int = SUGGEST_TOP_K):
+        self.k = k
+        ranked = sorted(entries, key=rank_key)
+        self._payloads = [suggestion(entry) for entry in ranked]
+        # Interned, so a word shared by thousands of senses is stored once
+        pairs = sorted((sys.intern(key), rank) for rank, entry in enumerate(ranked) for key in entry_keys(entry))
+        self._keys = [key for key, _ in pairs]
+        self._ranks = array("i", (rank for _, rank in pairs))
+        self._hot: Dict[str, List[int]] = {}
+        self._precompute("", 0, len(self._keys))
+
+    def _scan(self, lo: int, hi: int) -> List[int]:
+        return heapq.nsmallest(self.k, set(self._ranks[lo:hi]))
+
+    def _precompute(self, prefix: str, lo: int, hi: int) -> List[int]:
+        """Top k ranks of the range [lo, hi) of keys starting with prefix, kept when the range is long."""
+        if hi - lo <= _SCAN_LIMIT:
+            return self._scan(lo, hi)
+        # The key equal to the prefix sorts first, then one run of keys per next character
+        start = bisect_right(self._keys, prefix, lo, hi)
+        candidates = set(self._ranks[lo:start])
+        while start < hi:
+            child = prefix + self._keys[start][len(prefix)]
+            end = bisect_left(self._keys, child + _LAST, start, hi)
+            candidates.update(self._precompute(child, start, end))
+            start = end
+        top = self._hot[prefix] = heapq.nsmallest(self.k, candidates)
+        return top
+
+    def lookup(self, prefix: str, limit: int | None = None) -> List[Dict[str, Any]]:
+        prefix = normalize_key(prefix)
+        top = self._hot.get(prefix)
+        if top is None:
+            lo = bisect_left(self._keys, prefix)
+            top = self._scan(lo, bisect_left(self._keys, prefix + _LAST, lo))
+        return [self._payloads[rank] for rank in top[:limit or self.k]]
+
+
+class Suggester(BackgroundIndex[PrefixIndex]):
+    """The /suggest index, built in the background from the local dictionary or the backend."""
+
+    name = "suggest"
+
+    def __init__(self, client_factory: Callable[[], Any], k: int = SUGGEST_TOP_K):
+        super().__init__(client_factory)
+        self.k = k
+
+    def build_index(self, entries: List[Dict[str, Any]]) -> PrefixIndex:
+        return PrefixIndex(entries, self.k)
+
+    def suggest(self, prefix: str, limit: int | None = None) -> List[Dict[str, Any]] | None:
+        """Suggestions for the prefix, or None while the first index is still being built."""
+        index = self.get()
+        return index.lookup(prefix, limit) if index is not None else None
+
+
+def get_suggester(client_factory: Callable[[], Any]) -> Suggester:
+    return get_index(Suggester, client_factory)
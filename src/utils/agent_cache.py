@@ -0,0 +1,190 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from src.config import (
+    AGENT_CACHE_PATH, AGENT_CACHE_TTL_S, AGENT_CACHE_MAX_ENTRIES, AGENT_CACHE_MAX_BYTES, DEFAULT_MODEL,
+)
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agent_cache (
+    key TEXT PRIMARY KEY,
+    agent TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS agent_cache_last_used ON agent_cache (last_used);
+"""
+
+
+@dataclass
+class CachedRunResult:
+    """Stands in for a RunResult on a cache hit; callers only read `final_output`."""
+    final_output: Any
+    cached: bool = True
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace, so re-indented prompt templates share a key."""
+    return " ".join(prompt.split())
+
+
+def cache_key(agent, prompt: str) -> str:
+    """
+    Content address of an agent call: a hash of everything that shapes its output.
+
+    Name, instructions, model, output type, tool names and the normalized prompt.
+    """
+    instructions = agent.instructions if isinstance(agent.instructions, str) else getattr(
+        agent.instructions, "__qualname__", repr(agent.instructions))
+    parts = [
+        agent.name,
+        normalize_prompt(instructions or ""),
+        str(getattr(agent, "model", None) or DEFAULT_MODEL),
+        repr(getattr(agent, "output_type", None)),
+        sorted(getattr(tool, "name", repr(tool)) for tool in getattr(agent, "tools", None) or []),
+        normalize_prompt(prompt),
+    ]
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _adapter(agent) -> TypeAdapter | None:
+    output_type = getattr(agent, "output_type", None)
+    return TypeAdapter(output_type) if output_type not in (None, str) else None
+
+
+def encode_output(agent, output: Any) -> str:
+    adapter = _adapter(agent)
+    return json.dumps(adapter.dump_python(output, mode="json") if adapter else output, ensure_ascii=False)
+
+
+def decode_output(agent, payload: str) -> Any:
+    adapter = _adapter(agent)
+    value = json.loads(payload)
+    return adapter.validate_python(value) if adapter else value
+
+
+class AgentCache:
+    """
+    On-disk cache of agent outputs, in SQLite.
+
+    Entries expire after `ttl_s`. Once the cache holds more than `max_entries`
+    or `max_bytes` of payload, the least recently used entries are evicted.
+
+    A locked, corrupt or full database never fails the agent call: a read
+    that fails is a miss and a write that fails is skipped, counted as
+    agent_cache.errors.
+    """
+
+    def __init__(self, path: str = AGENT_CACHE_PATH, ttl_s: float = AGENT_CACHE_TTL_S,
+                 max_entries: int = AGENT_CACHE_MAX_ENTRIES, max_bytes: int = AGENT_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with self._connection() as conn:
+                conn.executescript(_SCHEMA)
+        except sqlite3.Error as e:
+            self._failed("open", e)
+
+    def _failed(self, operation: str, error: sqlite3.Error) -> None:
+        metrics.incr("agent_cache.errors")
+        logger.warning("Agent cache %s failed at %s: %s", operation, self.path, error)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; SQLite handles the locking between them."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, key: str) -> str | None:
+        try:
+            return self._get(key)
+        except sqlite3.Error as e:
+            self._failed("read", e)
+            metrics.incr("agent_cache.misses")
+            return None
+
+    def _get(self, key: str) -> str | None:
+        now = time.time()
+        with self._connection() as conn:
+            row = conn.execute("SELECT payload, created_at FROM agent_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                metrics.incr("agent_cache.misses")
+                return None
+            payload, created_at = row
+            if now - created_at > self.ttl_s:
+                conn.execute("DELETE FROM agent_cache WHERE key = ?", (key,))
+                metrics.incr("agent_cache.expired")
+                metrics.incr("agent_cache.misses")
+                return None
+            conn.execute("UPDATE agent_cache SET last_used = ? WHERE key = ?", (now, key))
+        metrics.incr("agent_cache.hits")
+        return payload
+
+    def put(self, key: str, agent_name: str, payload: str) -> None:
+        try:
+            self._put(key, agent_name, payload)
+        except sqlite3.Error as e:
+            self._failed("write", e)
+
+    def _put(self, key: str, agent_name: str, payload: str) -> None:
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO agent_cache (key, agent, payload, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, agent_name, payload, len(payload.encode("utf-8")), now, now),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM agent_cache WHERE created_at < ?", (now - self.ttl_s,))
+        count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM agent_cache").fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+        evicted = 0
+        for key, entry_size in conn.execute("SELECT key, size FROM agent_cache ORDER BY last_used").fetchall():
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM agent_cache WHERE key = ?", (key,))
+            count, size, evicted = count - 1, size - entry_size, evicted + 1
+        if evicted:
+            metrics.incr("agent_cache.evictions", evicted)
+
+    def stats(self) -> dict:
+        with self._connection() as conn:
+            count, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM agent_cache").fetchone()
+        return {"entries": count, "bytes": size}
+
+
+_cache: AgentCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_agent_cache() -> AgentCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AgentCache()
+    return _cache
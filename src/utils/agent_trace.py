@@ -0,0 +1,145 @@
+import json
+import logging
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List
+
+from src.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AgentCall:
+    stage: str
+    ms: float
+    cached: bool
+    input_tokens: int
+    output_tokens: int
+    error: str | None = None
+
+
+class ExerciseTrace:
+    """Agent calls and pipeline events (regenerations, fallbacks, ...) of one exercise generation."""
+
+    def __init__(self, **fields: Any):
+        self.id = uuid.uuid4().hex[:16]
+        self.fields = fields
+        self.calls: List[AgentCall] = []
+        self.counts: Dict[str, int] = {}
+        self.started = time.perf_counter()
+
+    def stages(self) -> Dict[str, Dict[str, Any]]:
+        """Totals per stage, in the order stages first ran."""
+        stages: Dict[str, Dict[str, Any]] = {}
+        for call in self.calls:
+            stage = stages.setdefault(call.stage, {"calls": 0, "ms": 0.0, "cache_hits": 0, "input_tokens": 0,
+                                                   "output_tokens": 0, "errors": 0})
+            stage["calls"] += 1
+            stage["ms"] += call.ms
+            stage["cache_hits"] += call.cached
+            stage["input_tokens"] += call.input_tokens
+            stage["output_tokens"] += call.output_tokens
+            stage["errors"] += call.error is not None
+        return stages
+
+
+_current: ContextVar[ExerciseTrace | None] = ContextVar("exercise_trace", default=None)
+
+
+def stage_name(agent_name: str) -> str:
+    """Metric-friendly name of an agent, e.g. "Exercise Generator" -> "exercise_generator"."""
+    return re.sub(r"[^a-z0-9]+", "_", agent_name.lower()).strip("_")
+
+
+def _log(event: str, **fields: Any) -> None:
+    # One JSON object per line, so log pipelines can parse it without a pattern
+    logger.info(json.dumps({"event": event, **fields}, ensure_ascii=False, default=str))
+
+
+def record_agent_call(agent_name: str, started: float, cached: bool = False, usage: Any = None,
+                      error: BaseException | None = None) -> AgentCall:
+    """
+    Record one agent invocation that began at `started` (time.perf_counter()).
+
+    `usage` is the SDK's Usage (input_tokens / output_tokens), or None for
+    cache hits. Updates the agent.<stage>.* metrics, the current exercise
+    trace, and logs the call.
+    """
+    call = AgentCall(
+        stage=stage_name(agent_name),
+        ms=(time.perf_counter() - started) * 1000,
+        cached=cached,
+        input_tokens=getattr(usage, "input_tokens", 0) or 0,
+        output_tokens=getattr(usage, "output_tokens", 0) or 0,
+        error=type(error).__name__ if error is not None else None,
+    )
+    prefix = f"agent.{call.stage}"
+    metrics.incr(f"{prefix}.calls")
+    metrics.observe(f"{prefix}.latency_ms", call.ms)
+    metrics.incr(f"{prefix}.input_tokens", call.input_tokens)
+    metrics.incr(f"{prefix}.output_tokens", call.output_tokens)
+    if cached:
+        metrics.incr(f"{prefix}.cache_hits")
+    if error is not None:
+        metrics.incr(f"{prefix}.errors")
+
+    trace = _current.get()
+    if trace is not None:
+        trace.calls.append(call)
+    _log("agent_call", trace_id=trace.id if trace else None, **asdict(call))
+    return call
+
+
+def count(name: str, value: int = 1) -> None:
+    """Count a pipeline event as the exercise.<name> metric and on the current trace."""
+    metrics.incr(f"exercise.{name}", value)
+    trace = _current.get()
+    if trace is not None:
+        trace.counts[name] = trace.counts.get(name, 0) + value
+
+
+@contextmanager
+def untraced() -> Iterator[None]:
+    """Agent calls in the block are recorded, but not on the current trace (e.g. calls shared by a batch)."""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def exercise_trace(**fields: Any) -> Iterator[ExerciseTrace]:
+    """
+    Collect the agent calls made inside the block, including in tasks it starts.
+
+    On exit the totals go to the exercise.* metrics and one "exercise" log
+    line with a per-stage breakdown, so the stage that dominates latency or
+    tokens can be read off directly.
+    """
+    trace = ExerciseTrace(**fields)
+    token = _current.set(trace)
+    error = None
+    try:
+        yield trace
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        _current.reset(token)
+        ms = (time.perf_counter() - trace.started) * 1000
+        stages = trace.stages()
+        input_tokens = sum(s["input_tokens"] for s in stages.values())
+        output_tokens = sum(s["output_tokens"] for s in stages.values())
+        metrics.observe("exercise.latency_ms", ms)
+        metrics.observe("exercise.agent_calls", len(trace.calls))
+        metrics.observe("exercise.input_tokens", input_tokens)
+        metrics.observe("exercise.output_tokens", output_tokens)
+        _log("exercise", trace_id=trace.id, ms=ms, error=error, agent_calls=len(trace.calls),
+             input_tokens=input_tokens, output_tokens=output_tokens, stages=stages, counts=trace.counts,
+             **trace.fields)
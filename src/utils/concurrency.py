@@ -0,0 +1,37 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, TypeVar
+
+from src.config import SEARCH_MAX_WORKERS
+
+T = TypeVar("T")
+
+# "io" runs leaf backend calls. "fanout" runs tasks that themselves wait on
+# "io" work, so the two never compete for the same threads and a saturated
+# pool cannot deadlock on its own nested waits.
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executor_lock = threading.Lock()
+
+
+def get_executor(pool: str = "io") -> ThreadPoolExecutor:
+    """Get the shared pool used to run blocking backend calls concurrently."""
+    executor = _executors.get(pool)
+    if executor is None:
+        with _executor_lock:
+            executor = _executors.get(pool)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS, thread_name_prefix=f"search-{pool}")
+                _executors[pool] = executor
+    return executor
+
+
+def submit_all(calls: List[Callable[[], T]], pool: str = "io") -> List[Future]:
+    """Start every call on a shared pool, preserving order."""
+    executor = get_executor(pool)
+    return [executor.submit(call) for call in calls]
+
+
+def cancel_all(futures: List[Future]) -> None:
+    """Cancel futures that have not started yet; running ones finish in the background."""
+    for future in futures:
+        future.cancel()
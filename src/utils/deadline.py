@@ -0,0 +1,115 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextvars import ContextVar
+from typing import Callable, List, TypeVar
+
+from src.config import ENDPOINT_BUDGETS_MS
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a pipeline stage runs out of its request's time budget."""
+
+
+class Deadline:
+    """
+    Time budget for one request, passed down through the search pipeline.
+
+    Stages check the remaining budget before starting work and skip or cut
+    short what no longer fits, recording themselves in `skipped` so the
+    handler can flag the response as partial. `cancel()` ends the budget
+    early, e.g. when the caller no longer wants the result.
+    """
+
+    def __init__(self, budget_ms: float | None):
+        self.expires_at = time.monotonic() + budget_ms / 1000 if budget_ms else None
+        self.skipped: List[str] = []
+        # Completed on cancel() to wake every wait() at once
+        self._cancelled: Future = Future()
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.skipped)
+
+    def remaining(self) -> float | None:
+        """Seconds left in the budget, or None when the request is unbounded."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.done()
+
+    def expired(self) -> bool:
+        return self.cancelled or (self.expires_at is not None and time.monotonic() >= self.expires_at)
+
+    def cancel(self) -> None:
+        """Expire now; stages waiting on the pipeline give up immediately."""
+        if not self._cancelled.done():
+            self.expires_at = time.monotonic()
+            self._cancelled.set_result(None)
+
+    def mark_partial(self, stage: str) -> None:
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+
+    def bound(self, call: Callable[[], T]) -> Callable[[], T]:
+        """
+        Wrap a call so backend requests it makes are limited to the remaining budget.
+
+        The HTTP client caps its timeouts by active_deadline(), so a call ends
+        soon after the budget instead of at the client's own read timeout,
+        whether it runs inline (run_within) or on the shared pool.
+        """
+        def run() -> T:
+            token = _active.set(self)
+            try:
+                return call()
+            finally:
+                _active.reset(token)
+        return run
+
+    def wait(self, future: Future):
+        """Wait for a future within the remaining budget."""
+        wait([future, self._cancelled], timeout=self.remaining(), return_when=FIRST_COMPLETED)
+        if not future.done():
+            raise DeadlineExceeded()
+        return future.result()
+
+
+_active: ContextVar[Deadline | None] = ContextVar("deadline", default=None)
+
+
+def active_deadline() -> Deadline | None:
+    """The deadline of the call running in this thread, set by Deadline.bound()."""
+    return _active.get()
+
+
+def for_endpoint(endpoint: str) -> Deadline:
+    """Start a deadline using the configured budget for the endpoint."""
+    return Deadline(ENDPOINT_BUDGETS_MS.get(endpoint))
+
+
+def run_within(deadline: Deadline | None, call: Callable[[], T]) -> T:
+    """
+    Run a blocking call within the deadline, on the calling thread.
+
+    Backend requests made by the call use the remaining budget as their
+    timeout (see Deadline.bound), so it returns or fails soon after the
+    budget runs out without a pool thread to wait on. Raises DeadlineExceeded
+    when the budget is already spent, or when the call fails after it ran out.
+    """
+    if deadline is None:
+        return call()
+    if deadline.expired():
+        raise DeadlineExceeded()
+    try:
+        return deadline.bound(call)()
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        if deadline.expired():
+            raise DeadlineExceeded() from e
+        raise
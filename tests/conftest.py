@@ -0,0 +1,79 @@
+import sys
+import os
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src.db.local import LocalDictionary
+
+
+def _entry(id, simplified, traditional, pinyin, definition, hsk, freq, radical, old=None, new=None):
+    return {
+        "id": id, "simplified": simplified, "traditional": traditional, "pinyin": pinyin,
+        "english_definitions": definition, "hsk_level": hsk, "frequency_rank": freq, "radical": radical,
+        "old_hsk_level": old if old is not None else hsk, "new_hsk_level": new if new is not None else hsk,
+    }
+
+
+def sample_tables():
+    """A small slice of the dictionary tables covering the shapes the code relies on."""
+    return {
+        "dictionaryentry": [
+            _entry(1, "你好", "你好", "ni3 hao3", "hello; hi", 1, 300, "亻"),
+            _entry(2, "好", "好", "hao3", "good; well; proper", 1, 20, "女"),
+            _entry(3, "好吃", "好吃", "hao3 chi1", "tasty; delicious", 2, 900, "女"),
+            _entry(4, "你", "你", "ni3", "you (informal)", 1, 10, "亻"),
+            _entry(5, "我", "我", "wo3", "I; me; my", 1, 5, "戈"),
+            _entry(6, "今天", "今天", "jin1 tian1", "today; at the present", 1, 150, "人"),
+            _entry(7, "想", "想", "xiang3", "to think; to want; to miss", 1, 80, "心"),
+            _entry(8, "去", "去", "qu4", "to go; to leave", 1, 60, "厶"),
+            _entry(9, "火车站", "火車站", "huo3 che1 zhan4", "train station", 2, 4000, "火"),
+            _entry(10, "火车", "火車", "huo3 che1", "train", 2, 2500, "火"),
+            _entry(11, "车站", "車站", "che1 zhan4", "rail station; bus stop", 2, 3000, "车"),
+            _entry(12, "谢谢", "謝謝", "xie4 xie5", "to thank; thanks", 1, 400, "讠"),
+            _entry(13, "爱", "愛", "ai4", "to love; affection", 1, 200, "爫"),
+            _entry(14, "吃", "吃", "chi1", "to eat; to consume", 1, 120, "口"),
+            _entry(15, "饭", "飯", "fan4", "cooked rice; meal", 1, 700, "饣"),
+            _entry(16, "吃饭", "吃飯", "chi1 fan4", "to have a meal; to eat", 1, 500, "口"),
+            _entry(17, "好人", "好人", "hao3 ren2", "good person", None, 6000, "女"),
+            _entry(18, "号", "號", "hao4", "number; day of a month", 1, 350, "口"),
+            _entry(19, "车", "車", "che1", "car; vehicle", 1, 250, "车"),
+            _entry(20, "站", "站", "zhan4", "station; to stand", 1, 450, "立"),
+        ],
+        "part_of_speech": [
+            {"id": 1, "entry_id": 1, "pos": "i"},
+            {"id": 2, "entry_id": 2, "pos": "adj"},
+            {"id": 3, "entry_id": 9, "pos": "n"},
+            {"id": 4, "entry_id": 10, "pos": "n"},
+            {"id": 5, "entry_id": 11, "pos": "n"},
+            {"id": 6, "entry_id": 7, "pos": "v"},
+            {"id": 7, "entry_id": 8, "pos": "v"},
+            {"id": 8, "entry_id": 14, "pos": "v"},
+            {"id": 9, "entry_id": 15, "pos": "n"},
+            {"id": 10, "entry_id": 19, "pos": "n"},
+            {"id": 11, "entry_id": 20, "pos": "n"},
+        ],
+        "classifier": [
+            {"id": 1, "entry_id": 10, "classifier": "列"},
+            {"id": 2, "entry_id": 19, "classifier": "辆"},
+            {"id": 3, "entry_id": 15, "classifier": "顿"},
+        ],
+        "transcription": [
+            {"id": 1, "entry_id": 1, "system": "pinyin", "value": "nǐ hǎo"},
+            {"id": 2, "entry_id": 1, "system": "bopomofo", "value": "ㄋㄧˇ ㄏㄠˇ"},
+            {"id": 3, "entry_id": 2, "system": "pinyin", "value": "hǎo"},
+        ],
+        "meaning": [
+            {"id": 1, "entry_id": 1, "definition": "hello"},
+            {"id": 2, "entry_id": 1, "definition": "hi"},
+            {"id": 3, "entry_id": 2, "definition": "good"},
+            {"id": 4, "entry_id": 9, "definition": "railway station"},
+        ],
+    }
+
+
+@pytest.fixture
+def sample_dictionary():
+    return LocalDictionary(sample_tables())
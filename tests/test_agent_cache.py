@@ -0,0 +1,77 @@
+import time
+from types import SimpleNamespace
+from typing import List, Union
+
+from pydantic import BaseModel
+
+from src.utils.agent_cache import AgentCache, cache_key, decode_output, encode_output
+from src.utils.metrics import metrics
+
+
+class Blank(BaseModel):
+    text: str
+
+
+class Choice(BaseModel):
+    options: List[str]
+
+
+def _agent(**overrides):
+    fields = {"name": "Exercise Generator", "instructions": "Create exercises.", "model": None,
+              "output_type": None, "tools": []}
+    fields.update(overrides)
+    return SimpleNamespace(**fields)
+
+
+def test_key_ignores_whitespace_but_not_content():
+    agent = _agent()
+    assert cache_key(agent, "Create an exercise\n      using 你好") == cache_key(agent, "Create an exercise using 你好")
+    assert cache_key(agent, "using 你好") != cache_key(agent, "using 谢谢")
+    assert cache_key(agent, "using 你好") != cache_key(_agent(model="gpt-4o-mini"), "using 你好")
+    assert cache_key(agent, "using 你好") != cache_key(_agent(instructions="Evaluate."), "using 你好")
+
+
+def test_structured_outputs_round_trip():
+    agent = _agent(output_type=Union[Blank, Choice])
+    decoded = decode_output(agent, encode_output(agent, Choice(options=["a", "b"])))
+    assert decoded == Choice(options=["a", "b"])
+    assert decode_output(_agent(), encode_output(_agent(), "approved")) == "approved"
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache = AgentCache(str(tmp_path / "cache.sqlite3"), ttl_s=60, max_entries=2, max_bytes=10_000)
+    hits = metrics.snapshot()["counters"].get("agent_cache.hits", 0)
+    cache.put("a", "agent", '"A"')
+    time.sleep(0.01)
+    cache.put("b", "agent", '"B"')
+    time.sleep(0.01)
+    assert cache.get("a") == '"A"'  # a is now more recently used than b
+    cache.put("c", "agent", '"C"')
+    assert cache.get("b") is None
+    assert cache.get("a") == '"A"' and cache.get("c") == '"C"'
+    assert metrics.snapshot()["counters"]["agent_cache.hits"] == hits + 3
+
+    cache.ttl_s = 0
+    time.sleep(0.01)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_size_bound(tmp_path):
+    cache = AgentCache(str(tmp_path / "cache.sqlite3"), ttl_s=60, max_entries=100, max_bytes=10)
+    cache.put("a", "agent", '"12345"')
+    time.sleep(0.01)
+    cache.put("b", "agent", '"67890"')
+    assert cache.get("a") is None and cache.get("b") == '"67890"'
+
+
+def test_broken_database_is_a_miss_not_a_failure(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    path.write_bytes(b"not a sqlite database" * 100)
+    errors = metrics.snapshot()["counters"].get("agent_cache.errors", 0)
+
+    cache = AgentCache(str(path), ttl_s=60, max_entries=100, max_bytes=10_000)
+    assert cache.get("a") is None
+    cache.put("a", "agent", '"A"')  # skipped, the caller keeps its result
+    assert cache.get("a") is None
+    assert metrics.snapshot()["counters"]["agent_cache.errors"] == errors + 4
@@ -0,0 +1,103 @@
+import asyncio
+import json
+import logging
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.exercises.batching import MicroBatcher
+from src.utils.agent_trace import count, exercise_trace, record_agent_call, stage_name
+from src.utils.metrics import metrics
+
+
+def _lines(caplog, event):
+    return [json.loads(r.getMessage()) for r in caplog.records
+            if r.name == "src.utils.agent_trace" and json.loads(r.getMessage())["event"] == event]
+
+
+def test_stage_name():
+    assert stage_name("Exercise Generator") == "exercise_generator"
+    assert stage_name("Batch-Formatter") == "batch_formatter"
+
+
+def test_agent_call_metrics():
+    before = metrics.snapshot()["counters"]
+    usage = SimpleNamespace(input_tokens=120, output_tokens=30)
+    record_agent_call("Trace Test Agent", time.perf_counter(), usage=usage)
+    record_agent_call("Trace Test Agent", time.perf_counter(), cached=True)
+    record_agent_call("Trace Test Agent", time.perf_counter(), error=RuntimeError("boom"))
+
+    snapshot = metrics.snapshot()
+    counters = snapshot["counters"]
+    delta = lambda name: counters.get(name, 0) - before.get(name, 0)
+    assert delta("agent.trace_test_agent.calls") == 3
+    assert delta("agent.trace_test_agent.cache_hits") == 1
+    assert delta("agent.trace_test_agent.errors") == 1
+    assert delta("agent.trace_test_agent.input_tokens") == 120
+    assert delta("agent.trace_test_agent.output_tokens") == 30
+    assert snapshot["histograms"]["agent.trace_test_agent.latency_ms"]["count"] >= 3
+
+
+def test_exercise_trace_totals_stages_and_logs(caplog):
+    caplog.set_level(logging.INFO, logger="src.utils.agent_trace")
+
+    async def stage(name, tokens):
+        record_agent_call(name, time.perf_counter(), usage=SimpleNamespace(input_tokens=tokens, output_tokens=1))
+
+    async def run():
+        with exercise_trace(source="test") as trace:
+            # Calls from tasks started inside the block belong to the trace too
+            await asyncio.gather(stage("Generator", 100), stage("Generator", 50))
+            await stage("Formatter", 10)
+            count("regenerations")
+        return trace
+
+    trace = asyncio.run(run())
+    # Outside the block nothing is added to it
+    record_agent_call("Generator", time.perf_counter())
+    count("regenerations")
+    assert len(trace.calls) == 3 and trace.counts == {"regenerations": 1}
+
+    calls = _lines(caplog, "agent_call")
+    assert [c["trace_id"] for c in calls] == [trace.id] * 3 + [None]
+    [summary] = _lines(caplog, "exercise")
+    assert summary["trace_id"] == trace.id and summary["source"] == "test" and summary["error"] is None
+    assert summary["agent_calls"] == 3 and summary["input_tokens"] == 160 and summary["output_tokens"] == 3
+    assert list(summary["stages"]) == ["generator", "formatter"]
+    assert summary["stages"]["generator"]["calls"] == 2 and summary["stages"]["generator"]["input_tokens"] == 150
+    assert summary["counts"] == {"regenerations": 1}
+
+
+def test_exercise_trace_logs_failures(caplog):
+    caplog.set_level(logging.INFO, logger="src.utils.agent_trace")
+    with pytest.raises(ValueError):
+        with exercise_trace(source="test"):
+            raise ValueError("no exercise")
+    [summary] = _lines(caplog, "exercise")
+    assert summary["error"] == "ValueError"
+
+
+def test_batched_calls_are_not_charged_to_one_request():
+    async def run_one(word, on_event):
+        record_agent_call("Generator", time.perf_counter())
+        return word
+
+    async def run_batch(items, on_events):
+        record_agent_call("Generator", time.perf_counter())
+        return [item["word"] for item in items]
+
+    async def request(batcher, word):
+        with exercise_trace(source="test") as trace:
+            await batcher.submit({"word": word}, lambda event, data: None)
+        return trace
+
+    async def run():
+        batcher = MicroBatcher(run_one, run_batch, window_ms=20, max_size=2)
+        batched = await asyncio.gather(request(batcher, "a"), request(batcher, "b"))
+        alone = await request(batcher, "c")
+        return batched, alone
+
+    batched, alone = asyncio.run(run())
+    assert [len(trace.calls) for trace in batched] == [0, 0]
+    assert len(alone.calls) == 1
@@ -0,0 +1,48 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import endpoints
+from src.db import connection
+from src.db.local import set_local_dictionary
+from src.search.annotate import HeadwordAutomaton
+
+from conftest import sample_tables
+
+
+def _words(automaton, text):
+    return [(text[start:end], headword is not None) for start, end, headword in automaton.segment(text)]
+
+
+def test_segments_sentence_into_most_probable_words():
+    automaton = HeadwordAutomaton(sample_tables()["dictionaryentry"])
+    assert _words(automaton, "我今天想去火车站") == [
+        ("我", True), ("今天", True), ("想", True), ("去", True), ("火车站", True),
+    ]
+    assert _words(automaton, "謝謝你") == [("謝謝", True), ("你", True)]
+    assert _words(automaton, "好人好吃") == [("好人", True), ("好吃", True)]
+
+
+def test_unknown_text_is_kept_as_single_tokens():
+    automaton = HeadwordAutomaton(sample_tables()["dictionaryentry"])
+    assert _words(automaton, "你好, I want 吃饭") == [("你好", True), (", I want ", False), ("吃饭", True)]
+    assert _words(automaton, "龍") == [("龍", False)]
+    assert automaton.segment("") == []
+
+
+def test_annotate_endpoint_batches_entries(monkeypatch, sample_dictionary):
+    monkeypatch.setattr(connection, "DICTIONARY_SOURCE", "local")
+    set_local_dictionary(sample_dictionary)
+    endpoints.get_annotator(connection.get_connection).build()
+    app = FastAPI()
+    app.include_router(endpoints.router)
+    try:
+        body = TestClient(app).post("/annotate", json={"text": "你好火车站，你好"}).json()
+    finally:
+        set_local_dictionary(None)
+
+    assert [t["text"] for t in body["tokens"]] == ["你好", "火车站", "，", "你好"]
+    assert body["tokens"][1] == {
+        "text": "火车站", "start": 2, "end": 5, "entry_id": 9, "pinyin": "huo3 che1 zhan4", "definition": "train station",
+    }
+    assert sorted(body["entries"]) == ["1", "9"]
+    assert body["entries"]["9"]["meanings"] == ["railway station"]
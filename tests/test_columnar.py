@@ -0,0 +1,63 @@
+from src.db.columnar import EntryView, SnapshotDictionary, load_dictionary, write_snapshot
+from src.db.local import LocalClient
+
+from conftest import sample_tables
+
+
+def _snapshot(tmp_path):
+    path = str(tmp_path / "dictionary.cdict")
+    write_snapshot(sample_tables(), path, version=3)
+    return load_dictionary(path)
+
+
+def test_snapshot_round_trips_entries(tmp_path):
+    dictionary = _snapshot(tmp_path)
+    assert isinstance(dictionary, SnapshotDictionary)
+    assert dictionary.version == 3
+    expected = {e["id"]: e for e in sample_tables()["dictionaryentry"]}
+    for entry_id, row in expected.items():
+        view = dictionary.entry(entry_id)
+        assert isinstance(view, EntryView)
+        assert {k: view[k] for k in row} == row
+    assert dictionary.entry(9999) is None
+
+
+def test_snapshot_serves_local_queries(tmp_path, sample_dictionary):
+    snapshot_client = LocalClient(_snapshot(tmp_path))
+    memory_client = LocalClient(sample_dictionary)
+
+    def queries(client):
+        return [
+            client.table("dictionaryentry").select("id,simplified").or_("simplified.eq.車站,traditional.eq.車站").execute(),
+            client.table("dictionaryentry").select("id").or_("simplified.eq.你好,traditional.eq.你好").execute(),
+            client.table("dictionaryentry").select("id", count="exact").ilike("pinyin", "hao%")
+            .order("hsk_level").order("frequency_rank").range(0, 1).execute(),
+            client.table("meaning").select("entry_id,definition").in_("entry_id", [1, 9]).execute(),
+            client.table("transcription").select("entry_id,system,value").eq("entry_id", 1).execute(),
+        ]
+
+    for snapshot_resp, memory_resp in zip(queries(snapshot_client), queries(memory_client)):
+        assert snapshot_resp.count == memory_resp.count
+        assert sorted(map(repr, snapshot_resp.data)) == sorted(map(repr, memory_resp.data))
+
+
+def test_entry_view_overlay_does_not_touch_snapshot(tmp_path):
+    dictionary = _snapshot(tmp_path)
+    view = dictionary.entry(2)
+    view["match_type"] = "exact"
+    assert view["match_type"] == "exact"
+    assert dict(view)["simplified"] == "好"
+    assert "match_type" not in dictionary.entry(2)
+
+
+def test_snapshot_queries_return_lazy_rows(tmp_path):
+    client = LocalClient(_snapshot(tmp_path))
+    [row] = client.table("dictionaryentry").select("id,simplified").eq("id", 2).execute().data
+    assert isinstance(row, EntryView)
+    assert dict(row) == {"id": 2, "simplified": "好"}
+    assert "pinyin" not in row and row.get("pinyin") is None
+    row["match_type"] = "exact"
+    assert dict(row) == {"id": 2, "simplified": "好", "match_type": "exact"}
+    # Annotations stay on the returned row
+    [again] = client.table("dictionaryentry").select("*").eq("id", 2).execute().data
+    assert isinstance(again, EntryView) and "match_type" not in again
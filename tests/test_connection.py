@@ -0,0 +1,48 @@
+import threading
+import time
+
+from src.db import connection
+
+
+def test_concurrent_init_creates_one_client(monkeypatch):
+    monkeypatch.setenv("SUPABASE_DB_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "test-key")
+    created = []
+    real_create_client = connection.create_client
+
+    def slow_create_client(*args, **kwargs):
+        created.append(1)
+        time.sleep(0.05)
+        return real_create_client(*args, **kwargs)
+
+    monkeypatch.setattr(connection, "create_client", slow_create_client)
+    connection.close_clients()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(connection.get_connection())) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    try:
+        assert len(created) == 1
+        assert all(r is results[0] for r in results)
+        # Every thread shares the configured, pooled HTTP client
+        assert results[0]._client.postgrest.session is connection._http_client
+    finally:
+        connection.close_clients()
+
+
+def test_backend_connection_has_no_fallback(monkeypatch):
+    monkeypatch.setenv("SUPABASE_DB_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "test-key")
+    connection.close_clients()
+    try:
+        resilient = connection._init_backend_client()
+        backend = connection.get_backend_connection()
+        assert backend is resilient._client
+        # Still the pooled HTTP client
+        assert backend.postgrest.session is connection._http_client
+    finally:
+        connection.close_clients()
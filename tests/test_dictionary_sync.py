@@ -0,0 +1,139 @@
+import pytest
+
+from src.db.columnar import load_dictionary, write_snapshot
+from src.db.local import LocalClient, LocalDictionary, add_dictionary_listener, get_local_dictionary, set_local_dictionary
+from src.db.sync import DictionarySync
+
+from conftest import sample_tables
+
+WATERMARK = "2026-01-01T00:00:00"
+
+
+def _stamped_tables():
+    tables = sample_tables()
+    for rows in tables.values():
+        for row in rows:
+            row["updated_at"] = WATERMARK
+    return tables
+
+
+@pytest.fixture(params=["memory", "columnar"])
+def local(request, tmp_path):
+    tables = _stamped_tables()
+    if request.param == "memory":
+        dictionary = LocalDictionary(tables, watermark=WATERMARK)
+    else:
+        path = str(tmp_path / "dictionary.cdict")
+        write_snapshot(tables, path, watermark=WATERMARK)
+        dictionary = load_dictionary(path)
+    set_local_dictionary(dictionary)
+    yield dictionary
+    set_local_dictionary(None)
+
+
+def _lookup(dictionary, text):
+    return LocalClient(dictionary).table("dictionaryentry").select("id,english_definitions").or_(
+        f"simplified.eq.{text},traditional.eq.{text}").execute().data
+
+
+def test_with_changes_patches_indexes_without_touching_old_version(sample_dictionary):
+    assert _lookup(sample_dictionary, "好")[0]["english_definitions"] == "good; well; proper"
+    changed = dict(sample_dictionary.entry(2), simplified="好好", traditional="好好",
+                   english_definitions="very good")
+    updated = sample_dictionary.with_changes([changed], {"meaning": {2: [{"id": 99, "entry_id": 2, "definition": "fine"}]}})
+
+    assert updated.version == sample_dictionary.version + 1
+    assert _lookup(updated, "好") == []
+    assert _lookup(updated, "好好") == [{"id": 2, "english_definitions": "very good"}]
+    assert [r["definition"] for r in updated.index("meaning", "entry_id")["2"]] == ["fine"]
+    # The previous version keeps serving its own data
+    assert _lookup(sample_dictionary, "好")[0]["english_definitions"] == "good; well; proper"
+    assert [r["definition"] for r in sample_dictionary.index("meaning", "entry_id")["2"]] == ["good"]
+
+
+def test_with_changes_applies_deltas_by_key(sample_dictionary, monkeypatch):
+    from src.db import local as local_module
+
+    first = sample_dictionary.with_changes([dict(sample_dictionary.entry(2), english_definitions="fine")], {})
+    entries = list(first.tables["dictionaryentry"])
+    assert len(entries) == len(first.tables["dictionaryentry"]) == len(list(sample_dictionary.tables["dictionaryentry"]))
+    assert [e["english_definitions"] for e in entries if e["id"] == 2] == ["fine"]
+
+    # Later changes patch the id index in place of a pass over the table
+    def no_scan(self):
+        raise AssertionError("table scanned")
+    monkeypatch.setattr(local_module._IndexedRows, "__iter__", no_scan)
+    second = first.with_changes([dict(first.entry(2), english_definitions="great"), {"id": 500, "simplified": "新"}],
+                                {"meaning": {2: []}})
+    assert second.entry(2)["english_definitions"] == "great" and second.entry(500)["simplified"] == "新"
+    assert len(second.tables["dictionaryentry"]) == len(entries) + 1
+    assert "2" not in second.index("meaning", "entry_id")
+    assert first.entry(2)["english_definitions"] == "fine"
+
+
+def test_sync_applies_only_changed_rows(local, sample_dictionary):
+    backend_tables = _stamped_tables()
+    later = "2026-01-02T00:00:00"
+    backend_tables["dictionaryentry"][1].update(english_definitions="good; fine", updated_at=later)
+    backend_tables["meaning"] = [r for r in backend_tables["meaning"] if r["entry_id"] != 1]
+    backend_tables["meaning"].append({"id": 50, "entry_id": 1, "definition": "hey", "updated_at": later})
+    backend = LocalClient(LocalDictionary(backend_tables))
+
+    swaps = []
+    add_dictionary_listener(lambda old, new: swaps.append((old, new)))
+    sync = DictionarySync(lambda: backend)
+
+    assert sync.sync_once() == 2
+    current = get_local_dictionary()
+    assert swaps[-1] == (local, current)
+    assert current.watermark == later
+    assert current.entry(2)["english_definitions"] == "good; fine"
+    assert [r["definition"] for r in current.index("meaning", "entry_id")["1"]] == ["hey"]
+    assert local.entry(2)["english_definitions"] == "good; well; proper"
+
+    # Nothing new since the watermark: no swap
+    assert sync.sync_once() == 0
+    assert get_local_dictionary() is current
+
+
+def test_snapshot_without_watermark_starts_from_its_newest_rows():
+    set_local_dictionary(LocalDictionary(_stamped_tables()))
+    try:
+        backend_tables = _stamped_tables()
+        backend_tables["dictionaryentry"][1].update(english_definitions="good; fine", updated_at="2026-01-02T00:00:00")
+        sync = DictionarySync(lambda: LocalClient(LocalDictionary(backend_tables)))
+        # Only the changed entry, not every table in full
+        assert sync.sync_once() == 1
+        assert get_local_dictionary().entry(2)["english_definitions"] == "good; fine"
+        assert sync.sync_once() == 0
+    finally:
+        set_local_dictionary(None)
+
+
+def test_index_rebuilds_after_syncs_are_coalesced(sample_dictionary):
+    import time
+    from src.search.dictionary_index import BackgroundIndex
+
+    class Counting(BackgroundIndex):
+        builds = 0
+
+        def build_index(self, entries):
+            Counting.builds += 1
+            return len(entries)
+
+    set_local_dictionary(sample_dictionary)
+    try:
+        index = Counting(lambda: None, rebuild_interval_s=0.2)
+        index.rebuild_in_background()
+        while index.get() is None:
+            time.sleep(0.01)
+        # A burst of syncs right after a build: one rebuild, once the interval has passed
+        for _ in range(5):
+            index.rebuild_in_background()
+        time.sleep(0.1)
+        assert Counting.builds == 1
+        while index._building:
+            time.sleep(0.01)
+        assert Counting.builds == 2
+    finally:
+        set_local_dictionary(None)
@@ -0,0 +1,43 @@
+from conftest import sample_tables
+
+from src.exercises.distractors import (SHARED_CHARACTER, SIMILAR_PINYIN, DistractorIndex, question_rng,
+                                       repair_options)
+
+INDEX = DistractorIndex(sample_tables()["dictionaryentry"], sample_tables()["part_of_speech"])
+
+
+def test_distractors_cover_each_kind_of_confusion():
+    distractors = {d["word"]: d["reason"] for d in INDEX.for_word("好", n=6)}
+    # Shares 好, and hao4 against hao3
+    assert distractors["你好"] == SHARED_CHARACTER
+    assert distractors["号"] == SIMILAR_PINYIN
+    assert "好" not in distractors
+
+    # Written in the requested script, and the target is never its own distractor
+    words = [d["word"] for d in INDEX.for_word("火车", script="traditional", n=6)]
+    assert words and all(w != "火車" for w in words) and "車站" in words
+    assert INDEX.for_word("喝茶") == []
+
+
+def test_multiple_choice_places_the_word_among_distractors():
+    options, answer = INDEX.multiple_choice("火车", "traditional", question_rng("火车", "traditional"))
+    assert len(options) == 4 and len(set(options)) == 4 and options[answer] == "火車"
+    # Seeded per word, so the same request gets the same options
+    assert INDEX.multiple_choice("火车", "traditional", question_rng("火车", "traditional")) == (options, answer)
+    # Too few candidates for three distractors
+    assert INDEX.multiple_choice("谢谢", "simplified", question_rng("谢谢", "simplified")) is None
+
+
+def test_repair_options_fixes_only_broken_questions():
+    exercise = {
+        "exercise_type": "multiple_choice",
+        "questions": [
+            {"text": "Which word means 'train'?", "options": ["火车", "火车", "站"]},
+            {"text": "Which word means 'good'?", "options": ["好", "你", "我", "去"]},
+        ],
+        "answers": [0, 0],
+    }
+    assert repair_options(exercise, ["火车", "好"], "simplified", INDEX)
+    first = exercise["questions"][0]
+    assert len(set(first["options"])) == 4 and first["options"][exercise["answers"][0]] == "火车"
+    assert exercise["questions"][1]["options"] == ["好", "你", "我", "去"] and exercise["answers"][1] == 0
@@ -0,0 +1,54 @@
+import asyncio
+
+from src.exercises.batching import MicroBatcher
+
+
+class Recorder:
+    def __init__(self):
+        self.singles = []
+        self.batches = []
+
+    async def run_one(self, word, on_event):
+        self.singles.append(word)
+        on_event("single", {"word": word})
+        return f"one:{word}"
+
+    async def run_batch(self, items, on_events):
+        self.batches.append([item["word"] for item in items])
+        if any(item["word"] == "bad" for item in items):
+            raise ValueError("batch failed")
+        for item, on_event in zip(items, on_events):
+            on_event("batched", {"word": item["word"]})
+        return [f"batch:{item['word']}" for item in items]
+
+
+def test_requests_within_the_window_share_one_call():
+    async def run():
+        recorder = Recorder()
+        batcher = MicroBatcher(recorder.run_one, recorder.run_batch, window_ms=20, max_size=3)
+        events = {}
+        results = await asyncio.gather(*(
+            batcher.submit({"word": word}, lambda event, data: events.setdefault(data["word"], event))
+            for word in ("a", "b", "c", "d")
+        ))
+        # The fourth did not fit and waited out its own window, alone
+        assert results == ["batch:a", "batch:b", "batch:c", "one:d"]
+        assert recorder.batches == [["a", "b", "c"]] and recorder.singles == ["d"]
+        assert events == {"a": "batched", "b": "batched", "c": "batched", "d": "single"}
+
+    asyncio.run(run())
+
+
+def test_batch_errors_reach_every_caller_and_zero_window_disables_batching():
+    async def run():
+        recorder = Recorder()
+        batcher = MicroBatcher(recorder.run_one, recorder.run_batch, window_ms=20, max_size=4)
+        results = await asyncio.gather(*(batcher.submit({"word": w}, lambda e, d: None) for w in ("bad", "x")),
+                                       return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+
+        unbatched = MicroBatcher(recorder.run_one, recorder.run_batch, window_ms=0)
+        assert await asyncio.gather(*(unbatched.submit({"word": w}, lambda e, d: None) for w in ("y", "z"))) == ["one:y", "one:z"]
+        assert recorder.batches == [["bad", "x"]]
+
+    asyncio.run(run())
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import sys
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.exercise_routes import router
+from src.exercises import jobs
+from src.exercises.jobs import DONE, JobPriority, JobQueue, JobQueueFull
+
+
+def test_jobs_run_in_priority_order_and_full_queue_rejects():
+    async def run():
+        order = []
+        release = asyncio.Event()
+
+        async def generate(name, on_event):
+            if name == "blocker":
+                await release.wait()
+            order.append(name)
+            return {"name": name}
+
+        queue = JobQueue(generate, concurrency=1, max_queued=3)
+        queue.start()
+        blocker = queue.submit({"name": "blocker"})
+        await asyncio.sleep(0)  # the worker takes the blocker; the rest wait
+        low = queue.submit({"name": "low"}, JobPriority.LOW)
+        normal = queue.submit({"name": "normal"})
+        high = queue.submit({"name": "high"}, JobPriority.HIGH)
+        with pytest.raises(JobQueueFull):
+            queue.submit({"name": "rejected"})
+
+        release.set()
+        await low.wait()
+        assert order == ["blocker", "high", "normal", "low"]
+        assert all(job.status == DONE for job in (blocker, low, normal, high))
+        assert high.snapshot() == {"job_id": high.id, "status": DONE, "priority": "high", "result": {"name": "high"}}
+        await queue.stop()
+
+    asyncio.run(run())
+
+
+def test_identical_jobs_share_one_run_and_take_the_higher_priority():
+    async def run():
+        runs = []
+        release = asyncio.Event()
+
+        async def generate(name, on_event):
+            if name == "blocker":
+                await release.wait()
+            runs.append(name)
+            return {"name": name}
+
+        queue = JobQueue(generate, concurrency=1, max_queued=10)
+        queue.start()
+        queue.submit({"name": "blocker"})
+        await asyncio.sleep(0)
+        normal = queue.submit({"name": "normal"})
+        low = queue.submit({"name": "shared"}, JobPriority.LOW)
+        again = queue.submit({"name": "shared"}, JobPriority.HIGH)
+        assert again is low and low.priority == JobPriority.HIGH
+
+        release.set()
+        await normal.wait()
+        assert runs == ["blocker", "shared", "normal"]
+        # Finished jobs are not reused
+        assert queue.submit({"name": "shared"}) is not low
+        await queue.stop()
+
+    asyncio.run(run())
+
+
+def test_draft_deltas_are_not_kept_for_replay():
+    async def collect(job):
+        return [event async for event in job.updates()]
+
+    async def run():
+        job = jobs.Job({}, JobPriority.NORMAL)
+        live = asyncio.create_task(collect(job))
+        await asyncio.sleep(0)
+        job.emit("draft_delta", {"text": "你"})
+        job.emit("draft_delta", {"text": "好"})
+        joined = asyncio.create_task(collect(job))
+        await asyncio.sleep(0)
+        job.emit("draft_delta", {"text": "!"})
+        job.emit("draft", {"text": "你好!"})
+        job.result = {}
+        job._set_status(DONE)
+        return await live, await joined, await collect(job), job
+
+    live, joined, late, job = asyncio.run(run())
+    assert [data["text"] for event, data in live if event == "draft_delta"] == ["你", "好", "!"]
+    # A watcher joining mid-draft gets the text so far as one piece, then the rest live
+    assert [data["text"] for event, data in joined if event == "draft_delta"] == ["你好", "!"]
+    # Replay after the draft is complete sends it once
+    assert [event for event, _ in late] == ["status", "draft", "status"]
+    assert all(event != "draft_delta" for event, _ in job.events) and not job._watchers
+
+
+async def _generate(words, exercise_types, character_type, engine, on_event):
+    await asyncio.sleep(0.01)
+    if words == ["坏"]:
+        raise ValueError("model unavailable")
+    for delta in ("_____ ", "(", words[0], ")"):
+        on_event("draft_delta", {"text": delta})
+    exercise = {"exercise_type": "fill_in_blank", "questions": [{"text": "_____"}], "answers": words}
+    on_event("formatted", exercise)
+    return exercise
+
+
+@pytest.fixture
+def client():
+    @asynccontextmanager
+    async def lifespan(app):
+        jobs.start_job_queue(_generate)
+        yield
+        await jobs.stop_job_queue()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(router)
+    with TestClient(app) as client:
+        yield client
+
+
+def _events(stream):
+    """(event, data) pairs from a server-sent event stream."""
+    events = []
+    for block in "".join(stream.iter_text()).split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        if fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def _request(word, priority=None):
+    body = {"words": [{"word": word, "exercise_type": "fill in the blank", "type": "simplified"}]}
+    if priority:
+        body["priority"] = priority
+    return body
+
+
+def test_submit_then_poll_and_stream(client):
+    resp = client.post("/exercise-jobs", json=_request("谢谢", "high"))
+    assert resp.status_code == 202
+    job = resp.json()
+    assert job["status"] == "queued" and job["priority"] == "high"
+
+    with client.stream("GET", f"/exercise-jobs/{job['job_id']}/events") as stream:
+        events = _events(stream)
+    assert events[-1][0] == "status"
+    assert events[-1][1]["status"] == DONE and events[-1][1]["result"]["answers"] == ["谢谢"]
+
+    polled = client.get(f"/exercise-jobs/{job['job_id']}").json()
+    assert polled == events[-1][1]
+    assert client.get("/exercise-jobs/unknown").status_code == 404
+
+
+def test_generate_exercise_waits_for_its_job(client):
+    resp = client.post("/generate-exercise", json=_request("吃饭"))
+    assert resp.status_code == 200 and resp.json()["answers"] == ["吃饭"]
+
+    resp = client.post("/generate-exercise", json=_request("坏"))
+    assert resp.status_code == 500
+    assert resp.json()["detail"] == "Error generating exercise: model unavailable"
+
+
+def test_generate_exercise_stream_sends_each_stage(client):
+    with client.stream("POST", "/generate-exercise/stream", json=_request("吃饭")) as stream:
+        assert stream.headers["content-type"].startswith("text/event-stream")
+        events = _events(stream)
+
+    assert [event for event, _ in events] == ["status", "status", "draft_delta", "draft_delta", "draft_delta",
+                                              "draft_delta", "formatted", "status"]
+    assert "".join(data["text"] for event, data in events if event == "draft_delta") == "_____ (吃饭)"
+    assert [data["status"] for event, data in events if event == "status"] == ["queued", "running", DONE]
+    assert events[-1][1]["result"] == events[-2][1]
+
+
+def test_app_serves_without_the_exercise_pipeline(monkeypatch):
+    from src import app as app_module
+
+    # A failing import of the pipeline (e.g. a broken agents SDK) leaves the rest of the app up
+    monkeypatch.setitem(sys.modules, "src.exercises.pipeline", None)
+    monkeypatch.setattr(jobs, "_job_queue", None)
+    assert app_module._exercise_pipeline() is None
+
+    client = TestClient(app_module.app)
+    paths = client.get("/openapi.json").json()["paths"]
+    assert "/lookup" in paths and "/exercise-jobs" in paths
+    body = {"words": [{"word": "好", "exercise_type": "multiple choice", "type": "simplified"}]}
+    assert client.post("/exercise-jobs", json=body).status_code == 503
+    assert client.post("/generate-exercise", json=body).status_code == 503
@@ -0,0 +1,91 @@
+import asyncio
+
+from conftest import sample_tables
+
+from src.exercises.pool import ExercisePool, hot_entries, merge_exercises
+
+
+def _exercise(word, exercise_type="fill in the blank"):
+    if exercise_type == "fill in the blank":
+        return {"exercise_type": "fill_in_blank", "questions": [{"text": f"_____ ({word})"}], "answers": [word]}
+    return {"exercise_type": "multiple_choice", "questions": [{"text": word, "options": ["a", "b", "c", word]}], "answers": [3]}
+
+
+class FakeGenerate:
+    def __init__(self, passed=True):
+        self.calls = []
+        self.passed = passed
+
+    async def __call__(self, words, exercise_types, script, variant):
+        self.calls.append((words[0], exercise_types[0], script, variant))
+        return _exercise(words[0], exercise_types[0]), self.passed
+
+
+async def _drain(pool):
+    while pool._queue.qsize() or any(pool._pending.values()):
+        await asyncio.sleep(0)
+
+
+def test_hot_entries_are_frequent_words_up_to_the_hsk_level():
+    hot = [e["simplified"] for e in hot_entries(sample_tables()["dictionaryentry"], count=4, max_hsk=1)]
+    assert hot == ["我", "你", "好", "去"]
+
+
+def test_pool_fills_serves_and_refills():
+    async def run():
+        generate = FakeGenerate()
+        pool = ExercisePool(generate, depth=2, concurrency=2)
+        pool.add_words([e for e in sample_tables()["dictionaryentry"] if e["simplified"] in ("谢谢", "吃饭")],
+                       ["simplified", "traditional"])
+        pool.start()
+        await _drain(pool)
+        # 2 words x 2 types x 2 scripts, 2 deep
+        assert len(generate.calls) == 16 and pool.size == 16
+
+        # The simplified form of a word finds the traditional pool
+        exercise_type, pooled, cold = pool.take(["谢谢", "喝茶"], ["fill in the blank"], "traditional")
+        assert exercise_type == "fill in the blank" and cold == ["喝茶"]
+        assert [exercise["answers"] for _, exercise in pooled] == [["謝謝"]]
+
+        await _drain(pool)
+        assert pool.size == 16
+        # The replacement asks for a new variant
+        assert generate.calls[-1] == ("謝謝", "fill in the blank", "traditional", 2)
+        await pool.stop()
+
+    asyncio.run(run())
+
+
+def test_take_prefers_the_type_covering_most_words_and_put_back_restores():
+    async def run():
+        pool = ExercisePool(FakeGenerate(), depth=1, concurrency=1)
+        pool.add_words([e for e in sample_tables()["dictionaryentry"] if e["simplified"] in ("谢谢", "吃饭")], ["simplified"])
+        pool._items[("谢谢", "multiple choice", "simplified")].append(_exercise("谢谢", "multiple choice"))
+        pool._items[("吃饭", "multiple choice", "simplified")].append(_exercise("吃饭", "multiple choice"))
+        pool._items[("吃饭", "fill in the blank", "simplified")].append(_exercise("吃饭"))
+
+        exercise_type, pooled, cold = pool.take(["谢谢", "吃饭"], ["fill in the blank", "multiple choice"], "simplified")
+        assert exercise_type == "multiple choice" and cold == []
+        merged = merge_exercises([exercise for _, exercise in pooled])
+        assert merged["exercise_type"] == "multiple_choice" and merged["answers"] == [3, 3]
+        assert [q["text"] for q in merged["questions"]] == ["谢谢", "吃饭"]
+
+        pool.put_back(pooled)
+        assert pool.size == 3
+        await pool.stop()
+
+    asyncio.run(run())
+
+
+def test_exercises_that_fail_their_checks_are_not_pooled():
+    async def run():
+        pool = ExercisePool(FakeGenerate(passed=False), depth=1, concurrency=1)
+        pool.add_words([e for e in sample_tables()["dictionaryentry"] if e["simplified"] == "吃饭"], ["simplified"])
+        pool.start()
+        await _drain(pool)
+        assert pool.size == 0
+        _, pooled, cold = pool.take(["吃饭"], ["fill in the blank"], "simplified")
+        assert pooled == [] and cold == ["吃饭"]
+        await pool.stop()
+
+    asyncio.run(run())
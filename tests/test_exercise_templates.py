@@ -0,0 +1,75 @@
+import random
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from conftest import sample_tables
+from src.api.exercise_routes import router
+from src.db import connection
+from src.db.local import LocalClient, set_local_dictionary
+from src.exercises import jobs
+from src.exercises.distractors import DistractorIndex
+from src.exercises.templates import BLANK, build_exercise
+
+INDEX = DistractorIndex(sample_tables()["dictionaryentry"], sample_tables()["part_of_speech"])
+
+
+def _use_sample(monkeypatch, sample_dictionary):
+    monkeypatch.setattr(connection, "DICTIONARY_SOURCE", "local")
+    set_local_dictionary(sample_dictionary)
+    return lambda: LocalClient(sample_dictionary)
+
+
+def test_fill_in_the_blank_from_templates(monkeypatch, sample_dictionary):
+    client_factory = _use_sample(monkeypatch, sample_dictionary)
+    try:
+        exercise = build_exercise(["火车", "想", "谢谢"], ["fill in the blank"], "traditional", random.Random(1),
+                                  client_factory, INDEX)
+    finally:
+        set_local_dictionary(None)
+    assert exercise["exercise_type"] == "fill_in_blank"
+    assert exercise["answers"] == ["火車", "想", "謝謝"]
+    train, think, thanks = (q["text"] for q in exercise["questions"])
+    assert all(text.count(BLANK) == 1 for text in (train, think, thanks))
+    # A noun or verb template in the requested script, with the first meaning as a hint
+    assert train.endswith("(train)") and "这" not in train
+    assert think.endswith("(to think)")
+    # 谢谢 has no part of speech, so it is asked for by meaning
+    assert thanks == f"Write the word that means “to thank”: {BLANK}"
+
+
+def test_multiple_choice_from_distractors_and_unknown_words(monkeypatch, sample_dictionary):
+    client_factory = _use_sample(monkeypatch, sample_dictionary)
+    try:
+        exercise = build_exercise(["好"], ["multiple choice"], "simplified", random.Random(1), client_factory, INDEX)
+        unknown = build_exercise(["喝茶"], ["fill in the blank"], "simplified", None, client_factory, INDEX)
+    finally:
+        set_local_dictionary(None)
+    question, answer = exercise["questions"][0], exercise["answers"][0]
+    assert question["text"] == "Which word means “good”?"
+    assert len(set(question["options"])) == 4 and question["options"][answer] == "好"
+    assert unknown is None
+
+
+def test_route_passes_the_engine_to_the_job(monkeypatch):
+    submitted = []
+
+    async def generate(words, exercise_types, character_type, engine, on_event):
+        submitted.append((words, exercise_types, engine))
+        return {"exercise_type": "fill_in_blank", "questions": [{"text": BLANK}], "answers": words}
+
+    @asynccontextmanager
+    async def lifespan(app):
+        jobs.start_job_queue(generate)
+        yield
+        await jobs.stop_job_queue()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(router)
+    body = {"engine": "template", "words": [{"word": "吃", "exercise_type": "fill in the blank", "type": "simplified"}]}
+    with TestClient(app) as client:
+        resp = client.post("/generate-exercise", json=body)
+    assert resp.status_code == 200 and resp.json()["answers"] == ["吃"]
+    # The pipeline decides between the template engine and the model
+    assert submitted == [(["吃"], ["fill in the blank"], "template")]
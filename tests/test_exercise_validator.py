@@ -0,0 +1,59 @@
+from conftest import sample_tables
+
+from src.exercises.validator import INCONCLUSIVE, INVALID, VALID, ScriptTable, validate_exercise
+
+TABLE = ScriptTable(sample_tables()["dictionaryentry"])
+
+
+def _fill_in_blank(questions, answers):
+    return {"exercise_type": "fill_in_blank", "questions": [{"text": q} for q in questions], "answers": answers}
+
+
+def _multiple_choice(questions, answers):
+    return {
+        "exercise_type": "multiple_choice",
+        "questions": [{"text": text, "options": options} for text, options in questions],
+        "answers": answers,
+    }
+
+
+def test_well_formed_exercises_are_valid():
+    exercise = _fill_in_blank(["我想_____。", "今天我们去_____。"], ["吃饭", "火车站"])
+    assert validate_exercise(exercise, ["吃饭", "火车站"], "simplified", ["fill in the blank"], TABLE).status == VALID
+
+    exercise = _multiple_choice([("Which word means 'train'?", ["火車", "謝謝", "愛", "飯"])], [0])
+    # The word was picked in simplified; its traditional form counts
+    assert validate_exercise(exercise, ["火车"], "traditional", ["multiple choice"], TABLE).status == VALID
+
+
+def test_structural_problems_are_invalid():
+    exercise = _fill_in_blank(["我想_____。", "今天我们去火车站。"], ["吃饭", "火车站"])
+    result = validate_exercise(exercise, ["吃饭", "火车站"], "simplified", ["fill in the blank"], TABLE)
+    assert result.status == INVALID
+    assert "The questions have 1 blanks but there are 2 answers" in result.issues
+    assert "Question 2 has no _____ blank" in result.issues
+
+    exercise = _multiple_choice([("Which word means 'train'?", ["火车", "谢谢", "爱"])], [4])
+    result = validate_exercise(exercise, ["火车", "吃饭"], "simplified", ["fill in the blank"], TABLE)
+    assert result.status == INVALID
+    assert result.issues == [
+        "The exercise is multiple_choice, not fill_in_blank",
+        "Question 1 has 3 options instead of 4",
+        "Answer 1 (4) is not an option index from 0 to 3",
+        "The word 吃饭 is not used",
+    ]
+
+
+def test_wrong_script_is_invalid():
+    exercise = _fill_in_blank(["我们去火車站。_____"], ["谢谢"])
+    result = validate_exercise(exercise, ["谢谢"], "simplified", ["fill in the blank"], TABLE)
+    assert result.status == INVALID
+    assert result.issues == ["Uses characters that are not simplified: 車"]
+
+
+def test_unchecked_script_is_inconclusive():
+    exercise = _fill_in_blank(["我想_____。"], ["吃饭"])
+    assert validate_exercise(exercise, ["吃饭"], "simplified", ["fill in the blank"], None).status == INCONCLUSIVE
+    # Not in the dictionary, so its script cannot be checked
+    exercise = _fill_in_blank(["我想_____。"], ["喝茶"])
+    assert validate_exercise(exercise, ["喝茶"], "simplified", ["fill in the blank"], TABLE).status == INCONCLUSIVE
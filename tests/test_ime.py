@@ -0,0 +1,61 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import endpoints
+from src.db import connection
+from src.db.local import set_local_dictionary
+from src.search.ime import PinyinLexicon
+
+from conftest import sample_tables
+
+
+def _lexicon():
+    entries = sample_tables()["dictionaryentry"] + [
+        {"id": 30, "simplified": "西安", "traditional": "西安", "pinyin": "Xi1 an1", "english_definitions": "Xi'an",
+         "hsk_level": None, "frequency_rank": 3000},
+        {"id": 31, "simplified": "先", "traditional": "先", "pinyin": "xian1", "english_definitions": "first",
+         "hsk_level": 1, "frequency_rank": 100},
+    ]
+    return PinyinLexicon(entries)
+
+
+def _texts(conversions):
+    return [c["text"] for c in conversions]
+
+
+def test_converts_toneless_run_on_pinyin():
+    lexicon = _lexicon()
+    conversions = lexicon.convert("woxiangqu huochezhan", n=1)
+    assert _texts(conversions) == ["我想去火车站"]
+    assert [w["entry_id"] for w in conversions[0]["words"]] == [5, 7, 8, 9]
+    assert conversions[0]["score"] == 1.0
+
+
+def test_alternatives_are_ranked_and_distinct():
+    lexicon = _lexicon()
+    conversions = lexicon.convert("nihao", n=3)
+    assert _texts(conversions)[:2] == ["你好", "你号"]
+    assert len(set(_texts(conversions))) == len(conversions)
+    assert conversions[0]["score"] > conversions[1]["score"]
+    assert _texts(lexicon.convert("ni3 hao3", n=1, script="traditional")) == ["你好"]
+    assert _texts(lexicon.convert("xiexie", n=1, script="traditional")) == ["謝謝"]
+
+
+def test_separators_mark_syllable_breaks():
+    lexicon = _lexicon()
+    assert _texts(lexicon.convert("xian", n=2)) == ["先", "西安"]
+    assert _texts(lexicon.convert("xi'an", n=1)) == ["西安"]
+    assert lexicon.convert("qwrt") == []
+
+
+def test_convert_endpoint(monkeypatch, sample_dictionary):
+    monkeypatch.setattr(connection, "DICTIONARY_SOURCE", "local")
+    set_local_dictionary(sample_dictionary)
+    endpoints.get_ime(connection.get_connection).build()
+    app = FastAPI()
+    app.include_router(endpoints.router)
+    try:
+        body = TestClient(app).get("/convert", params={"pinyin": "chifan", "n": 1}).json()
+    finally:
+        set_local_dictionary(None)
+    assert body["conversions"][0]["text"] == "吃饭"
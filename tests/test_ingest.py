@@ -0,0 +1,88 @@
+import json
+import sqlite3
+
+from src.ingest.extract import extract_hsk_levels
+from src.ingest.pipeline import Checkpoint, SQLiteSink, ingest, iter_source_entries
+
+SOURCE = [
+    {"simplified": "爱", "radical": "爫", "frequency": 160, "level": ["new-1", "old-1"], "pos": ["v", "n"],
+     "forms": [{"traditional": "愛", "transcriptions": {"pinyin": "ài", "numeric": "ai4"},
+                "meanings": ["to love", "affection"], "classifiers": []}]},
+    {"simplified": "车", "radical": "车", "frequency": 250, "level": ["new-1"], "pos": ["n"],
+     "forms": [{"traditional": "車", "transcriptions": {"pinyin": "chē", "numeric": "che1"},
+                "meanings": ["car", "vehicle"], "classifiers": ["辆"]}]},
+    {"simplified": "还", "radical": "辶", "frequency": 30, "level": ["old-2"], "pos": ["adv", "v"],
+     "forms": [{"traditional": "還", "transcriptions": {"numeric": "hai2"}, "meanings": ["still"], "classifiers": []},
+               {"traditional": "還", "transcriptions": {"numeric": "huan2"}, "meanings": ["to return"], "classifiers": []}]},
+    {"simplified": "没有", "level": [], "forms": [{"traditional": "沒有", "transcriptions": {}, "meanings": ["not have"]}]},
+]
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE dictionaryentry (id INTEGER PRIMARY KEY, simplified TEXT, traditional TEXT, pinyin TEXT,
+            english_definitions TEXT, radical TEXT, hsk_level INTEGER, old_hsk_level INTEGER,
+            new_hsk_level INTEGER, frequency_rank INTEGER);
+        CREATE TABLE part_of_speech (id INTEGER PRIMARY KEY, entry_id INTEGER REFERENCES dictionaryentry(id), pos TEXT);
+        CREATE TABLE classifier (id INTEGER PRIMARY KEY, entry_id INTEGER REFERENCES dictionaryentry(id), classifier TEXT);
+        CREATE TABLE transcription (id INTEGER PRIMARY KEY, entry_id INTEGER REFERENCES dictionaryentry(id), system TEXT, value TEXT);
+        CREATE TABLE meaning (id INTEGER PRIMARY KEY, entry_id INTEGER REFERENCES dictionaryentry(id), definition TEXT);
+        INSERT INTO dictionaryentry (id, simplified, traditional, pinyin) VALUES
+            (1, '爱', '愛', 'ai4'), (2, '车', '車', 'che1'), (3, '还', '還', 'hai2'), (4, '还', '還', 'huan2');
+    """)
+    return conn
+
+
+def write_source(tmp_path):
+    path = tmp_path / "complete.json"
+    path.write_text(json.dumps(SOURCE, ensure_ascii=False, indent=1), encoding="utf-8")
+    return str(path)
+
+
+def test_extract_hsk_levels():
+    assert extract_hsk_levels(["new-7+", "old-5", "new-4"]) == (5, 4)
+    assert extract_hsk_levels([]) == (None, None)
+
+
+def test_streaming_parser_handles_small_chunks(tmp_path):
+    source = write_source(tmp_path)
+    assert list(iter_source_entries(source, chunk_size=7)) == SOURCE
+
+
+def test_ingest_is_idempotent(tmp_path):
+    conn = make_db(str(tmp_path / "cedict.db"))
+    source = write_source(tmp_path)
+    for _ in range(2):
+        stats = ingest(source, [SQLiteSink(conn)], batch_size=2, verbose=False)
+    assert stats == {"entries": 4, "updated": 4, "not_found": 1, "skipped": 0}
+    assert conn.execute("SELECT hsk_level, frequency_rank, radical FROM dictionaryentry WHERE id = 1").fetchone() == (1, 160, "爫")
+    assert conn.execute("SELECT COUNT(*) FROM part_of_speech WHERE entry_id = 1").fetchone() == (2,)
+    # Readings of the same headword keep their own meanings
+    assert conn.execute("SELECT definition FROM meaning WHERE entry_id = 4").fetchall() == [("to return",)]
+    assert conn.execute("SELECT classifier FROM classifier").fetchall() == [("辆",)]
+
+
+def test_ingest_resumes_from_checkpoint(tmp_path):
+    conn = make_db(str(tmp_path / "cedict.db"))
+    source = write_source(tmp_path)
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.json"))
+    checkpoint.save(source, 2)
+    stats = ingest(source, [SQLiteSink(conn)], batch_size=2, checkpoint=Checkpoint(checkpoint.path), verbose=False)
+    assert stats["skipped"] == 2
+    assert conn.execute("SELECT frequency_rank FROM dictionaryentry WHERE id = 1").fetchone() == (None,)
+    assert conn.execute("SELECT frequency_rank FROM dictionaryentry WHERE id = 3").fetchone() == (30,)
+    assert Checkpoint(checkpoint.path).processed(source) == 4
+
+
+def test_parallel_ingest_matches_serial(tmp_path):
+    source = write_source(tmp_path)
+    tables = {}
+    for workers in (1, 2):
+        conn = make_db(str(tmp_path / f"cedict-{workers}.db"))
+        ingest(source, [SQLiteSink(conn)], batch_size=1, verbose=False, workers=workers)
+        tables[workers] = [
+            conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+            for table in ("dictionaryentry", "part_of_speech", "classifier", "transcription", "meaning")
+        ]
+    assert tables[1] == tables[2]
@@ -0,0 +1,26 @@
+import sys
+import os
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src.detection.input_detection import detect_input_type, detect_input_confidences, is_ambiguous
+
+test_words = ["你好", "car", "book", "shi", "nihao", "ni3hao3", "can", "fan", "man", "pen",
+              "long", "men", "sun", "good morning", "xiexie"]
+
+
+def test_confidences_agree_with_detection():
+    for word in test_words:
+        confidences = detect_input_confidences(word)
+        assert max(confidences, key=confidences.get) == detect_input_type(word), word
+
+
+def test_english_pinyin_overlap_is_ambiguous():
+    for word in ["can", "fan", "man", "pen", "long", "men", "sun"]:
+        assert is_ambiguous(detect_input_confidences(word), 0.25), word
+
+
+def test_clear_inputs_are_not_ambiguous():
+    for word in ["你好", "book", "ni3hao3", "nihao", "good morning"]:
+        assert not is_ambiguous(detect_input_confidences(word), 0.25), word
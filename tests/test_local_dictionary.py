@@ -0,0 +1,36 @@
+from src.db.local import LocalClient
+
+
+def test_exact_or_filter_uses_index(sample_dictionary):
+    client = LocalClient(sample_dictionary)
+    resp = client.table("dictionaryentry").select("id,simplified").or_("simplified.eq.車站,traditional.eq.車站").execute()
+    assert resp.data == [{"id": 11, "simplified": "车站"}]
+
+
+def test_ilike_order_and_range(sample_dictionary):
+    client = LocalClient(sample_dictionary)
+    resp = (
+        client.table("dictionaryentry")
+        .select("id", count="exact")
+        .ilike("pinyin", "hao%")
+        .order("hsk_level", nullsfirst=False)
+        .order("frequency_rank", nullsfirst=False)
+        .range(0, 1)
+        .execute()
+    )
+    # hao3 (1, 20), hao4 (1, 350), hao3 chi1 (2, 900), hao3 ren2 (None)
+    assert [r["id"] for r in resp.data] == [2, 18]
+    assert resp.count == 4
+
+
+def test_in_filter_on_related_table(sample_dictionary):
+    client = LocalClient(sample_dictionary)
+    resp = client.table("meaning").select("entry_id,definition").in_("entry_id", [1, 9]).execute()
+    assert sorted(r["definition"] for r in resp.data) == ["hello", "hi", "railway station"]
+
+
+def test_rows_are_copies(sample_dictionary):
+    client = LocalClient(sample_dictionary)
+    row = client.table("dictionaryentry").select("*").eq("id", 2).execute().data[0]
+    row["match_type"] = "exact"
+    assert "match_type" not in sample_dictionary.entry(2)
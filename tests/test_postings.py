@@ -0,0 +1,49 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import endpoints
+from src.db import connection
+from src.db.local import set_local_dictionary
+from src.search.postings import CharacterPostings
+
+from conftest import sample_tables
+
+
+def _ids(rows):
+    return [r["id"] for r in rows]
+
+
+def test_postings_are_ranked_and_cover_both_scripts():
+    postings = CharacterPostings(sample_tables()["dictionaryentry"])
+    # 车 (1, 250), 火车 (2, 2500), 车站 (2, 3000), 火车站 (2, 4000)
+    assert _ids(postings.page("车", 0, 10)[0]) == [19, 10, 11, 9]
+    assert _ids(postings.page("車", 0, 10)[0]) == [19, 10, 11, 9]
+    rows, total = postings.page("车", 1, 2)
+    assert _ids(rows) == [10, 11] and total == 4
+
+
+def test_postings_filters():
+    postings = CharacterPostings(sample_tables()["dictionaryentry"])
+    rows, total = postings.page("好", 0, 10, hsk_level=1)
+    assert _ids(rows) == [2, 1] and total == 2
+    assert _ids(postings.page("好", 0, 10, length=2)[0]) == [1, 3, 17]
+    assert _ids(postings.page("好", 0, 10, hsk_level=2, length=2)[0]) == [3]
+    assert postings.page("龍", 0, 10) == ([], 0)
+
+
+def test_words_endpoint(monkeypatch, sample_dictionary):
+    monkeypatch.setattr(connection, "DICTIONARY_SOURCE", "local")
+    set_local_dictionary(sample_dictionary)
+    index = endpoints.get_postings(connection.get_connection)
+    index.build()
+    app = FastAPI()
+    app.include_router(endpoints.router)
+    try:
+        resp = TestClient(app).get("/characters/站/words", params={"page_size": 2})
+    finally:
+        set_local_dictionary(None)
+
+    body = resp.json()
+    assert [r["simplified"] for r in body["results"]] == ["站", "车站"]
+    assert [r["match_type"] for r in body["results"]] == ["exact", "contains"]
+    assert body["pagination"] == {"page": 1, "page_size": 2, "total_count": 3, "total_pages": 2}
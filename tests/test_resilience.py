@@ -0,0 +1,96 @@
+import time
+
+from src.db.local import LocalClient
+from src.db.resilience import BackendUnavailable, CircuitBreaker, ResilientClient
+
+
+class FlakyClient:
+    """Serves queries from a LocalClient, failing or stalling on demand."""
+
+    def __init__(self, dictionary, fail=False, delays=None):
+        self._local = LocalClient(dictionary)
+        self.fail = fail
+        self.delays = list(delays or [])
+        self.calls = 0
+
+    def table(self, name):
+        client = self
+        query = self._local.table(name)
+        execute = query.execute
+
+        def flaky_execute():
+            client.calls += 1
+            if client.delays:
+                time.sleep(client.delays.pop(0))
+            if client.fail:
+                raise ConnectionError("backend down")
+            return execute()
+        query.execute = flaky_execute
+        return query
+
+
+def lookup(client, text):
+    return client.table("dictionaryentry").select("id").eq("simplified", text).execute().data
+
+
+def test_breaker_opens_on_error_rate_and_recovers():
+    breaker = CircuitBreaker(window=10, min_calls=4, error_rate=0.5, slow_rate=1.0, slow_ms=1000, cooldown_s=0.05)
+    for failed in (False, True, True, False):
+        assert breaker.allow()
+        breaker.record(failed, 10)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()          # half-open probe
+    assert not breaker.allow()      # only one probe at a time
+    breaker.record(False, 10)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_on_slow_rate():
+    breaker = CircuitBreaker(window=10, min_calls=2, error_rate=1.0, slow_rate=0.5, slow_ms=100, cooldown_s=10)
+    breaker.record(False, 150)
+    breaker.record(False, 150)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_failed_reads_fall_back_to_cached_response(sample_dictionary):
+    raw = FlakyClient(sample_dictionary)
+    client = ResilientClient(raw, fallback=lambda: None)
+    assert lookup(client, "你好") == [{"id": 1}]
+    raw.fail = True
+    assert lookup(client, "你好") == [{"id": 1}]
+
+
+def test_open_circuit_serves_local_snapshot(sample_dictionary):
+    raw = FlakyClient(sample_dictionary, fail=True)
+    client = ResilientClient(raw, fallback=lambda: LocalClient(sample_dictionary))
+    client.breaker = CircuitBreaker(window=4, min_calls=2, cooldown_s=60)
+    for _ in range(2):
+        assert lookup(client, "好") == [{"id": 2}]
+    assert client.breaker.state == CircuitBreaker.OPEN
+    calls = raw.calls
+    assert lookup(client, "我") == [{"id": 5}]
+    assert raw.calls == calls
+
+
+def test_unavailable_without_fallback(sample_dictionary):
+    client = ResilientClient(FlakyClient(sample_dictionary, fail=True), fallback=lambda: None)
+    try:
+        lookup(client, "好")
+    except BackendUnavailable:
+        pass
+    else:
+        raise AssertionError("expected BackendUnavailable")
+
+
+def test_slow_call_is_hedged(sample_dictionary):
+    raw = FlakyClient(sample_dictionary)
+    client = ResilientClient(raw, fallback=lambda: None)
+    for _ in range(client.latency.min_samples):
+        client.latency.observe(1)
+    raw.delays = [0.5]
+    started = time.perf_counter()
+    assert lookup(client, "好") == [{"id": 2}]
+    assert time.perf_counter() - started < 0.3
+    assert raw.calls == 2
@@ -0,0 +1,118 @@
+import sys
+import os
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from src.search.search import run_tiers
+from src.utils.deadline import Deadline
+
+
+def make_tier(rows, delay=0.0, calls=None):
+    def tier():
+        if calls is not None:
+            calls.append(rows)
+        time.sleep(delay)
+        return list(rows)
+    return tier
+
+
+def test_sequential_stops_at_first_hit():
+    calls = []
+    tiers = [make_tier([], calls=calls), make_tier([{"id": 1}], calls=calls), make_tier([{"id": 2}], calls=calls)]
+    assert run_tiers(tiers, speculative=False) == [{"id": 1}]
+    assert len(calls) == 2
+
+
+def test_speculative_keeps_priority_order():
+    # The low-priority tier answers first but must not win over a slower exact hit
+    tiers = [make_tier([{"id": 1}], delay=0.05), make_tier([{"id": 2}])]
+    assert run_tiers(tiers, speculative=True) == [{"id": 1}]
+
+
+def test_speculative_fall_through_costs_one_round_trip():
+    tiers = [make_tier([], delay=0.1), make_tier([], delay=0.1), make_tier([{"id": 3}], delay=0.1)]
+    started = time.perf_counter()
+    assert run_tiers(tiers, speculative=True) == [{"id": 3}]
+    assert time.perf_counter() - started < 0.25
+
+
+def test_speculative_all_empty():
+    assert run_tiers([make_tier([]), make_tier([])], speculative=True) == []
+
+
+def test_speculative_propagates_errors():
+    def failing():
+        raise RuntimeError("backend down")
+    try:
+        run_tiers([failing, make_tier([{"id": 1}])], speculative=True)
+    except RuntimeError as e:
+        assert "backend down" in str(e)
+    else:
+        raise AssertionError("expected the tier error to propagate")
+
+
+def test_deadline_returns_partial_in_sequential_mode():
+    deadline = Deadline(50)
+    tiers = [make_tier([], delay=0.2), make_tier([{"id": 2}])]
+    assert run_tiers(tiers, speculative=False, deadline=deadline) == []
+    assert deadline.partial and deadline.skipped == ["tiers"]
+
+
+def test_deadline_settles_for_finished_lower_tier():
+    deadline = Deadline(50)
+    tiers = [make_tier([{"id": 1}], delay=0.3), make_tier([{"id": 2}])]
+    started = time.perf_counter()
+    assert run_tiers(tiers, speculative=True, deadline=deadline) == [{"id": 2}]
+    assert time.perf_counter() - started < 0.2
+    assert deadline.partial
+
+
+def test_generous_deadline_is_not_partial():
+    deadline = Deadline(1000)
+    assert run_tiers([make_tier([]), make_tier([{"id": 2}])], speculative=True, deadline=deadline) == [{"id": 2}]
+    assert not deadline.partial
+
+
+def test_backend_requests_time_out_with_the_budget():
+    import httpx
+    from src.db.connection import _BudgetedHTTPClient
+
+    timeouts = []
+
+    def handler(request):
+        timeouts.append(request.extensions["timeout"])
+        return httpx.Response(200, json=[])
+
+    client = _BudgetedHTTPClient(transport=httpx.MockTransport(handler), timeout=httpx.Timeout(10.0))
+    client.get("http://backend/rest")
+    Deadline(200).bound(lambda: client.get("http://backend/rest"))()
+    assert timeouts[0]["read"] == 10.0
+    assert 0 < timeouts[1]["read"] <= 0.2 and timeouts[1]["connect"] <= 0.2
+
+
+
+def test_sequential_tiers_are_not_limited_by_the_shared_pool():
+    from concurrent.futures import ThreadPoolExecutor
+    from src.config import SEARCH_MAX_WORKERS
+    from src.utils.deadline import active_deadline
+
+    def lookup(_):
+        deadline = Deadline(500)
+
+        def tier():
+            # Runs on the request's own thread, under its deadline
+            assert active_deadline() is deadline
+            time.sleep(0.1)
+            return [{"id": 1}]
+        rows = run_tiers([make_tier([]), tier], speculative=False, deadline=deadline)
+        return rows, deadline.partial
+
+    # Four times as many concurrent lookups as pool threads; through the pool they would queue for 400 ms
+    requests = SEARCH_MAX_WORKERS * 4
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=requests) as requests_pool:
+        results = list(requests_pool.map(lookup, range(requests)))
+    assert results == [([{"id": 1}], False)] * requests
+    assert time.perf_counter() - started < 0.35
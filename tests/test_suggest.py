@@ -0,0 +1,76 @@
+from src.search import suggest
+from src.search.suggest import PrefixIndex, Suggester, entry_keys, normalize_key
+
+from conftest import sample_tables
+
+
+def _ids(results):
+    return [r["id"] for r in results]
+
+
+def test_normalize_key_folds_tones_and_spacing():
+    assert normalize_key("Nǐ hǎo") == normalize_key("ni3 hao3") == normalize_key("nihao") == "nihao"
+    assert normalize_key("nü3") == normalize_key("nu:3") == "nv"
+
+
+def test_prefix_top_k_is_ordered_by_hsk_then_frequency():
+    index = PrefixIndex(sample_tables()["dictionaryentry"], k=3)
+    # hao3 (1, 20), hao4 (1, 350), hao3 chi1 (2, 900); hao3 ren2 has no HSK level
+    assert _ids(index.lookup("hao")) == [2, 18, 3]
+    assert _ids(index.lookup("ha", limit=2)) == [2, 18]
+    assert _ids(index.lookup("火車")) == [10, 9]
+    assert _ids(index.lookup("xie4xie")) == [12]
+    assert index.lookup("zzz") == []
+
+
+def test_english_senses_and_words_are_keys():
+    index = PrefixIndex(sample_tables()["dictionaryentry"], k=5)
+    assert _ids(index.lookup("stat")) == [20, 11, 9]
+    assert _ids(index.lookup("train st")) == [9]
+    assert index.lookup("hello")[0] == {
+        "id": 1, "simplified": "你好", "traditional": "你好", "pinyin": "ni3 hao3", "gloss": "hello", "hsk_level": 1,
+    }
+
+
+
+def test_precomputed_prefixes_match_a_scan(monkeypatch):
+    entries = sample_tables()["dictionaryentry"]
+    scanned = PrefixIndex(entries, k=3)
+    # Every range longer than one key is precomputed
+    monkeypatch.setattr(suggest, "_SCAN_LIMIT", 1)
+    precomputed = PrefixIndex(entries, k=3)
+    assert precomputed._hot and not scanned._hot
+    prefixes = {key[:n] for entry in entries for key in entry_keys(entry) for n in range(len(key) + 1)}
+    for prefix in prefixes:
+        assert _ids(precomputed.lookup(prefix)) == _ids(scanned.lookup(prefix)), prefix
+
+def test_suggester_reads_backend_when_no_local_dictionary():
+    class Response:
+        def __init__(self, data):
+            self.data = data
+
+    class Query:
+        def __init__(self):
+            self._range = (0, 0)
+
+        def select(self, *_):
+            return self
+
+        def order(self, *_):
+            return self
+
+        def range(self, start, end):
+            self._range = (start, end)
+            return self
+
+        def execute(self):
+            return Response(sample_tables()["dictionaryentry"][self._range[0]:self._range[1] + 1])
+
+    class Client:
+        def table(self, name):
+            return Query()
+
+    suggester = Suggester(lambda: Client(), k=2)
+    assert suggester.suggest("ni") is None
+    suggester.build()
+    assert _ids(suggester.suggest("ni")) == [4, 1]
@@ -0,0 +1,66 @@
+from src.api.endpoints import run_lookup
+from src.db import connection
+from src.db.local import LocalClient, set_local_dictionary
+from src.detection.input_detection import contains_chinese, detect_input_confidences
+from src.detection.tokenizer import is_mixed, span_confidences, tokenize
+from src.search.search import search_mixed
+
+
+def _spans(text):
+    return [(span.type, span.text) for span in tokenize(text)]
+
+
+def test_contains_chinese_extension_b():
+    assert contains_chinese("\U00020001")
+    assert contains_chinese("㐀") and contains_chinese("好")
+    # U+2000 (en quad) used to fall inside the broken Extension B range
+    assert not contains_chinese(" ") and not contains_chinese("a0")
+
+
+def test_tokenize_typed_spans():
+    assert _spans("好 hao3 good") == [("hanzi", "好"), ("numbered_pinyin", "hao3"), ("english", "good")]
+    assert _spans("你好，world!") == [("hanzi", "你好"), ("punctuation", "，"), ("english", "world"), ("punctuation", "!")]
+    assert _spans("ni hao") == [("pinyin", "ni hao")]
+    assert _spans("hǎo péngyou") == [("pinyin", "hǎo péngyou")]
+    assert _spans("good morning 早上好") == [("english", "good morning"), ("hanzi", "早上好")]
+    assert _spans("can") == [("english", "can")]
+
+
+def test_is_mixed():
+    assert is_mixed(tokenize("好 hao3 good"))
+    assert not is_mixed(tokenize("ni3 hao3"))
+    assert not is_mixed(tokenize("你好！"))
+
+
+def test_english_spelled_like_pinyin_is_not_mixed():
+    for text in ["thank you", "I love you", "run fast", "a man", "she can"]:
+        spans = tokenize(text)
+        assert len(spans) == 1 and not is_mixed(spans), text
+        # All-Latin input is scored as before tokenizing
+        assert span_confidences(text, spans) == detect_input_confidences(text), text
+    assert _spans("火车 thank you") == [("hanzi", "火车"), ("english", "thank you")]
+    assert is_mixed(tokenize("hǎo good"))
+
+
+def test_span_confidences():
+    for text in ["你好！", "ni3 hao3", "nihao", "can", "long", "good morning"]:
+        assert span_confidences(text, tokenize(text)) == detect_input_confidences(text), text
+    assert span_confidences("火车 station", tokenize("火车 station")) == {"chinese": 0.5, "pinyin": 0.0, "english": 0.5}
+
+
+def test_search_mixed_ranks_entries_matching_every_span(sample_dictionary, monkeypatch):
+    monkeypatch.setattr(connection, "DICTIONARY_SOURCE", "local")
+    set_local_dictionary(sample_dictionary)
+    try:
+        client = LocalClient(sample_dictionary)
+        results = search_mixed([s for s in tokenize("好 hao3 good")], client, limit=5)
+        response = run_lookup("火车 station", page_size=5)
+    finally:
+        set_local_dictionary(None)
+
+    assert results[0]["simplified"] == "好"
+    assert results[0]["relevance_score"] == 1.0
+    assert response["input_type"] == "mixed"
+    assert response["spans"] == [{"type": "hanzi", "text": "火车"}, {"type": "english", "text": "station"}]
+    # Each span's best match, one per search
+    assert {r["simplified"] for r in response["results"][:2]} == {"火车", "站"}
@@ -0,0 +1,85 @@
+import threading
+from concurrent.futures import Future
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import typeahead
+from src.db import connection
+from src.db.local import set_local_dictionary
+from src.utils.deadline import DeadlineExceeded
+
+
+def _client():
+    app = FastAPI()
+    app.include_router(typeahead.router)
+    return TestClient(app)
+
+
+def test_superseded_query_is_cancelled_and_not_answered(monkeypatch):
+    started, gave_up = threading.Event(), threading.Event()
+    cancelled = []
+
+    def fake_lookup(text, page, page_size, fanout, deadline):
+        if text == "slow":
+            started.set()
+            try:
+                deadline.wait(Future())
+            except DeadlineExceeded:
+                cancelled.append(deadline.cancelled)
+                gave_up.set()
+        return {"input_type": "english", "results": [text]}
+
+    monkeypatch.setattr(typeahead, "run_lookup", fake_lookup)
+    monkeypatch.setattr(typeahead, "get_suggester", lambda factory: type("S", (), {"suggest": lambda self, q, k: None})())
+
+    with _client().websocket_connect("/ws/search") as ws:
+        ws.send_json({"q": "slow", "seq": 1})
+        assert started.wait(5)
+        ws.send_json({"q": "fast", "seq": 2})
+        message = ws.receive_json()
+
+    assert message["seq"] == 2 and message["type"] == "lookup" and message["results"] == ["fast"]
+    # The slow lookup's thread notices the cancellation on its own schedule
+    assert gave_up.wait(5)
+    assert cancelled == [True]
+
+
+def test_channel_runs_the_lookup_pipeline(monkeypatch, sample_dictionary):
+    monkeypatch.setattr(connection, "DICTIONARY_SOURCE", "local")
+    set_local_dictionary(sample_dictionary)
+    try:
+        with _client().websocket_connect("/ws/search") as ws:
+            ws.send_text("火车站")
+            message = ws.receive_json()
+            if message["type"] == "suggest":
+                assert message["suggestions"][0]["id"] == 9
+                message = ws.receive_json()
+    finally:
+        set_local_dictionary(None)
+
+    assert message["seq"] == 1 and message["type"] == "lookup"
+    assert message["input_type"] == "chinese"
+    assert message["results"][0]["simplified"] == "火车站"
+    assert message["results"][0]["meanings"] == ["railway station"]
+
+
+def test_bad_options_get_an_error_frame(monkeypatch):
+    calls = []
+
+    def fake_lookup(text, page, page_size, fanout, deadline):
+        calls.append((page_size, fanout))
+        return {"input_type": "english", "results": []}
+
+    monkeypatch.setattr(typeahead, "run_lookup", fake_lookup)
+    monkeypatch.setattr(typeahead, "get_suggester", lambda factory: type("S", (), {"suggest": lambda self, q, k: None})())
+
+    with _client().websocket_connect("/ws/search") as ws:
+        for seq, options in enumerate(({"page_size": "ten"}, {"page_size": 0}, {"page_size": 101}), 1):
+            ws.send_json({"q": "can", "seq": seq, **options})
+            message = ws.receive_json()
+            assert message["seq"] == seq and message["type"] == "error" and message["status"] == 422
+        ws.send_json({"q": "can", "seq": 4, "page_size": "5", "fanout": "false"})
+        assert ws.receive_json()["type"] == "lookup"
+
+    assert calls == [(5, False)]
@@ -0,0 +1,31 @@
+from src.db import connection
+from src.db.local import LocalClient, set_local_dictionary
+from src.exercises import vocabulary
+from src.exercises.vocabulary import word_details
+
+
+def test_word_details_are_resolved_in_one_query_and_cached(monkeypatch, sample_dictionary):
+    monkeypatch.setattr(connection, "DICTIONARY_SOURCE", "local")
+    set_local_dictionary(sample_dictionary)
+    clients = []
+
+    def client_factory():
+        clients.append(LocalClient(sample_dictionary))
+        return clients[-1]
+
+    try:
+        details = word_details(["谢谢", "火車", "喝茶"], client_factory)
+        assert [d["found"] for d in details] == [True, True, False]
+        thanks, train, _ = details
+        assert thanks["pinyin"] == "xie4 xie5" and thanks["traditional"] == "謝謝" and thanks["hsk_level"] == 1
+        # Matched on the traditional form, and related tables are filled in
+        assert train["simplified"] == "火车" and train["classifiers"] == ["列"] and train["parts_of_speech"] == ["n"]
+        assert len(clients) == 1
+
+        # Cached, including the miss
+        assert word_details(["火車", "喝茶"], client_factory)[0] == train
+        assert len(clients) == 1
+    finally:
+        set_local_dictionary(None)
+    # Swapping the dictionary clears the cache
+    assert not vocabulary._cache